@@ -76,7 +76,7 @@ def initialize_retrievers():
     
     # Load BM25 index
     print("\n📦 Loading BM25 Index...")
-    bm25_index = BM25Index.load_from_disk("data/bm25_index.pkl")
+    bm25_index = BM25Index.load_from_disk("data/bm25_index.bin")
     
     # Initialize hybrid retriever
     print("\n🔗 Initializing Hybrid Retriever...")
@@ -267,17 +267,20 @@ def run_retrieval_tests(hybrid: HybridRetriever, top_k: int = 10) -> Dict[str, A
     
     all_results = {}
     
-    for query_info in TEST_QUERIES:
+    # BM25 for all queries in one sparse matrix product; latency is the
+    # batch time per query
+    start = time.time()
+    bm25_batch = hybrid.bm25_index.search_batch([q["text"] for q in TEST_QUERIES], top_k=top_k)
+    bm25_latency = (time.time() - start) * 1000 / max(len(TEST_QUERIES), 1)
+    
+    for query_info, bm25_results in zip(TEST_QUERIES, bm25_batch):
         query_id = query_info["id"]
         query_text = query_info["text"]
         
-        # Retrieve from all three methods
+        # Retrieve from vector and hybrid (BM25 came from the batch above)
         vector_results, vector_latency = retrieve_with_timing(
             hybrid.retrieve_vector, query_text, top_k
         )
-        bm25_results, bm25_latency = retrieve_with_timing(
-            hybrid.retrieve_bm25, query_text, top_k
-        )
         hybrid_results, hybrid_latency = retrieve_with_timing(
             hybrid.retrieve_hybrid, query_text, top_k
         )
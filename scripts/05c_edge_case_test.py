@@ -26,7 +26,7 @@ vector_store.load_chunks("data/processed/chunks.json")
 vector_store.create_or_load_collection()
 
 print("\n📦 Loading BM25 Index...")
-bm25_index = BM25Index.load_from_disk("data/bm25_index.pkl")
+bm25_index = BM25Index.load_from_disk("data/bm25_index.bin")
 
 print("\n🔗 Initializing Hybrid Retriever...")
 hybrid = HybridRetriever(vector_store, bm25_index)
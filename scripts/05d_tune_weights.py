@@ -28,7 +28,7 @@ vector_store.create_or_load_collection()
 
 # Load BM25 index
 print("\n📦 Loading BM25 Index...")
-bm25_index = BM25Index.load_from_disk("data/bm25_index.pkl")
+bm25_index = BM25Index.load_from_disk("data/bm25_index.bin")
 
 # Initialize hybrid retriever
 print("\n🔗 Initializing Hybrid Retriever...")
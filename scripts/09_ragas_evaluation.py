@@ -20,7 +20,7 @@ import time
 import os
 import re
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 import numpy as np
 import statistics
@@ -172,13 +172,20 @@ def run_rag_pipeline(
     query_text: str,
     vector_store: VectorStore,
     openai_llm: ChatOpenAI,
-    top_k: int = 15  # ← CHANGED from 8 to 15
+    top_k: int = 15,  # ← CHANGED from 8 to 15
+    raw_chunks: Optional[List[RetrievedChunk]] = None
 ) -> Dict[str, Any]:
-    """Run complete RAG pipeline with VECTOR-ONLY retrieval + reranking."""
+    """
+    Run complete RAG pipeline with VECTOR-ONLY retrieval + reranking.
+    
+    raw_chunks: top_k results already retrieved for query_text (e.g. by
+    vector_store.search_batch); searched here if not given.
+    """
     start_time = time.time()
     
     # 1. Retrieve MORE chunks initially (15 instead of 8)
-    raw_chunks = vector_store.search(query_text, top_k=top_k)
+    if raw_chunks is None:
+        raw_chunks = vector_store.search(query_text, top_k=top_k)
     
     # 2. RERANK: Apply multi-stage filtering
     # Stage 1: Remove very low scores
@@ -337,6 +344,11 @@ def build_ragas_dataset(
     ground_truths = [""] * len(existing_questions)  # Empty ground truths
     metadata = existing_metadata.copy()
     
+    # Retrieve for all remaining queries at once (one encode + one backend query)
+    retrieved = vector_store.search_batch(
+        [q["query_text"] for q in queries[start_idx:]], top_k=15
+    )
+    
     # Process remaining queries
     for i in range(start_idx, len(queries)):
         query_info = queries[i]
@@ -348,7 +360,10 @@ def build_ragas_dataset(
         
         try:
             # Run RAG pipeline with vector-only retrieval
-            result = run_rag_pipeline(query_text, vector_store, openai_llm, top_k=15)
+            result = run_rag_pipeline(
+                query_text, vector_store, openai_llm, top_k=15,
+                raw_chunks=retrieved[i - start_idx]
+            )
             
             # Store results
             questions.append(result['question'])
@@ -16,7 +16,7 @@ vector_store = VectorStore(
 vector_store.load_chunks("data/processed/chunks.json")
 vector_store.create_or_load_collection()
 
-bm25_index = BM25Index.load_from_disk("data/bm25_index.pkl")
+bm25_index = BM25Index.load_from_disk("data/bm25_index.bin")
 hybrid = HybridRetriever(vector_store, bm25_index)
 
 # Test 3 failed queries
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Script: 13_benchmark_bm25_build.py
+Purpose: Compare serial vs multiprocessing BM25 index build
+
+The real chunk set is replicated (×1, ×10, ×50) to simulate a corpus that
+grows beyond the nine locked drugs. For each size the serial build and
+the parallel build (process pool) are timed and checked to produce an
+identical index. build_index() stays serial when workers >= the CPU
+count or the corpus is smaller than PARALLEL_BUILD_MIN_CHUNKS; those rows
+are marked as serial fallbacks.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.bm25_index import PARALLEL_BUILD_MIN_CHUNKS, BM25Index
+
+CHUNKS_PATH = "data/processed/chunks.json"
+SCALE_FACTORS = [1, 10, 50]
+CPU_COUNT = os.cpu_count() or 1
+WORKER_COUNTS = [2, 4, CPU_COUNT - 1]  # Leave a core for the merging process
+
+
+def timed_build(chunks, workers=None) -> tuple:
+    """
+    Build a BM25 index over chunks (build logging suppressed).
+
+    Returns:
+        tuple: (index, elapsed_seconds)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        index = BM25Index(k1=1.5, b=0.75)
+        index.chunks = chunks
+        start = time.perf_counter()
+        index.build_index(workers=workers)
+        elapsed = time.perf_counter() - start
+    return index, elapsed
+
+
+def same_index(a: BM25Index, b: BM25Index) -> bool:
+    """True if two indexes have identical vocab, postings and IDF."""
+    return (
+        a.vocab == b.vocab
+        and np.array_equal(a.postings_offsets, b.postings_offsets)
+        and np.array_equal(a.postings_doc_ids, b.postings_doc_ids)
+        and np.array_equal(a.postings_tfs, b.postings_tfs)
+        and np.array_equal(a.doc_lengths, b.doc_lengths)
+        and np.array_equal(a.idf, b.idf)
+    )
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        base_chunks = BM25Index().load_chunks(CHUNKS_PATH)
+
+    worker_counts = sorted(set(w for w in WORKER_COUNTS if w > 1))
+
+    print("=" * 80)
+    print(f"BM25 INDEX BUILD BENCHMARK (serial vs process pool, CPU cores: {CPU_COUNT})")
+    print("=" * 80)
+
+    for scale in SCALE_FACTORS:
+        chunks = base_chunks * scale
+        serial_index, serial_time = timed_build(chunks)
+
+        print(f"\n📊 {len(chunks):,} chunks (×{scale})")
+        print(f"   {'serial':22s}: {serial_time:8.2f}s")
+
+        for workers in worker_counts:
+            parallel_index, parallel_time = timed_build(chunks, workers=workers)
+            status = "✅ identical" if same_index(serial_index, parallel_index) else "❌ MISMATCH"
+            if workers >= CPU_COUNT or len(chunks) < PARALLEL_BUILD_MIN_CHUNKS:
+                status += " (serial fallback)"
+            label = f"{workers} workers / {CPU_COUNT} CPUs"
+            print(f"   {label:22s}: {parallel_time:8.2f}s "
+                  f"({serial_time / parallel_time:.2f}× speedup) {status}")
+
+    print(f"\n{'=' * 80}")
+    print("✅ BM25 build benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Script: 14_benchmark_bm25_batch.py
+Purpose: Compare per-query BM25Index.search loops against search_batch
+
+Uses the evaluation queries in data/evaluation/test_queries.json, repeated
+to simulate evaluation sweeps of hundreds of queries, and checks that the
+batch path returns the same rankings.
+"""
+
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.bm25_index import BM25Index
+
+CHUNKS_PATH = "data/processed/chunks.json"
+TEST_QUERIES_PATH = "data/evaluation/test_queries.json"
+SWEEP_SIZES = [20, 200, 1000]
+TOP_K = 10
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        bm25_index = BM25Index(k1=1.5, b=0.75)
+        bm25_index.load_chunks(CHUNKS_PATH)
+        bm25_index.build_index()
+
+    with open(TEST_QUERIES_PATH, 'r', encoding='utf-8') as f:
+        base_queries = [q['query_text'] for q in json.load(f)['queries']]
+
+    print("=" * 80)
+    print(f"BM25 BATCH SEARCH BENCHMARK ({bm25_index.get_corpus_size()} chunks, top_k={TOP_K})")
+    print("=" * 80)
+
+    # Build the term-weight matrix once, outside the timed region
+    bm25_index.search_batch(base_queries[:1], top_k=TOP_K)
+
+    for size in SWEEP_SIZES:
+        queries = (base_queries * (size // len(base_queries) + 1))[:size]
+
+        start = time.perf_counter()
+        loop_results = [bm25_index.search(q, top_k=TOP_K) for q in queries]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch_results = bm25_index.search_batch(queries, top_k=TOP_K)
+        batch_time = time.perf_counter() - start
+
+        matches = sum(
+            [r.chunk_id for r in a] == [r.chunk_id for r in b]
+            for a, b in zip(loop_results, batch_results)
+        )
+
+        print(f"\n📊 {size} queries")
+        print(f"   search() loop   : {loop_time * 1000:8.1f} ms ({loop_time / size * 1000:.2f} ms/query)")
+        print(f"   search_batch()  : {batch_time * 1000:8.1f} ms ({batch_time / size * 1000:.2f} ms/query)")
+        print(f"   Speedup         : {loop_time / batch_time:.1f}×")
+        print(f"   Same rankings   : {matches}/{size}")
+
+    print(f"\n{'=' * 80}")
+    print("✅ BM25 batch benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
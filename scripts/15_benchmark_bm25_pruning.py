@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Script: 15_benchmark_bm25_pruning.py
+Purpose: Compare exhaustive BM25 scoring against MaxScore dynamic pruning
+
+Queries come from data/evaluation/test_queries.json and are split into
+stop-word-heavy queries (at least a quarter of their tokens occur in half
+of the chunks or more, e.g. "what", "the", "of") and the rest. The chunk
+set is replicated (×1, ×10, ×50) to simulate a larger corpus, since
+queries under PRUNING_MIN_POSTINGS postings are always scored
+exhaustively. Rankings are checked to be identical.
+"""
+
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.bm25_index import BM25Index
+
+CHUNKS_PATH = "data/processed/chunks.json"
+TEST_QUERIES_PATH = "data/evaluation/test_queries.json"
+SCALE_FACTORS = [1, 10, 50]
+TOP_K = 10
+REPEATS = 20
+STOPWORD_DF_FRACTION = 0.5  # Token occurs in at least this share of chunks
+MIN_STOPWORD_SHARE = 0.25   # Share of query tokens that are stop words
+
+
+def build(chunks) -> BM25Index:
+    """Build a BM25 index over chunks (build logging suppressed)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        index = BM25Index(k1=1.5, b=0.75)
+        index.chunks = chunks
+        index.build_index()
+    return index
+
+
+def is_stopword_heavy(index: BM25Index, query: str) -> bool:
+    """True if enough query tokens are very common in the corpus."""
+    df = np.diff(index.postings_offsets)
+    tokens = index.tokenize(query)
+    common = [
+        token in index.vocab
+        and df[index.vocab[token]] >= STOPWORD_DF_FRACTION * index.get_corpus_size()
+        for token in tokens
+    ]
+    return bool(tokens) and sum(common) / len(tokens) >= MIN_STOPWORD_SHARE
+
+
+def time_queries(index: BM25Index, queries, dynamic_pruning: bool) -> tuple:
+    """
+    Run every query REPEATS times.
+
+    Returns:
+        tuple: (ms per query, results of the last repeat)
+    """
+    index.dynamic_pruning = dynamic_pruning
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        results = [index.search(q, top_k=TOP_K) for q in queries]
+    elapsed = time.perf_counter() - start
+    return elapsed / (REPEATS * len(queries)) * 1000, results
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        base_chunks = BM25Index().load_chunks(CHUNKS_PATH)
+
+    with open(TEST_QUERIES_PATH, 'r', encoding='utf-8') as f:
+        queries = [q['query_text'] for q in json.load(f)['queries']]
+
+    base_index = build(base_chunks)
+    query_sets = {
+        "stop-word-heavy": [q for q in queries if is_stopword_heavy(base_index, q)],
+        "other": [q for q in queries if not is_stopword_heavy(base_index, q)]
+    }
+
+    print("=" * 80)
+    print(f"BM25 DYNAMIC PRUNING BENCHMARK (MaxScore, top_k={TOP_K})")
+    print("=" * 80)
+    for name, query_set in query_sets.items():
+        print(f"{name:16s}: {len(query_set)} queries")
+
+    for scale in SCALE_FACTORS:
+        index = base_index if scale == 1 else build(base_chunks * scale)
+        index.search(queries[0], top_k=TOP_K)  # Build pruning bounds outside the timed region
+
+        print(f"\n📊 {index.get_corpus_size():,} chunks (×{scale})")
+        for name, query_set in query_sets.items():
+            if not query_set:
+                continue
+            full_ms, full_results = time_queries(index, query_set, dynamic_pruning=False)
+            pruned_ms, pruned_results = time_queries(index, query_set, dynamic_pruning=True)
+            matches = sum(
+                [(r.chunk_id, r.score) for r in a] == [(r.chunk_id, r.score) for r in b]
+                for a, b in zip(full_results, pruned_results)
+            )
+            print(f"   {name:16s}: exhaustive {full_ms:6.2f} ms/query | "
+                  f"pruned {pruned_ms:6.2f} ms/query | "
+                  f"{full_ms / pruned_ms:.2f}× | same top-k {matches}/{len(query_set)}")
+
+    print(f"\n{'=' * 80}")
+    print("✅ BM25 pruning benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Script: 16_benchmark_vector_batch.py
+Purpose: Compare per-query VectorStore.search loops against search_batch
+
+Uses the evaluation queries in data/evaluation/test_queries.json, repeated
+to simulate evaluation sweeps, and checks that the batch path (one encode
+call, one Chroma query) returns the same rankings.
+"""
+
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.vector_store import VectorStore
+
+CHUNKS_PATH = "data/processed/chunks.json"
+TEST_QUERIES_PATH = "data/evaluation/test_queries.json"
+SWEEP_SIZES = [20, 100, 500]
+TOP_K = 10
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        vector_store = VectorStore(
+            persist_directory="data/chromadb",
+            embedding_model_name="all-MiniLM-L6-v2"
+        )
+        vector_store.load_chunks(CHUNKS_PATH)
+        vector_store.create_or_load_collection()
+
+    with open(TEST_QUERIES_PATH, 'r', encoding='utf-8') as f:
+        base_queries = [q['query_text'] for q in json.load(f)['queries']]
+
+    print("=" * 80)
+    print(f"VECTOR BATCH SEARCH BENCHMARK ({vector_store.get_chunk_count()} chunks, top_k={TOP_K})")
+    print("=" * 80)
+
+    # Warm up the model and the collection outside the timed region
+    vector_store.search_batch(base_queries[:2], top_k=TOP_K)
+
+    for size in SWEEP_SIZES:
+        queries = (base_queries * (size // len(base_queries) + 1))[:size]
+
+        start = time.perf_counter()
+        loop_results = [vector_store.search(q, top_k=TOP_K) for q in queries]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch_results = vector_store.search_batch(queries, top_k=TOP_K)
+        batch_time = time.perf_counter() - start
+
+        matches = sum(
+            [r.chunk_id for r in a] == [r.chunk_id for r in b]
+            for a, b in zip(loop_results, batch_results)
+        )
+
+        print(f"\n📊 {size} queries")
+        print(f"   search() loop   : {loop_time * 1000:8.1f} ms ({loop_time / size * 1000:.2f} ms/query)")
+        print(f"   search_batch()  : {batch_time * 1000:8.1f} ms ({batch_time / size * 1000:.2f} ms/query)")
+        print(f"   Speedup         : {loop_time / batch_time:.1f}×")
+        print(f"   Same rankings   : {matches}/{size}")
+
+    print(f"\n{'=' * 80}")
+    print("✅ Vector batch benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Script: 17_benchmark_vector_backends.py
+Purpose: Compare the ChromaDB (HNSW) and NumPy flat-index vector backends
+
+The flat index is built from the embeddings already stored in the Chroma
+collection (no re-embedding), so both backends search the same vectors.
+Query embeddings are computed once up front; the timings cover only the
+backend query (Chroma round trip vs one matrix-vector product +
+argpartition). Recall@k is measured against exact cosine search.
+"""
+
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.flat_index import FlatIndexBackend
+from src.retrieval.vector_backend import normalize_rows
+from src.retrieval.vector_store import VectorStore
+
+CHUNKS_PATH = "data/processed/chunks.json"
+TEST_QUERIES_PATH = "data/evaluation/test_queries.json"
+TOP_K = 10
+REPEATS = 20
+
+
+def time_backend(backend, query_embeddings) -> np.ndarray:
+    """Per-query latencies (ms) over REPEATS passes."""
+    latencies = []
+    for _ in range(REPEATS):
+        for embedding in query_embeddings:
+            start = time.perf_counter()
+            backend.query([embedding], TOP_K)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def recall_at_k(backend, query_embeddings, exact_ids) -> float:
+    """Mean share of the exact top-k returned by the backend."""
+    results = backend.query(query_embeddings, TOP_K)["ids"]
+    return float(np.mean([
+        len(set(ids) & set(exact)) / len(exact)
+        for ids, exact in zip(results, exact_ids)
+    ]))
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        vector_store = VectorStore(
+            persist_directory="data/chromadb",
+            embedding_model_name="all-MiniLM-L6-v2"
+        )
+        vector_store.load_chunks(CHUNKS_PATH)
+        vector_store.create_or_load_collection()
+    chroma = vector_store.backend
+
+    stored = chroma.collection.get(include=["embeddings"])
+    ids, embeddings = stored["ids"], np.asarray(stored["embeddings"], dtype=np.float32)
+
+    with open(TEST_QUERIES_PATH, 'r', encoding='utf-8') as f:
+        queries = [q['query_text'] for q in json.load(f)['queries']]
+    query_embeddings = vector_store.embedding_model.encode(
+        queries, convert_to_numpy=True, show_progress_bar=False
+    ).tolist()
+
+    # Exact top-k (ground truth for recall)
+    similarities = normalize_rows(query_embeddings) @ normalize_rows(embeddings).T
+    exact_ids = [
+        [ids[i] for i in np.argsort(-row, kind="stable")[:TOP_K]]
+        for row in similarities
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            flat = FlatIndexBackend(str(Path(tmp_dir) / "vector_index.bin"))
+            flat.open()
+            flat.add(ids, embeddings, [], [])
+            flat.flush()
+            flat.open()  # Reopen from disk so queries run on the mmap'd matrix
+
+        print("=" * 80)
+        print(f"VECTOR BACKEND BENCHMARK ({len(ids)} chunks, {embeddings.shape[1]} dims, "
+              f"{len(queries)} queries × {REPEATS}, top_k={TOP_K})")
+        print("=" * 80)
+
+        for backend in (chroma, flat):
+            backend.query(query_embeddings[:1], TOP_K)  # Warm-up
+            latencies = time_backend(backend, query_embeddings)
+            recall = recall_at_k(backend, query_embeddings, exact_ids)
+
+            start = time.perf_counter()
+            backend.query(query_embeddings, TOP_K)
+            batch_ms = (time.perf_counter() - start) * 1000
+
+            print(f"\n📊 {backend.name}")
+            print(f"   p50 latency     : {np.percentile(latencies, 50):7.3f} ms")
+            print(f"   p99 latency     : {np.percentile(latencies, 99):7.3f} ms")
+            print(f"   Batch of {len(queries):3d}    : {batch_ms:7.3f} ms")
+            print(f"   Recall@{TOP_K}       : {recall:.4f}")
+
+    print(f"\n{'=' * 80}")
+    print("✅ Vector backend benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
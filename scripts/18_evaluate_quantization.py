@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Script: 18_evaluate_quantization.py
+Purpose: Recall@k of int8 / binary quantized flat-index search vs exact cosine
+
+Chunk embeddings are read from the Chroma collection and the evaluation
+queries (data/evaluation/test_queries.json) are encoded once. Each
+quantization is run with several rescore multipliers (candidates rescored
+with float32 = top_k × multiplier) and compared with the exact float32
+scan. To approximate a much larger corpus, the chunk embeddings are also
+replicated with small Gaussian jitter (×1, ×20).
+"""
+
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.flat_index import FlatIndexBackend
+from src.retrieval.vector_store import VectorStore
+
+CHUNKS_PATH = "data/processed/chunks.json"
+TEST_QUERIES_PATH = "data/evaluation/test_queries.json"
+TOP_K = 10
+SCALE_FACTORS = [1, 20]
+JITTER = 0.02  # Std-dev of the noise added to replicated embeddings
+RESCORE_MULTIPLIERS = {"int8": [1, 2, 4], "binary": [1, 4, 10, 20]}
+REPEATS = 5
+
+
+def build(path: str, ids, embeddings, quantization=None) -> FlatIndexBackend:
+    """Build a flat index (logging suppressed)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        index = FlatIndexBackend(path, quantization=quantization)
+        index.open(reset=True)
+        index.add(ids, embeddings, [], [])
+        index.flush()
+    return index
+
+
+def run(index: FlatIndexBackend, query_embeddings) -> tuple:
+    """
+    Query REPEATS times.
+
+    Returns:
+        tuple: (ms per query, result ids of the last repeat)
+    """
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        ids = index.query(query_embeddings, TOP_K)["ids"]
+    elapsed = time.perf_counter() - start
+    return elapsed / (REPEATS * len(query_embeddings)) * 1000, ids
+
+
+def recall(ids, exact_ids) -> float:
+    """Mean recall@k of ids against exact_ids."""
+    return float(np.mean([
+        len(set(found) & set(expected)) / len(expected)
+        for found, expected in zip(ids, exact_ids)
+    ]))
+
+
+def evaluate(ids, embeddings: np.ndarray, query_embeddings, tmp_dir: str):
+    """Print recall@k / latency / code size for every configuration."""
+    exact_index = build(f"{tmp_dir}/exact.bin", ids, embeddings)
+    exact_ms, exact_ids = run(exact_index, query_embeddings)
+    print(f"   {'float32 exact':22s}: recall@{TOP_K} 1.0000 | {exact_ms:7.3f} ms/query | "
+          f"{exact_index.embeddings.nbytes / 1024 ** 2:7.2f} MB scanned")
+
+    for quantization, multipliers in RESCORE_MULTIPLIERS.items():
+        index = build(f"{tmp_dir}/{quantization}.bin", ids, embeddings, quantization)
+        for multiplier in multipliers:
+            index.rescore_multiplier = multiplier
+            ms, found = run(index, query_embeddings)
+            label = f"{quantization} ×{multiplier} rescore"
+            print(f"   {label:22s}: recall@{TOP_K} {recall(found, exact_ids):.4f} | "
+                  f"{ms:7.3f} ms/query | {index.codes.nbytes / 1024 ** 2:7.2f} MB scanned")
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        vector_store = VectorStore(
+            persist_directory="data/chromadb",
+            embedding_model_name="all-MiniLM-L6-v2"
+        )
+        vector_store.load_chunks(CHUNKS_PATH)
+        vector_store.create_or_load_collection()
+
+    stored = vector_store.backend.collection.get(include=["embeddings"])
+    base_ids, base_embeddings = stored["ids"], np.asarray(stored["embeddings"], dtype=np.float32)
+
+    with open(TEST_QUERIES_PATH, 'r', encoding='utf-8') as f:
+        queries = [q['query_text'] for q in json.load(f)['queries']]
+    query_embeddings = vector_store.embedding_model.encode(
+        queries, convert_to_numpy=True, show_progress_bar=False
+    )
+
+    print("=" * 80)
+    print(f"QUANTIZED EMBEDDING EVALUATION ({len(queries)} queries, top_k={TOP_K})")
+    print("=" * 80)
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in SCALE_FACTORS:
+            ids = [f"{chunk_id}#{copy}" for copy in range(scale) for chunk_id in base_ids]
+            embeddings = np.concatenate([
+                base_embeddings + (copy > 0) * rng.normal(scale=JITTER, size=base_embeddings.shape)
+                for copy in range(scale)
+            ]).astype(np.float32)
+
+            print(f"\n📊 {len(ids):,} chunks (×{scale})")
+            evaluate(ids, embeddings, query_embeddings, tmp_dir)
+
+    print(f"\n{'=' * 80}")
+    print("✅ Quantization evaluation complete")
+
+
+if __name__ == "__main__":
+    main()
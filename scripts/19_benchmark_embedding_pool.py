@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Script: 19_benchmark_embedding_pool.py
+Purpose: Corpus embedding throughput (chunks/sec), in-process vs process pool
+
+The real chunk set is replicated (×1, ×5) with unique ids and embedded
+into a throwaway flat index with VectorStore.add_chunks, once in the
+API process and once per worker count. Wall time includes starting the
+pool and loading one model per worker, as in a real re-index. Each
+pooled run is checked against the in-process embeddings.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.vector_store import VectorStore
+
+CHUNKS_PATH = "data/processed/chunks.json"
+SCALE_FACTORS = [1, 5]
+WORKER_COUNTS = [2, 4, os.cpu_count() or 1]
+
+
+def timed_embed(vector_store: VectorStore, chunks, workers=None) -> tuple:
+    """
+    Embed chunks into an empty index (logging suppressed).
+
+    Returns:
+        tuple: (embeddings in chunk order, elapsed_seconds)
+    """
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        vector_store.create_or_load_collection(reset=True)
+        start = time.perf_counter()
+        vector_store.add_chunks(chunks, workers=workers)
+        elapsed = time.perf_counter() - start
+
+    index = vector_store.backend
+    rows = [index.id_to_row()[chunk.id] for chunk in chunks]
+    return np.asarray(index.embeddings[rows]), elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            vector_store = VectorStore(
+                embedding_model_name="all-MiniLM-L6-v2",
+                backend="flat",
+                flat_index_path=f"{tmp_dir}/vector_index.bin"
+            )
+            base_chunks = vector_store.load_chunks(CHUNKS_PATH)
+
+        worker_counts = sorted(set(w for w in WORKER_COUNTS if w > 1))
+
+        print("=" * 80)
+        print("CORPUS EMBEDDING BENCHMARK (in-process vs process pool)")
+        print("=" * 80)
+        print(f"CPU cores: {os.cpu_count()}")
+
+        for scale in SCALE_FACTORS:
+            chunks = [
+                replace(chunk, id=f"{chunk.id}#{copy}")
+                for copy in range(scale) for chunk in base_chunks
+            ]
+            serial_embeddings, serial_time = timed_embed(vector_store, chunks)
+
+            print(f"\n📊 {len(chunks):,} chunks (×{scale})")
+            print(f"   in-process      : {serial_time:8.2f}s "
+                  f"({len(chunks) / serial_time:8.1f} chunks/sec)")
+
+            for workers in worker_counts:
+                embeddings, elapsed = timed_embed(vector_store, chunks, workers=workers)
+                status = "✅ same embeddings" if np.allclose(embeddings, serial_embeddings, atol=1e-5) \
+                    else "❌ MISMATCH"
+                print(f"   {workers:2d} workers      : {elapsed:8.2f}s "
+                      f"({len(chunks) / elapsed:8.1f} chunks/sec, "
+                      f"{serial_time / elapsed:.2f}× speedup) {status}")
+
+    print(f"\n{'=' * 80}")
+    print("✅ Embedding pool benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Script: 20_benchmark_query_encoder.py
+Purpose: Query encoding latency and parity of the torch / ONNX / ONNX int8 backends
+
+Each evaluation query (data/evaluation/test_queries.json) is encoded one
+at a time, as on the /retrieve and /ask request path, and p50/p99 latency
+is reported per backend and onnxruntime thread count. Parity is the
+cosine similarity of each backend's query embeddings to the torch ones,
+and the overlap of top-10 flat-index results with the torch results.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.query_encoder import load_encoder
+from src.retrieval.vector_store import VectorStore
+
+CHUNKS_PATH = "data/processed/chunks.json"
+TEST_QUERIES_PATH = "data/evaluation/test_queries.json"
+MODEL_NAME = "all-MiniLM-L6-v2"
+BACKENDS = ["onnx", "onnx-int8"]
+THREAD_COUNTS = [1, 2, 4, None]  # None = onnxruntime default
+REPEATS = 5
+TOP_K = 10
+
+
+def unit(embeddings) -> np.ndarray:
+    """L2-normalize rows as float32."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def time_single_queries(model, queries) -> tuple:
+    """
+    Encode each query alone, REPEATS times.
+
+    Returns:
+        tuple: (p50 ms, p99 ms, unit embeddings of the queries)
+    """
+    model.encode(queries[:1], show_progress_bar=False)  # Warm up
+    latencies = []
+    for _ in range(REPEATS):
+        for query in queries:
+            start = time.perf_counter()
+            model.encode([query], convert_to_numpy=True, show_progress_bar=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+    embeddings = unit(model.encode(queries, convert_to_numpy=True, show_progress_bar=False))
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), embeddings
+
+
+def main():
+    with open(TEST_QUERIES_PATH, 'r', encoding='utf-8') as f:
+        queries = [q['query_text'] for q in json.load(f)['queries']]
+
+    # Chunk embeddings for the top-k overlap check
+    with contextlib.redirect_stdout(io.StringIO()):
+        vector_store = VectorStore(persist_directory="data/chromadb", embedding_model_name=MODEL_NAME)
+        vector_store.load_chunks(CHUNKS_PATH)
+        vector_store.create_or_load_collection()
+    stored = vector_store.backend.collection.get(include=["embeddings"])
+    chunk_embeddings = unit(stored["embeddings"])
+
+    def top_k(query_embeddings):
+        return np.argsort(-(query_embeddings @ chunk_embeddings.T), axis=1, kind="stable")[:, :TOP_K]
+
+    print("=" * 80)
+    print(f"QUERY ENCODER BENCHMARK ({len(queries)} queries × {REPEATS}, CPU cores: {os.cpu_count()})")
+    print("=" * 80)
+
+    torch_p50, torch_p99, torch_embeddings = time_single_queries(vector_store.embedding_model, queries)
+    torch_top = top_k(torch_embeddings)
+    print(f"   {'torch':24s}: p50 {torch_p50:6.2f} ms | p99 {torch_p99:6.2f} ms")
+
+    for backend in BACKENDS:
+        for threads in THREAD_COUNTS:
+            with contextlib.redirect_stdout(io.StringIO()):
+                model = load_encoder(MODEL_NAME, backend, threads)
+            p50, p99, embeddings = time_single_queries(model, queries)
+            cosines = np.sum(embeddings * torch_embeddings, axis=1)
+            overlap = np.mean([
+                len(set(a) & set(b)) / TOP_K for a, b in zip(top_k(embeddings), torch_top)
+            ])
+            label = f"{backend} ({threads or 'default'} threads)"
+            print(f"   {label:24s}: p50 {p50:6.2f} ms | p99 {p99:6.2f} ms | "
+                  f"{torch_p50 / p50:.2f}× | min cosine {cosines.min():.5f} | "
+                  f"top-{TOP_K} overlap {overlap:.3f}")
+
+    print(f"\n{'=' * 80}")
+    print("✅ Query encoder benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Script: 21_load_test_api.py
+Purpose: Throughput of /retrieve (and /ask) as client concurrency grows
+
+Start the API first (python -m src.api.main). For each concurrency level,
+that many clients send requests back to back until REQUESTS_PER_LEVEL
+have completed. The script reports requests/sec, p50/p99 latency and
+scaling relative to one client. With retrieval off the event loop
+(RETRIEVAL_WORKERS) and async generation (GENERATION_MAX_CONCURRENCY),
+throughput should rise with concurrency instead of staying flat.
+/ask levels call Groq and count against its rate limits.
+"""
+
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+API_URL = "http://localhost:8000"
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16]
+REQUESTS_PER_LEVEL = 64
+ENDPOINTS = {
+    "/retrieve": {"top_k": 10, "retriever_type": "hybrid"},
+    # "/ask": {"top_k": 5, "retriever_type": "hybrid"},  # Uncomment to include generation
+}
+QUERIES = [
+    "What are the side effects of warfarin?",
+    "What are the contraindications for atorvastatin?",
+    "What drugs interact with lisinopril?",
+    "How does metformin work?",
+    "What is the recommended dosage of ciprofloxacin?",
+]
+
+
+async def run_level(client: httpx.AsyncClient, endpoint: str, body: dict, concurrency: int) -> dict:
+    """
+    Send REQUESTS_PER_LEVEL requests from `concurrency` clients.
+
+    Returns:
+        dict: requests/sec, p50/p99 latency (ms) and error count
+    """
+    latencies, errors = [], 0
+    next_request = 0
+
+    async def worker():
+        nonlocal next_request, errors
+        while next_request < REQUESTS_PER_LEVEL:
+            query = QUERIES[next_request % len(QUERIES)]
+            next_request += 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json={"query": query, **body})
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+            except httpx.HTTPError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": float(np.percentile(latencies, 50)) if latencies else float("nan"),
+        "p99": float(np.percentile(latencies, 99)) if latencies else float("nan"),
+        "errors": errors,
+    }
+
+
+async def main():
+    limits = httpx.Limits(max_connections=max(CONCURRENCY_LEVELS))
+    async with httpx.AsyncClient(base_url=API_URL, timeout=120, limits=limits) as client:
+        ready = await client.get("/health/ready")
+        if ready.status_code != 200:
+            print(f"❌ API not ready ({ready.status_code}): {ready.text}")
+            return
+
+        print("=" * 80)
+        print(f"API LOAD TEST ({REQUESTS_PER_LEVEL} requests per concurrency level)")
+        print("=" * 80)
+
+        for endpoint, body in ENDPOINTS.items():
+            print(f"\n📊 POST {endpoint} {body}")
+            await run_level(client, endpoint, body, 1)  # Warm up
+            baseline = None
+            for concurrency in CONCURRENCY_LEVELS:
+                result = await run_level(client, endpoint, body, concurrency)
+                baseline = baseline or result["rps"]
+                print(f"   {concurrency:3d} concurrent: {result['rps']:7.1f} req/s "
+                      f"({result['rps'] / baseline:.2f}×) | p50 {result['p50']:8.1f} ms | "
+                      f"p99 {result['p99']:8.1f} ms | errors {result['errors']}")
+
+    print(f"\n{'=' * 80}")
+    print("✅ Load test complete")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
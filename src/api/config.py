@@ -16,7 +16,7 @@ class Settings(BaseSettings):
     # Paths
     DATA_DIR: Path = Path("data/processed")
     VECTOR_INDEX_PATH: Path = DATA_DIR / "vector_index.pkl"
-    BM25_INDEX_PATH: Path = DATA_DIR / "bm25_index.pkl"
+    BM25_INDEX_PATH: Path = DATA_DIR / "bm25_index.bin"
     CHUNKS_PATH: Path = DATA_DIR / "chunks_with_embeddings.pkl"
     
     # Retrieval defaults
@@ -6,6 +6,8 @@ print("[DEBUG] Starting API script...")
 print("="*80)
 
 import sys
+import time
+PROCESS_START_TIME = time.time()  # Reference point for time-to-healthy
 print(f"[DEBUG] Python version: {sys.version}")
 print(f"[DEBUG] Python path: {sys.executable}")
 
@@ -51,13 +53,17 @@ print("="*80)
 FastAPI Application for Evidence-Bound Drug RAG System
 Phase 0: Retrieval-only API (no LLM integration)
 """
+import asyncio
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 # Import your existing retrievers
 import sys
@@ -65,8 +71,9 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.retrieval.vector_store import VectorStore
 from src.retrieval.bm25_index import BM25Index
+from src.retrieval.chunk_store import ChunkStore
 from src.retrieval.hybrid_retriever import HybridRetriever
-from src.models.schemas import RetrievedChunk
+from src.models.schemas import RetrievedChunk, to_retrieved_chunks
 from src.generation.llm import LLMGenerator  
 from src.models.schemas import GeneratedAnswer 
 
@@ -77,7 +84,9 @@ from src.api.models import (
     ChunkResult,
     RetrievalMetadata,
     StatsResponse,
-    HealthResponse
+    HealthResponse,
+    LivenessResponse,
+    ReadinessResponse
 )
 from src.api.logger import retrieval_logger, logger
 
@@ -98,85 +107,285 @@ app.add_middleware(
 )
 
 # Global retriever instances
+chunk_store: ChunkStore | None = None  # Shared by both retrievers
 vector_store: VectorStore | None = None
 bm25_index: BM25Index | None = None
 hybrid_retriever: HybridRetriever | None = None
 llm_generator: LLMGenerator | None = None
 
+# Start-up timings reported by /health
+startup_timings = {
+    "cold_start_ms": None,       # Warm-up duration (first load -> ready)
+    "time_to_healthy_ms": None,  # Process start -> retrievers ready
+    "components_ms": {},         # Per-component load time
+    "bm25_index_source": None    # "disk" | "rebuilt"
+}
+
+# Warm-up state: pending -> loading -> ready | failed
+component_status = {
+    "chunks": "pending",
+    "vector": "pending",
+    "bm25": "pending",
+    "hybrid": "pending",
+    "llm": "pending",
+    "warmup": "pending"
+}
+warmup_task: asyncio.Task | None = None
+
 # Paths
 DATA_DIR = Path("data/processed")
 CHROMA_DIR = Path("data/chromadb")
-BM25_INDEX_PATH = Path("data/bm25_index.pkl")
+BM25_INDEX_PATH = Path("data/bm25_index.bin")
+CHUNK_STORE_PATH = Path("data/chunk_store.bin")
+VECTOR_INDEX_PATH = Path("data/vector_index.bin")
 CHUNKS_PATH = DATA_DIR / "chunks.json"
 
+# Compiled BM25 queries kept in memory (repeated queries skip tokenization)
+BM25_QUERY_CACHE_SIZE = int(os.getenv("BM25_QUERY_CACHE_SIZE", 1024))
+
+# Vector backend: "chroma" (HNSW collection) or "flat" (exact NumPy search
+# over an mmap'd matrix at VECTOR_INDEX_PATH)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+# Flat backend only: "int8" or "binary" first pass, rescored with float32
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION") or None
+
+# Query embeddings: in-memory LRU plus an sqlite file that survives
+# restarts (set QUERY_EMBEDDING_CACHE_PATH="" to keep them in memory only)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 1024))
+QUERY_EMBEDDING_CACHE_PATH = os.getenv("QUERY_EMBEDDING_CACHE_PATH", "data/query_embeddings.sqlite")
+
+# Worker processes used when the corpus has to be (re)embedded at start-up
+# (1 = embed in the API process)
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", 1))
+# Chunk embeddings keyed by model + text hash: re-embedding only encodes
+# chunks whose text changed (set CHUNK_EMBEDDING_CACHE_PATH="" to disable)
+CHUNK_EMBEDDING_CACHE_PATH = os.getenv("CHUNK_EMBEDDING_CACHE_PATH", "data/chunk_embeddings.sqlite")
+
+# Query encoder inference: "torch", "onnx" or "onnx-int8" (onnxruntime,
+# QUERY_ENCODER_THREADS intra-op threads; unset = one per physical core)
+QUERY_ENCODER_BACKEND = os.getenv("QUERY_ENCODER_BACKEND", "torch")
+QUERY_ENCODER_THREADS = int(os.getenv("QUERY_ENCODER_THREADS", 0)) or None
+
+# Retrieval (query encoding, BM25 scoring, vector search) runs on this many
+# threads instead of the event loop; the encoder and NumPy release the GIL
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", min(4, os.cpu_count() or 1)))
+retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+# Concurrent Groq calls from /ask; further calls queue for a free slot
+GENERATION_MAX_CONCURRENCY = int(os.getenv("GENERATION_MAX_CONCURRENCY", 16))
+
+# Query run once through the hybrid retriever before reporting ready
+WARMUP_QUERY = "What are the side effects of warfarin?"
+
+
+def _load_chunk_store() -> ChunkStore:
+    """
+    Open the shared chunk store (mmap), rebuilding it only if chunks.json
+    changed (blocking, runs in a thread).
+    """
+    store, rebuilt = ChunkStore.load_or_build(str(CHUNK_STORE_PATH), str(CHUNKS_PATH))
+    logger.info(
+        f"[OK] Chunk store {'rebuilt' if rebuilt else 'loaded from disk'}: "
+        f"{len(store)} chunks, {store.nbytes() / (1024 * 1024):.1f} MB mapped"
+    )
+    return store
+
+
+def _load_vector_store() -> VectorStore:
+    """Load the vector backend + embedding model (blocking, runs in a thread)."""
+    store = VectorStore(
+        persist_directory=str(CHROMA_DIR),
+        embedding_model_name="all-MiniLM-L6-v2",
+        query_cache_size=QUERY_EMBEDDING_CACHE_SIZE,
+        query_cache_path=QUERY_EMBEDDING_CACHE_PATH or None,
+        backend=VECTOR_BACKEND,
+        flat_index_path=str(VECTOR_INDEX_PATH),
+        quantization=VECTOR_QUANTIZATION,
+        chunk_cache_path=CHUNK_EMBEDDING_CACHE_PATH or None,
+        encoder_backend=QUERY_ENCODER_BACKEND,
+        encoder_threads=QUERY_ENCODER_THREADS
+    )
+    store.attach_chunk_store(chunk_store)
+    store.create_or_load_collection(reset=False)
+    # Collections embedded before metadata filtering get per-drug keys in place
+    store.ensure_filter_metadata()
+
+    current_count = store.get_chunk_count()
+
+    if current_count == 0:
+        logger.info("[LOAD] Vector store empty — generating embeddings...")
+        counts = store.add_chunks(workers=EMBEDDING_WORKERS)
+        logger.info(
+            f"[OK] Vector store populated: {store.get_chunk_count()} chunks "
+            f"(embedding cache: {counts['cache_hits']} hits, {counts['cache_misses']} misses)"
+        )
+    elif current_count < len(chunk_store):
+        # An interrupted embedding run: only the missing chunks are embedded
+        logger.info(f"[LOAD] Vector store partial ({current_count}/{len(chunk_store)}) — resuming embeddings...")
+        counts = store.add_chunks(workers=EMBEDDING_WORKERS)
+        logger.info(
+            f"[OK] Vector store populated: {store.get_chunk_count()} chunks "
+            f"(embedding cache: {counts['cache_hits']} hits, {counts['cache_misses']} misses)"
+        )
+    else:
+        logger.info(f"[OK] Vector Store loaded ({store.backend.name}): {current_count} chunks")
+    return store
+
+
+def _load_bm25_index() -> BM25Index:
+    """
+    Load the persisted BM25 index, rebuilding only if chunks.json changed
+    (blocking, runs in a thread).
+    """
+    index, rebuilt = BM25Index.load_or_build(
+        str(BM25_INDEX_PATH),
+        str(CHUNKS_PATH),
+        chunks=chunk_store,
+        k1=1.5,
+        b=0.75,
+        query_cache_size=BM25_QUERY_CACHE_SIZE
+    )
+    startup_timings["bm25_index_source"] = "rebuilt" if rebuilt else "disk"
+    logger.info(
+        f"[OK] BM25 Index {'rebuilt' if rebuilt else 'loaded from disk'}: "
+        f"{index.get_corpus_size()} chunks"
+    )
+    return index
+
+
+def _load_llm_generator() -> LLMGenerator:
+    """Create the Groq-backed generator (blocking, runs in a thread)."""
+    generator = LLMGenerator(
+        model="llama-3.3-70b-versatile",
+        temperature=0.0,
+        max_tokens=500,
+        max_concurrent_requests=GENERATION_MAX_CONCURRENCY
+    )
+    logger.info("[OK] LLM Generator initialized")
+    return generator
+
+
+async def _load_component(name: str, loader):
+    """
+    Run a blocking loader in a worker thread and track its status/timing.
+
+    Returns:
+        Loaded component, or None if loading failed
+    """
+    component_status[name] = "loading"
+    logger.info(f"[LOAD] Loading {name}...")
+    component_start = time.time()
+    try:
+        component = await asyncio.to_thread(loader)
+    except Exception as e:
+        component_status[name] = "failed"
+        logger.error(f"[ERROR] Failed to load {name}: {e}")
+        return None
+    startup_timings["components_ms"][name] = round((time.time() - component_start) * 1000, 2)
+    component_status[name] = "ready"
+    return component
+
+
+async def _warm_up():
+    """
+    Staged background warm-up.
+
+    Stage 0: the shared chunk store is opened (mmap).
+    Stage 1: vector store, BM25 index and LLM client load concurrently,
+             both retrievers referring to chunks in the store by index.
+    Stage 2: hybrid retriever is wired up as soon as both retrievers exist.
+    Stage 3: one warm-up query runs through the encoder + both indexes, then
+             /health/ready starts returning 200 (LLM may still be loading).
+    """
+    global chunk_store, vector_store, bm25_index, hybrid_retriever, llm_generator
+
+    warmup_start = time.time()
+
+    llm_task = asyncio.create_task(_load_component("llm", _load_llm_generator))
+    chunk_store = await _load_component("chunks", _load_chunk_store)
+    if chunk_store is not None:
+        vector_store, bm25_index = await asyncio.gather(
+            _load_component("vector", _load_vector_store),
+            _load_component("bm25", _load_bm25_index)
+        )
+
+    if vector_store is None or bm25_index is None:
+        component_status["hybrid"] = "failed"
+        component_status["warmup"] = "failed"
+        logger.error("[ERROR] STARTUP FAILED: retrievers could not be loaded")
+    else:
+        logger.info("[LOAD]Initializing Hybrid Retriever...")
+        hybrid = HybridRetriever(vector_store, bm25_index)
+        component_status["hybrid"] = "ready"
+        logger.info("[OK] Hybrid Retriever initialized")
+
+        # Warm-up inference pass (encoder forward pass, page in BM25 postings)
+        component_status["warmup"] = "loading"
+        warmup_query_start = time.time()
+        try:
+            await asyncio.to_thread(hybrid.retrieve_hybrid, WARMUP_QUERY, 5)
+        except Exception as e:
+            logger.warning(f"[WARN] Warm-up query failed: {e}")
+        startup_timings["components_ms"]["warmup"] = round((time.time() - warmup_query_start) * 1000, 2)
+        component_status["warmup"] = "ready"
+
+        # Publish only after warm-up so requests never hit a cold encoder
+        hybrid_retriever = hybrid
+        startup_timings["cold_start_ms"] = round((time.time() - warmup_start) * 1000, 2)
+        startup_timings["time_to_healthy_ms"] = round((time.time() - PROCESS_START_TIME) * 1000, 2)
+
+        logger.info("=" * 80)
+        logger.info("[OK] API READY - retrievers loaded and warmed up")
+        logger.info(
+            f"[OK] Cold start: {startup_timings['cold_start_ms']:.0f}ms | "
+            f"Time to healthy: {startup_timings['time_to_healthy_ms']:.0f}ms"
+        )
+        logger.info("=" * 80)
+
+    llm_generator = await llm_task
+
+
+async def _run_retrieval(retrieve, *args, **kwargs) -> List[RetrievedChunk]:
+    """
+    Run a retriever's *_views method on the retrieval executor and
+    materialize its results there, keeping the event loop free.
+    """
+    def run() -> List[RetrievedChunk]:
+        # Materialize result views only now, at the API boundary
+        return to_retrieved_chunks(retrieve(*args, **kwargs))
+    
+    return await asyncio.get_running_loop().run_in_executor(retrieval_executor, run)
+
 
 @app.on_event("startup")
 async def startup_event():
     """
-    Initialize retrievers on API startup
+    Schedule component warm-up without blocking server start
     
     Discipline A: All 3 retrievers loaded (vector, bm25, hybrid) for easy switching
+    
+    uvicorn starts accepting connections immediately; /health/live answers
+    at once and /health/ready returns 503 until the retrievers are warm.
     """
-    global vector_store, bm25_index, hybrid_retriever, llm_generator
+    global warmup_task
     
     logger.info("=" * 80)
     logger.info("[START] STARTING EVIDENCE-BOUND DRUG RAG API")
     logger.info("=" * 80)
     
-    try:
-        # Load Vector Store
-        logger.info("[LOAD]Loading Vector Store (ChromaDB)...")
-        vector_store = VectorStore(
-            persist_directory=str(CHROMA_DIR),
-            embedding_model_name="all-MiniLM-L6-v2"
-        )
-        vector_store.load_chunks(str(CHUNKS_PATH))
-        vector_store.create_or_load_collection(reset=False)
+    warmup_task = asyncio.create_task(_warm_up())
 
-        current_count = vector_store.get_chunk_count()
 
-        if current_count == 0:
-            logger.info("[LOAD] Vector store empty — generating embeddings...")
-            vector_store.add_chunks()
-            logger.info(f"[OK] Vector store populated: {vector_store.get_chunk_count()} chunks")
-        else:
-            logger.info(f"[OK] Vector Store loaded: {current_count} chunks")
-
-        # Load BM25 Index
-        # Build BM25 Index from loaded chunks (avoids pickle issues)
-        logger.info("[LOAD] Building BM25 Index from chunks...")
-        if vector_store.chunks_loaded:
-            bm25_index = BM25Index(k1=1.5, b=0.75)
-            bm25_index.chunks = vector_store.chunks_loaded  # Reuse already loaded chunks
-            bm25_index.build_index()
-            logger.info(f"[OK] BM25 Index built: {bm25_index.get_corpus_size()} chunks")
-        else:
-            logger.error("[ERROR] No chunks loaded, cannot build BM25 index")
-            raise RuntimeError("Cannot build BM25 without chunks")
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the retrieval threads and close the async Groq client."""
+    retrieval_executor.shutdown(wait=False, cancel_futures=True)
+    if llm_generator is not None:
+        await llm_generator.async_client.close()
 
-        
-        # Initialize Hybrid Retriever
-        logger.info("[LOAD]Initializing Hybrid Retriever...")
-        hybrid_retriever = HybridRetriever(vector_store, bm25_index)
-        logger.info("[OK] Hybrid Retriever initialized")
-        
-        # Initialize LLM Generator
-        logger.info("[LOAD] Initializing LLM Generator (Groq)...")
-        llm_generator = LLMGenerator(
-            model="llama-3.3-70b-versatile",
-            temperature=0.0,
-            max_tokens=500
-        )
-        logger.info("[OK] LLM Generator initialized")
-        
-        logger.info("=" * 80)
-        logger.info("[OK] API READY - All retrievers + LLM loaded")  
-        logger.info("=" * 80)
 
-        
-    except Exception as e:
-        logger.error(f"[ERROR] STARTUP FAILED: {e}")
-        raise
+def _retrievers_ready() -> bool:
+    """True once both retrievers are loaded and the warm-up pass finished."""
+    return hybrid_retriever is not None
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -184,6 +393,8 @@ async def health_check():
     """
     Health check endpoint
     
+    Answers immediately, even while components are still warming up.
+    
     Returns:
         Status of API and loaded retrievers
     """
@@ -194,19 +405,53 @@ async def health_check():
     }
     
     # Determine overall health status
-    if all(retrievers_loaded.values()):
+    if "failed" in component_status.values():
+        status = "unhealthy" if not any(retrievers_loaded.values()) else "degraded"
+    elif all(retrievers_loaded.values()):
         status = "healthy"
-    elif any(retrievers_loaded.values()):
-        status = "degraded"
     else:
-        status = "unhealthy"
+        status = "starting"
     
     return HealthResponse(
         status=status,
         version="0.1.0",
         timestamp=datetime.now().isoformat(),
-        retrievers_loaded=retrievers_loaded
+        retrievers_loaded=retrievers_loaded,
+        components=dict(component_status),
+        cold_start_ms=startup_timings["cold_start_ms"],
+        time_to_healthy_ms=startup_timings["time_to_healthy_ms"],
+        startup_components_ms=startup_timings["components_ms"],
+        bm25_index_source=startup_timings["bm25_index_source"]
+    )
+
+
+@app.get("/health/live", response_model=LivenessResponse)
+async def health_live():
+    """
+    Liveness probe: the process is up and the event loop is responsive.
+    """
+    return LivenessResponse(
+        status="alive",
+        uptime_ms=round((time.time() - PROCESS_START_TIME) * 1000, 2)
+    )
+
+
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def health_ready():
+    """
+    Readiness probe: 200 once retrievers are loaded and warmed up, else 503.
+    
+    Use this for load balancer / docker-compose health checks so traffic is
+    only routed to warm instances.
+    """
+    ready = _retrievers_ready()
+    response = ReadinessResponse(
+        status="ready" if ready else "not_ready",
+        components=dict(component_status)
     )
+    if not ready:
+        return JSONResponse(status_code=503, content=response.model_dump())
+    return response
 
 
 @app.get("/stats", response_model=StatsResponse)
@@ -220,11 +465,8 @@ async def get_stats():
     if not vector_store or not bm25_index:
         raise HTTPException(status_code=503, detail="Retrievers not initialized")
     
-    # Get unique drugs from vector store chunks
-    drugs_covered = set()
-    if vector_store.chunks_loaded:
-        for chunk in vector_store.chunks_loaded:
-            drugs_covered.update(chunk.drug_names)
+    # Unique drugs = the chunk store's drug table
+    drugs_covered = set(chunk_store.drugs) if chunk_store else set()
 
     # ✅ NEW: Filter out "unknown" and invalid values
     drugs_filtered = [
@@ -238,7 +480,11 @@ async def get_stats():
         retriever_types_available=["vector", "bm25", "hybrid"],
         vector_store_status="loaded" if vector_store else "not loaded",
         bm25_index_status="loaded" if bm25_index else "not loaded",
-        hybrid_status="available" if hybrid_retriever else "not available"
+        hybrid_status="available" if hybrid_retriever else "not available",
+        caches={
+            "bm25_query": bm25_index.query_cache.stats(),
+            "query_embedding": vector_store.query_embedding_cache.stats()
+        }
     )
 
 
@@ -262,23 +508,31 @@ async def retrieve(request: RetrieveRequest):
     if not hybrid_retriever:
         raise HTTPException(status_code=503, detail="Retrievers not initialized")
     
+    filters = request.filters.to_filter_dict() if request.filters else None
+    
     try:
         # Route to appropriate retriever based on request
         if request.retriever_type == "vector":
-            results: List[RetrievedChunk] = hybrid_retriever.retrieve_vector(
+            results = await _run_retrieval(
+                hybrid_retriever.retrieve_vector_views,
                 request.query, 
-                top_k=request.top_k
+                top_k=request.top_k,
+                filters=filters
             )
         elif request.retriever_type == "bm25":
-            results: List[RetrievedChunk] = hybrid_retriever.retrieve_bm25(
+            results = await _run_retrieval(
+                hybrid_retriever.retrieve_bm25_views,
                 request.query, 
-                top_k=request.top_k
+                top_k=request.top_k,
+                filters=filters
             )
         elif request.retriever_type == "hybrid":
-            results: List[RetrievedChunk] = hybrid_retriever.retrieve_hybrid(
+            results = await _run_retrieval(
+                hybrid_retriever.retrieve_hybrid_views,
                 request.query, 
                 top_k=request.top_k,
-                vector_weight=0.5  # Default 50/50
+                vector_weight=0.5,  # Default 50/50
+                filters=filters
             )
         else:
             raise HTTPException(
@@ -429,15 +683,14 @@ async def ask(request: RetrieveRequest):
         logger.info(f"[ASK] Query: {request.query[:100]}...")
         retrieval_start = time.time()
         
+        filters = request.filters.to_filter_dict() if request.filters else None
         if request.retriever_type == "vector":
-            chunks = hybrid_retriever.retrieve_vector(request.query, request.top_k)
+            retrieve = hybrid_retriever.retrieve_vector_views
         elif request.retriever_type == "bm25":
-            chunks = hybrid_retriever.retrieve_bm25(request.query, request.top_k)
+            retrieve = hybrid_retriever.retrieve_bm25_views
         else:  # hybrid (default)
-            chunks = hybrid_retriever.retrieve_vector(
-            request.query,
-            request.top_k
-            )
+            retrieve = hybrid_retriever.retrieve_vector_views
+        chunks = await _run_retrieval(retrieve, request.query, request.top_k, filters=filters)
         
         retrieval_time = (time.time() - retrieval_start) * 1000
         logger.info(f"[ASK] Retrieved {len(chunks)} chunks in {retrieval_time:.1f}ms")
@@ -445,7 +698,7 @@ async def ask(request: RetrieveRequest):
         # STEP 2: Generate answer with LLM
         generation_start = time.time()
         
-        result: GeneratedAnswer = llm_generator.generate_answer(
+        result: GeneratedAnswer = await llm_generator.agenerate_answer(
             query=request.query,
             chunks=chunks,
             question_id=f"api_{int(time.time())}"
@@ -2,10 +2,37 @@
 Request/Response models for Evidence-Bound Drug RAG API
 """
 from pydantic import BaseModel, Field, validator
-from typing import List, Literal
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
+class RetrievalFilters(BaseModel):
+    """
+    Metadata filter applied inside the retrievers (before top-k)
+    
+    Fields are ANDed; values within one list are ORed.
+    """
+    drug_names: Optional[List[str]] = Field(default=None, description="Chunks mentioning any of these drugs")
+    authority_family: Optional[List[str]] = Field(default=None, description="Chunks from any of these authorities (e.g. FDA, NICE)")
+    tier: Optional[List[int]] = Field(default=None, description="Chunks from any of these evidence tiers")
+    year_min: Optional[int] = Field(default=None, description="Earliest publication year (inclusive)")
+    year_max: Optional[int] = Field(default=None, description="Latest publication year (inclusive)")
+    
+    @validator('drug_names', each_item=True)
+    def normalize_drug_name(cls, v):
+        # Chunk drug names are stored lowercase
+        return v.strip().lower()
+    
+    @validator('authority_family', each_item=True)
+    def normalize_authority_family(cls, v):
+        # Authority families are stored upper-case (FDA, NICE, WHO)
+        return v.strip().upper()
+    
+    def to_filter_dict(self) -> dict:
+        """Filter dict for the retrievers (unset fields omitted)"""
+        return self.model_dump(exclude_none=True)
+
+
 class RetrieveRequest(BaseModel):
     """Request model for /retrieve endpoint"""
     query: str = Field(..., min_length=1, description="User query text")
@@ -14,6 +41,10 @@ class RetrieveRequest(BaseModel):
         default="vector", 
         description="Retriever to use: vector (Phase 0 default), bm25, hybrid"
     )
+    filters: Optional[RetrievalFilters] = Field(
+        default=None,
+        description="Restrict retrieval to chunks matching drug / authority / tier / year"
+    )
     
     @validator('query')
     def query_not_empty(cls, v):
@@ -59,11 +90,38 @@ class StatsResponse(BaseModel):
     vector_store_status: str
     bm25_index_status: str
     hybrid_status: str
+    caches: dict = Field(
+        default_factory=dict,
+        description="Hit/miss counters per cache (bm25_query, query_embedding): hits, misses, hit_rate"
+    )
 
 
 class HealthResponse(BaseModel):
     """Response model for /health endpoint"""
-    status: Literal["healthy", "degraded", "unhealthy"]
+    status: Literal["healthy", "starting", "degraded", "unhealthy"]
     version: str
     timestamp: str
     retrievers_loaded: dict  # {vector: bool, bm25: bool, hybrid: bool}
+    components: dict = Field(
+        default_factory=dict,
+        description="Warm-up state per component: pending | loading | ready | failed"
+    )
+    cold_start_ms: float | None = Field(default=None, description="Duration of start-up component loading")
+    time_to_healthy_ms: float | None = Field(default=None, description="Process start until all components loaded")
+    startup_components_ms: dict = Field(default_factory=dict, description="Load time per component")
+    bm25_index_source: Literal["disk", "rebuilt"] | None = Field(
+        default=None,
+        description="Whether the BM25 index was loaded from disk or rebuilt (chunks.json changed)"
+    )
+
+
+class LivenessResponse(BaseModel):
+    """Response model for /health/live endpoint"""
+    status: Literal["alive"]
+    uptime_ms: float
+
+
+class ReadinessResponse(BaseModel):
+    """Response model for /health/ready endpoint"""
+    status: Literal["ready", "not_ready"]
+    components: dict  # {vector, bm25, hybrid, llm, warmup: pending | loading | ready | failed}
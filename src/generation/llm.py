@@ -3,14 +3,16 @@ LLM Generator with Groq integration, citation extraction, and validation.
 Generates answers from retrieved chunks with proper citations and logging.
 """
 
+import asyncio
 import re
 import time
 import json
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import Any, List, Dict, Tuple, Optional
 from datetime import datetime
 
-from groq import Groq
+import httpx
+from groq import AsyncGroq, DefaultAsyncHttpxClient, Groq
 import tiktoken
 from dotenv import load_dotenv
 
@@ -24,6 +26,9 @@ from src.generation.prompts import (
 # Force .env to override system environment variables
 load_dotenv(override=True)
 
+# Concurrent Groq calls from agenerate_answer (/ask); further calls queue
+DEFAULT_MAX_CONCURRENT_REQUESTS = 16
+
 
 class LLMGenerator:
     """
@@ -41,18 +46,35 @@ class LLMGenerator:
         model: str = "llama-3.3-70b-versatile",
         temperature: float = 0.0,
         max_tokens: int = 500,
-        log_dir: str = "logs/api"
+        log_dir: str = "logs/api",
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS
     ):
         """
-        Initialize LLM Generator with Groq client.
+        Initialize LLM Generator with Groq clients.
         
         Args:
             model: Groq model to use (default: llama-3.3-70b-versatile)
             temperature: Sampling temperature (0.0 = deterministic)
             max_tokens: Maximum tokens to generate
             log_dir: Directory for generation logs
+            max_concurrent_requests: Groq calls agenerate_answer() runs at
+                once (also the async client's connection limit); further
+                calls wait for a free slot, without a timeout
         """
         self.client = Groq()  # Uses GROQ_API_KEY from environment
+        # Used by agenerate_answer (API): awaits the HTTP call without
+        # blocking the event loop
+        self.async_client = AsyncGroq(
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=max_concurrent_requests,
+                    max_keepalive_connections=max_concurrent_requests
+                )
+            )
+        )
+        # Queues calls beyond the connection limit (a full httpx pool would
+        # raise PoolTimeout after its pool timeout instead of waiting)
+        self._request_slots = asyncio.Semaphore(max_concurrent_requests)
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
@@ -112,6 +134,28 @@ class LLMGenerator:
         
         return answer, input_tokens, output_tokens
     
+    async def _acall_groq(
+        self,
+        messages: List[Dict[str, str]]
+    ) -> Tuple[str, int, int]:
+        """
+        Same as _call_groq(), with the async client; waits for one of the
+        max_concurrent_requests slots first.
+        """
+        async with self._request_slots:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens
+            )
+        
+        answer = response.choices[0].message.content
+        input_tokens = response.usage.prompt_tokens
+        output_tokens = response.usage.completion_tokens
+        
+        return answer, input_tokens, output_tokens
+    
     def extract_citations(self, answer: str) -> List[int]:
         """
         Extract citation numbers from answer text.
@@ -288,6 +332,16 @@ class LLMGenerator:
         with open(self.log_file, "a", encoding="utf-8") as f:
             f.write(json.dumps(log_entry) + "\n")
     
+    def _write_log(self, log_entry: Dict[str, Any]):
+        """
+        log_generation() that never raises on I/O errors, so a failed log
+        write can't replace a generated answer.
+        """
+        try:
+            self.log_generation(**log_entry)
+        except OSError as e:
+            print(f"⚠️  Could not write generation log {self.log_file}: {e}")
+    
     def generate_answer(
         self,
         query: str,
@@ -317,97 +371,164 @@ class LLMGenerator:
         
         try:
             # 1. Build messages
-            system_prompt = build_system_prompt()
-            user_prompt = build_user_prompt(query, chunks)
-            
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
+            messages = self._build_messages(query, chunks)
             
             # 2. Call Groq API
             answer, input_tokens, output_tokens = self._call_groq(messages)
             
-            # 3. Extract citations
-            citations = self.extract_citations(answer)
-            
-            # 4. Validate citations
-            validation = self.validate_citations(answer, len(chunks))
-            
-            # 5. Map citations to chunk IDs and authorities
-            cited_chunk_ids, authorities_used = self.map_citations_to_chunks(
-                citations, chunks
-            )
-            
-            # 6. Calculate cost and latency
-            cost_usd = self.calculate_cost(input_tokens, output_tokens)
-            latency_ms = (time.time() - start_time) * 1000
-            
-            # 7. Detect refusal
-            is_refusal = self.detect_refusal(answer)
-            
-            # 8. Log generation
-            self.log_generation(
-                query=query,
-                answer=answer,
-                chunks=chunks,
-                citations=citations,
-                cited_chunk_ids=cited_chunk_ids,
-                validation=validation,
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                cost_usd=cost_usd,
-                latency_ms=latency_ms,
-                is_refusal=is_refusal,
-                authorities_used=authorities_used
-            )
-            
-            # 9. Return GeneratedAnswer
-            return GeneratedAnswer(
-                question_id=question_id or f"q_{int(time.time())}",
-                query=query,
-                answer_text=answer,
-                cited_chunk_ids=cited_chunk_ids,
-                is_refusal=is_refusal,
-                authorities_used=authorities_used,
-                total_token_count=input_tokens + output_tokens,
-                latency_ms=latency_ms,
-                cost_usd=cost_usd
+            # 3.-9. Citations, logging, result
+            result, log_entry = self._finish_answer(
+                query, chunks, answer, input_tokens, output_tokens, start_time, question_id
             )
             
         except Exception as e:
-            # Error handling: Return error response
-            latency_ms = (time.time() - start_time) * 1000
-            
-            error_answer = f"ERROR: Generation failed - {str(e)}"
-            
-            # Log error
-            self.log_generation(
-                query=query,
-                answer=error_answer,
-                chunks=chunks,
-                citations=[],
-                cited_chunk_ids=[],
-                validation={"valid": False, "issues": [str(e)], "citations_found": []},
-                input_tokens=0,
-                output_tokens=0,
-                cost_usd=0.0,
-                latency_ms=latency_ms,
-                is_refusal=False,
-                authorities_used=[]
+            result, log_entry = self._error_answer(query, chunks, e, start_time, question_id)
+        
+        self._write_log(log_entry)
+        return result
+    
+    async def agenerate_answer(
+        self,
+        query: str,
+        chunks: List[RetrievedChunk],
+        question_id: Optional[str] = None
+    ) -> GeneratedAnswer:
+        """
+        Same as generate_answer(), awaiting the Groq call on the async
+        client so an event loop can serve other requests meanwhile. The
+        JSONL log is written in a worker thread, off the event loop.
+        """
+        start_time = time.time()
+        
+        try:
+            messages = self._build_messages(query, chunks)
+            answer, input_tokens, output_tokens = await self._acall_groq(messages)
+            result, log_entry = self._finish_answer(
+                query, chunks, answer, input_tokens, output_tokens, start_time, question_id
             )
             
-            return GeneratedAnswer(
-                question_id=question_id or f"q_error_{int(time.time())}",
-                query=query,
-                answer_text=error_answer,
-                cited_chunk_ids=[],
-                is_refusal=False,
-                authorities_used=[],
-                total_token_count=0,
-                latency_ms=latency_ms,
-                cost_usd=0.0
-            )
+        except Exception as e:
+            result, log_entry = self._error_answer(query, chunks, e, start_time, question_id)
+        
+        await asyncio.to_thread(self._write_log, log_entry)
+        return result
+    
+    def _build_messages(self, query: str, chunks: List[RetrievedChunk]) -> List[Dict[str, str]]:
+        """System + user prompt messages for a query and its chunks."""
+        system_prompt = build_system_prompt()
+        user_prompt = build_user_prompt(query, chunks)
+        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _finish_answer(
+        self,
+        query: str,
+        chunks: List[RetrievedChunk],
+        answer: str,
+        input_tokens: int,
+        output_tokens: int,
+        start_time: float,
+        question_id: Optional[str]
+    ) -> Tuple[GeneratedAnswer, Dict[str, Any]]:
+        """
+        Extract/validate citations and build the GeneratedAnswer for an LLM
+        answer.
+        
+        Returns:
+            Tuple of (GeneratedAnswer, log_generation() arguments); the
+            caller writes the log
+        """
+        # 3. Extract citations
+        citations = self.extract_citations(answer)
+        
+        # 4. Validate citations
+        validation = self.validate_citations(answer, len(chunks))
+        
+        # 5. Map citations to chunk IDs and authorities
+        cited_chunk_ids, authorities_used = self.map_citations_to_chunks(
+            citations, chunks
+        )
+        
+        # 6. Calculate cost and latency
+        cost_usd = self.calculate_cost(input_tokens, output_tokens)
+        latency_ms = (time.time() - start_time) * 1000
+        
+        # 7. Detect refusal
+        is_refusal = self.detect_refusal(answer)
+        
+        # 8. Log entry (written by the caller)
+        log_entry = dict(
+            query=query,
+            answer=answer,
+            chunks=chunks,
+            citations=citations,
+            cited_chunk_ids=cited_chunk_ids,
+            validation=validation,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=cost_usd,
+            latency_ms=latency_ms,
+            is_refusal=is_refusal,
+            authorities_used=authorities_used
+        )
+        
+        # 9. Return GeneratedAnswer
+        return GeneratedAnswer(
+            question_id=question_id or f"q_{int(time.time())}",
+            query=query,
+            answer_text=answer,
+            cited_chunk_ids=cited_chunk_ids,
+            is_refusal=is_refusal,
+            authorities_used=authorities_used,
+            total_token_count=input_tokens + output_tokens,
+            latency_ms=latency_ms,
+            cost_usd=cost_usd
+        ), log_entry
+    
+    def _error_answer(
+        self,
+        query: str,
+        chunks: List[RetrievedChunk],
+        error: Exception,
+        start_time: float,
+        question_id: Optional[str]
+    ) -> Tuple[GeneratedAnswer, Dict[str, Any]]:
+        """Error GeneratedAnswer and log_generation() arguments for a failed generation."""
+        # Error handling: Return error response
+        latency_ms = (time.time() - start_time) * 1000
+        
+        error_answer = f"ERROR: Generation failed - {str(error)}"
+        
+        # Log entry (written by the caller)
+        log_entry = dict(
+            query=query,
+            answer=error_answer,
+            chunks=chunks,
+            citations=[],
+            cited_chunk_ids=[],
+            validation={"valid": False, "issues": [str(error)], "citations_found": []},
+            input_tokens=0,
+            output_tokens=0,
+            cost_usd=0.0,
+            latency_ms=latency_ms,
+            is_refusal=False,
+            authorities_used=[]
+        )
+        
+        return GeneratedAnswer(
+            question_id=question_id or f"q_error_{int(time.time())}",
+            query=query,
+            answer_text=error_answer,
+            cited_chunk_ids=[],
+            is_refusal=False,
+            authorities_used=[],
+            total_token_count=0,
+            latency_ms=latency_ms,
+            cost_usd=0.0
+        ), log_entry
 
 
 # Quick test function
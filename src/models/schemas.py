@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Union
 
 
 @dataclass
@@ -22,7 +22,7 @@ class ParsedDocument:
 
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Chunk:
     id: str
     document_id: str
@@ -35,7 +35,7 @@ class Chunk:
     year: Optional[int]
     drug_names: List[str]
 
-@dataclass
+@dataclass(slots=True)
 class RetrievedChunk:
     chunk_id: str
     document_id: str
@@ -49,6 +49,61 @@ class RetrievedChunk:
     drug_names: List[str]
 
 
+@dataclass(slots=True)
+class RetrievedChunkView:
+    """
+    Search result that refers to a shared chunk by index instead of
+    copying its text and metadata. Retrievers pass these around on the
+    hot path; to_retrieved_chunk() builds the full object at the API
+    boundary.
+    """
+    chunks: Sequence[Chunk] = field(repr=False)  # Chunk list or ChunkStore
+    index: int
+    score: float
+    rank: int
+    retriever_type: str
+
+    @property
+    def chunk(self) -> Chunk:
+        return self.chunks[self.index]
+
+    @property
+    def chunk_id(self) -> str:
+        # ChunkStore decodes just the id column instead of a whole Chunk
+        chunk_id = getattr(self.chunks, "chunk_id", None)
+        if chunk_id is not None:
+            return chunk_id(self.index)
+        return self.chunks[self.index].id
+
+    def to_retrieved_chunk(self) -> RetrievedChunk:
+        chunk = self.chunks[self.index]
+        return RetrievedChunk(
+            chunk_id=chunk.id,
+            document_id=chunk.document_id,
+            text=chunk.text,
+            score=self.score,
+            rank=self.rank,
+            retriever_type=self.retriever_type,
+            authority_family=chunk.authority_family,
+            tier=chunk.tier,
+            year=chunk.year,
+            drug_names=chunk.drug_names
+        )
+
+
+# Retrievers return views when results can refer to a shared chunk store,
+# and full RetrievedChunk objects otherwise
+RetrievalHit = Union[RetrievedChunk, RetrievedChunkView]
+
+
+def to_retrieved_chunks(hits: Sequence[RetrievalHit]) -> List[RetrievedChunk]:
+    """Materialize search hits as RetrievedChunk objects."""
+    return [
+        hit.to_retrieved_chunk() if isinstance(hit, RetrievedChunkView) else hit
+        for hit in hits
+    ]
+
+
 @dataclass
 class GeneratedAnswer:
     question_id: str
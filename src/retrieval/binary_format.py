@@ -0,0 +1,172 @@
+"""
+Versioned binary file format shared by the chunk store, the BM25 index
+and the flat vector index
+
+Layout (little-endian): magic (8 bytes) | format version (uint32) |
+header length (uint32) | JSON header (with an "arrays" table of dtype,
+length and offset) | 8-byte aligned raw arrays. Files are written to a
+temp path and renamed, so readers never see a partial file, and opened
+with mmap, so arrays are zero-copy read-only views.
+"""
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+MAGIC_SIZE = 8
+PREAMBLE_SIZE = MAGIC_SIZE + 8  # magic + version + header length
+ARRAY_ALIGNMENT = 8
+
+
+def align(offset: int) -> int:
+    """Round offset up to the array alignment."""
+    return (offset + ARRAY_ALIGNMENT - 1) // ARRAY_ALIGNMENT * ARRAY_ALIGNMENT
+
+
+def encode_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """UTF-8 encode strings into (offsets int64, blob uint8)."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, blob
+
+
+def array_descriptors(arrays: Dict[str, np.ndarray]) -> Dict[str, dict]:
+    """dtype / length / offset (relative to the data start) of each array."""
+    descriptors = {}
+    data_offset = 0
+    for name, array in arrays.items():
+        descriptors[name] = {
+            "dtype": array.dtype.str,
+            "length": int(array.size),
+            "offset": data_offset,
+        }
+        data_offset = align(data_offset + array.nbytes)
+    return descriptors
+
+
+def encode_preamble(magic: bytes, version: int, header: dict) -> Tuple[bytes, int]:
+    """
+    Encode magic, version and JSON header.
+
+    Returns:
+        Tuple of (preamble + header bytes, byte offset where array data starts)
+    """
+    header_bytes = json.dumps(header).encode("utf-8")
+    preamble = magic + struct.pack("<II", version, len(header_bytes))
+    return preamble + header_bytes, align(len(preamble) + len(header_bytes))
+
+
+def write_file(
+    filepath: Union[str, Path],
+    magic: bytes,
+    version: int,
+    header: dict,
+    arrays: Dict[str, np.ndarray]
+):
+    """
+    Write header and arrays atomically (temp file + rename).
+
+    header is stored with an added "arrays" table describing arrays.
+    """
+    filepath = Path(filepath)
+    descriptors = array_descriptors(arrays)
+    head, data_start = encode_preamble(magic, version, {**header, "arrays": descriptors})
+
+    tmp_path = filepath.with_name(filepath.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(head)
+        for name, array in arrays.items():
+            f.write(b"\0" * (data_start + descriptors[name]["offset"] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, filepath)
+
+
+def parse_header(buffer, filepath, magic: bytes, version: int, kind: str) -> Tuple[dict, int]:
+    """
+    Validate magic/version and decode the JSON header of a file.
+
+    Args:
+        buffer: Bytes-like object starting at the beginning of the file
+        filepath: File name for error messages
+        magic: Expected magic bytes
+        version: Expected format version
+        kind: File kind for error messages (e.g. "BM25 index")
+
+    Returns:
+        Tuple of (header dict, byte offset where array data starts)
+
+    Raises:
+        ValueError: If the magic or the format version does not match
+    """
+    if len(buffer) < PREAMBLE_SIZE or buffer[:MAGIC_SIZE] != magic:
+        raise ValueError(f"{filepath} is not a {kind} file")
+
+    file_version, header_len = struct.unpack_from("<II", buffer, MAGIC_SIZE)
+    if file_version != version:
+        raise ValueError(
+            f"Unsupported {kind} format v{file_version} "
+            f"(expected v{version}); rebuild it"
+        )
+
+    header = json.loads(bytes(buffer[PREAMBLE_SIZE:PREAMBLE_SIZE + header_len]))
+    return header, align(PREAMBLE_SIZE + header_len)
+
+
+def read_header(filepath: Union[str, Path], magic: bytes, version: int, kind: str) -> dict:
+    """
+    Read only the JSON header of a file.
+
+    Raises:
+        ValueError: If the magic or the format version does not match
+    """
+    with open(filepath, "rb") as f:
+        preamble = f.read(PREAMBLE_SIZE)
+        header_len = 0
+        if len(preamble) == PREAMBLE_SIZE:
+            header_len = struct.unpack_from("<I", preamble, PREAMBLE_SIZE - 4)[0]
+        header, _ = parse_header(preamble + f.read(header_len), filepath, magic, version, kind)
+    return header
+
+
+def map_file(
+    filepath: Union[str, Path],
+    magic: bytes,
+    version: int,
+    kind: str
+) -> Tuple[dict, Dict[str, np.ndarray], mmap.mmap]:
+    """
+    Open a file with mmap.
+
+    Returns:
+        Tuple of (header, arrays as read-only views, the mmap, which must
+        stay open while the arrays are in use)
+
+    Raises:
+        ValueError: If the magic or the format version does not match
+    """
+    with open(filepath, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        header, data_start = parse_header(mm, filepath, magic, version, kind)
+    except ValueError:
+        mm.close()
+        raise
+
+    arrays = {
+        name: np.frombuffer(
+            mm,
+            dtype=np.dtype(spec["dtype"]),
+            count=spec["length"],
+            offset=data_start + spec["offset"]
+        )
+        for name, spec in header["arrays"].items()
+    }
+    return header, arrays, mm
@@ -1,44 +1,131 @@
 """
 BM25 Index for Evidence-Bound Drug RAG
 Handles lexical retrieval using BM25 algorithm with simple whitespace tokenization
+
+Scoring uses a native inverted index (term dictionary + compact postings
+arrays) that reproduces rank_bm25's BM25Okapi scores exactly, but only
+touches documents that contain at least one query term.
 """
 
+import copy
 import json
-import pickle
+import math
+import mmap
+import os
 import string
+import threading
 import time
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
-from rank_bm25 import BM25Okapi
+import numpy as np
+import scipy.sparse as sp
 
 import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from src.models.schemas import Chunk, RetrievedChunk
+from src.models.schemas import Chunk, RetrievedChunk, RetrievedChunkView, to_retrieved_chunks
+from src.retrieval import binary_format
+from src.retrieval.binary_format import encode_strings
+from src.retrieval.chunk_store import MASK_FIELDS, ChunkStore, combine_filter_masks, hash_chunks_file
+from src.retrieval.lru_cache import LRUCache
+from src.retrieval.top_k import top_k_indices
+
+
+# On-disk index format (see BM25Index.save_to_disk)
+BM25_INDEX_MAGIC = b"EBRBM25\0"
+BM25_INDEX_FORMAT_VERSION = 1
+
+# Parallel build: shards per worker process (smaller shards balance load)
+SHARDS_PER_WORKER = 4
+
+# Smaller corpora are tokenized serially: starting the pool and pickling
+# the shards costs more than it saves
+PARALLEL_BUILD_MIN_CHUNKS = 5000
+
+# Compiled queries (term ids + IDF weights) kept per index
+DEFAULT_QUERY_CACHE_SIZE = 1024
+
+# Chunk metadata fields with precomputed document masks (search filters=)
+FILTER_FIELDS = MASK_FIELDS
+
+# MaxScore pruning: relative slack on the top-k threshold, so float rounding
+# in partial sums can never prune a chunk that belongs in the exact top-k
+PRUNING_TOLERANCE = 1e-9
+
+# Queries touching fewer postings are scored exhaustively: below this the
+# bookkeeping costs more than the postings it skips
+PRUNING_MIN_POSTINGS = 4096
 
 
 class BM25Index:
     """
     BM25-based lexical search index for drug document chunks.
     Uses simple whitespace tokenization to preserve medical units.
+    
+    Index layout (CSR-style, one row per term):
+    - vocab: term -> term_id (first-seen order, same as BM25Okapi)
+    - postings_offsets[t]:postings_offsets[t+1] slices postings_doc_ids /
+      postings_tfs for term t (doc ids ascending)
+    - doc_lengths, idf: per-document token counts and per-term IDF
+    - filter_masks[field][value]: boolean mask over chunks for each drug,
+      authority family and tier, plus chunk_years for year ranges
+      (restrict scoring in search(filters=))
+    
+    Searches never lock. Writers (add_chunks, remove_document) take the
+    writer lock, build the new postings, stats and masks on a shallow copy
+    of the index (copy-on-write) and publish it with one reference swap;
+    each search runs entirely against the copy published when it started.
     """
     
-    def __init__(self, k1: float = 1.5, b: float = 0.75):
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+        query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE,
+        dynamic_pruning: bool = True
+    ):
         """
         Initialize BM25 index with hyperparameters.
         
         Args:
             k1: Term frequency saturation parameter (default 1.5)
             b: Length normalization parameter (default 0.75)
+            epsilon: IDF floor factor for very common terms (BM25Okapi default 0.25)
+            query_cache_size: Compiled queries kept in the LRU cache (0 disables)
+            dynamic_pruning: Skip chunks that cannot reach the top-k in search()
+                (MaxScore; results are identical to exhaustive scoring)
         """
         self.k1 = k1
         self.b = b
-        self.bm25 = None
-        self.chunks = []
-        self.tokenized_corpus = []
+        self.epsilon = epsilon
+        self.dynamic_pruning = dynamic_pruning
+        self.chunks: Sequence[Chunk] = []  # List of Chunk or a shared ChunkStore
         self.token_stats = {}
         
+        # Inverted index (populated by build_index)
+        self.vocab: Dict[str, int] = {}
+        self.postings_offsets: Optional[np.ndarray] = None
+        self.postings_doc_ids: Optional[np.ndarray] = None
+        self.postings_tfs: Optional[np.ndarray] = None
+        self.doc_lengths: Optional[np.ndarray] = None
+        self.idf: Optional[np.ndarray] = None
+        self.avgdl = 0.0
+        self.average_idf = 0.0
+        self._doc_norms: Optional[np.ndarray] = None
+        self._mmap: Optional[mmap.mmap] = None  # Backing file when loaded from disk
+        self._term_weights: Optional[sp.csr_matrix] = None  # Lazy, for search_batch
+        self._max_term_weights: Optional[np.ndarray] = None  # Lazy, for pruning
+        self._pruning_keys: Optional[np.ndarray] = None  # Lazy, for pruning
+        self.filter_masks: Dict[str, Dict[Any, np.ndarray]] = {}
+        self.chunk_years = np.empty(0, dtype=np.int64)  # Year per chunk (-1 = None), for year_min/year_max
+        self.source_hash: Optional[str] = None  # sha256 of the chunks.json indexed
+        self._lock = threading.Lock()  # Serializes writers (add/remove)
+        self._reader: Optional[BM25Index] = None  # Published state searched by readers
+        self.query_cache = LRUCache(query_cache_size)  # query -> (term ids, IDF weights)
+        
         print(f"Initialized BM25Index (k1={k1}, b={b})")
     
     def load_chunks(self, chunks_json_path: str) -> List[Chunk]:
@@ -64,7 +151,8 @@ class BM25Index:
         self.chunks = chunks
         return chunks
     
-    def tokenize(self, text: str) -> List[str]:
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
         """
         Simple whitespace tokenization (Task 1.2 approved configuration).
         
@@ -81,10 +169,25 @@ class BM25Index:
         """
         return text.lower().split()
     
-    def build_index(self):
+    def build_index(self, diagnostics: bool = False, workers: Optional[int] = None):
         """
         Build BM25 inverted index from loaded chunks.
         Tokenizes all chunks and computes IDF scores.
+        
+        Token statistics (Task 4.4.1) are derived from the postings in a
+        single pass over the vocabulary and stored with the index; the full
+        report is only printed when diagnostics is enabled.
+        
+        With workers > 1, tokenization and term-frequency counting are
+        sharded over a process pool and the shards merged in chunk order;
+        the resulting index is identical to the serial build. The build
+        stays serial if workers >= the CPU count (the workers would compete
+        with this process for cores) or the corpus has fewer than
+        PARALLEL_BUILD_MIN_CHUNKS chunks.
+        
+        Args:
+            diagnostics: Print the token distribution / suspicious token report
+            workers: Number of worker processes (None or 1 = serial build)
         """
         if not self.chunks:
             raise ValueError("No chunks loaded. Call load_chunks() first.")
@@ -92,135 +195,1028 @@ class BM25Index:
         print(f"\nBuilding BM25 index...")
         start_time = time.time()
         
-        # Tokenize all chunks
-        print(f"Tokenizing {len(self.chunks)} chunks...")
-        self.tokenized_corpus = []
-        for chunk in self.chunks:
-            tokens = self.tokenize(chunk.text)
-            self.tokenized_corpus.append(tokens)
+        texts = [chunk.text for chunk in self.chunks]
         
-        # Build BM25 index
-        print(f"Computing BM25 scores (k1={self.k1}, b={self.b})...")
-        self.bm25 = BM25Okapi(self.tokenized_corpus, k1=self.k1, b=self.b)
+        # Tokenize + count term frequencies (serial, or sharded over processes)
+        cpu_count = os.cpu_count() or 1
+        if workers is not None and workers > 1 and (
+                workers >= cpu_count or len(texts) < PARALLEL_BUILD_MIN_CHUNKS):
+            print(f"⚠️  Serial build instead of {workers} workers "
+                  f"({len(texts)} chunks, {cpu_count} CPUs)")
+            workers = None
+        
+        if workers is not None and workers > 1:
+            print(f"Tokenizing {len(texts)} chunks ({workers} worker processes)...")
+            shard_size = math.ceil(len(texts) / (workers * SHARDS_PER_WORKER))
+            text_shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                shards = list(executor.map(_count_shard, text_shards))
+        else:
+            print(f"Tokenizing {len(texts)} chunks...")
+            shards = [_count_shard(texts)]
+        
+        # Build inverted index
+        print(f"Computing BM25 postings (k1={self.k1}, b={self.b})...")
+        self._build_postings(shards)
+        self._build_filter_masks()
+        
+        # Token stats (Task 4.4.1) from postings, no corpus re-scan
+        self.token_stats = self.compute_token_stats()
+        self._publish(self._staged_copy())
         
         elapsed = time.time() - start_time
         print(f"✅ BM25 index built in {elapsed:.2f}s")
         
-        # Log token distribution stats (Task 4.4.1)
-        self._log_token_stats()
+        if diagnostics:
+            self.log_token_stats()
+    
+    def _build_postings(self, shards: List["_Shard"]):
+        """
+        Merge per-shard term counts into term dictionary, postings arrays,
+        doc lengths and IDF.
+        
+        Term ids are assigned in first-seen order across shards (taken in
+        chunk order) so that the IDF floor (epsilon * average IDF) is
+        accumulated exactly as BM25Okapi does.
+        
+        Args:
+            shards: Outputs of _count_shard for consecutive slices of chunks
+        """
+        vocab: Dict[str, int] = {}
+        term_id_parts = []
+        doc_id_parts = []
+        doc_offset = 0
+        
+        for shard_terms, shard_term_ids, shard_doc_ids, _, shard_doc_lengths in shards:
+            # Map shard-local term ids to global ids
+            local_to_global = np.empty(len(shard_terms), dtype=np.int32)
+            for local_id, term in enumerate(shard_terms):
+                term_id = vocab.get(term)
+                if term_id is None:
+                    term_id = len(vocab)
+                    vocab[term] = term_id
+                local_to_global[local_id] = term_id
+            term_id_parts.append(local_to_global[shard_term_ids])
+            doc_id_parts.append(shard_doc_ids + doc_offset)
+            doc_offset += len(shard_doc_lengths)
+        
+        term_ids = np.concatenate(term_id_parts)
+        doc_ids = np.concatenate(doc_id_parts).astype(np.int32)
+        tfs = np.concatenate([shard[3] for shard in shards])
+        
+        # Group postings by term; stable sort keeps doc ids ascending per term
+        order = np.argsort(term_ids, kind="stable")
+        df = np.bincount(term_ids, minlength=len(vocab))
+        
+        self._install_postings(
+            vocab,
+            df,
+            doc_ids[order],
+            tfs[order],
+            np.concatenate([shard[4] for shard in shards]).astype(np.int32)
+        )
+    
+    def _install_postings(
+        self,
+        vocab: Dict[str, int],
+        df: np.ndarray,
+        postings_doc_ids: np.ndarray,
+        postings_tfs: np.ndarray,
+        doc_lengths: np.ndarray
+    ):
+        """
+        Replace the index arrays (offsets derived from df) and recompute IDF.
+        
+        Args:
+            vocab: term -> term_id
+            df: Document frequency per term id (postings per term)
+            postings_doc_ids: Doc ids grouped by term, ascending within a term
+            postings_tfs: Term frequencies aligned with postings_doc_ids
+            doc_lengths: Token count per chunk
+        """
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+        
+        self.vocab = vocab
+        self.postings_offsets = offsets
+        self.postings_doc_ids = postings_doc_ids
+        self.postings_tfs = postings_tfs
+        self.doc_lengths = doc_lengths
+        self._compute_idf(df)
+        self._mmap = None  # Arrays no longer refer to the loaded file
+        self._term_weights = None
+        self._max_term_weights = None
+        self._pruning_keys = None
+        self.query_cache.clear()  # Term ids and IDF changed
+    
+    def add_chunks(self, chunks: List[Chunk]):
+        """
+        Add chunks to a built index without a full rebuild.
+        
+        Only the new chunks are tokenized. Their postings are appended after
+        the existing postings of each term (new doc ids are always larger),
+        then document frequencies, IDF and average document length are
+        recomputed from the updated arrays. The result is identical to
+        rebuilding over self.chunks + chunks. A shared (read-only)
+        ChunkStore is replaced by a private list of chunks.
+        
+        Args:
+            chunks: Chunk objects to index (appended after existing chunks)
+        """
+        if self.idf is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        if not chunks:
+            return
+        
+        start_time = time.time()
+        shard_terms, shard_term_ids, shard_doc_ids, shard_tfs, shard_doc_lengths = \
+            _count_shard([chunk.text for chunk in chunks])
+        
+        with self._lock:
+            staged = self._staged_copy()
+            staged._append_chunks(
+                chunks, shard_terms, shard_term_ids, shard_doc_ids, shard_tfs, shard_doc_lengths
+            )
+            self._publish(staged)
+        
+        elapsed = (time.time() - start_time) * 1000
+        print(f"✅ Added {len(chunks)} chunks to BM25 index in {elapsed:.1f}ms "
+              f"(corpus: {self.get_corpus_size()} chunks)")
+    
+    def remove_document(self, document_id: str) -> int:
+        """
+        Remove every chunk of a document without a full rebuild.
+        
+        Postings of removed chunks are dropped, remaining doc ids are
+        compacted (relative order kept), terms that no longer occur are
+        dropped from the vocabulary, and IDF / average document length are
+        recomputed. Scores match a rebuild over the remaining chunks (the
+        IDF floor's average may differ in the last bits, since term ids keep
+        their original order). A shared (read-only) ChunkStore is replaced
+        by a private list of chunks.
+        
+        Args:
+            document_id: Document whose chunks should be removed
+            
+        Returns:
+            Number of chunks removed (0 if the document is not indexed)
+        """
+        if self.idf is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        
+        start_time = time.time()
+        with self._lock:
+            staged = self._staged_copy()
+            removed = staged._drop_document(document_id)
+            if removed == 0:
+                print(f"⚠️  Document '{document_id}' not in BM25 index, nothing removed")
+                return 0
+            self._publish(staged)
+        
+        elapsed = (time.time() - start_time) * 1000
+        print(f"✅ Removed {removed} chunks of '{document_id}' from BM25 index in {elapsed:.1f}ms "
+              f"(corpus: {self.get_corpus_size()} chunks)")
+        return removed
+    
+    def _append_chunks(
+        self,
+        chunks: List[Chunk],
+        shard_terms: List[str],
+        shard_term_ids: np.ndarray,
+        shard_doc_ids: np.ndarray,
+        shard_tfs: np.ndarray,
+        shard_doc_lengths: np.ndarray
+    ):
+        """Append tokenized chunks (a _count_shard output) to an unpublished copy."""
+        old_offsets = self.postings_offsets
+        old_vocab_size = len(self.vocab)
+        corpus_size = len(self.doc_lengths)
+        
+        # New terms continue the first-seen numbering
+        vocab = dict(self.vocab)
+        local_to_global = np.empty(len(shard_terms), dtype=np.int32)
+        for local_id, term in enumerate(shard_terms):
+            term_id = vocab.get(term)
+            if term_id is None:
+                term_id = len(vocab)
+                vocab[term] = term_id
+            local_to_global[local_id] = term_id
+        new_term_ids = local_to_global[shard_term_ids]
+        
+        old_df = np.zeros(len(vocab), dtype=np.int64)
+        old_df[:old_vocab_size] = np.diff(old_offsets)
+        new_df = np.bincount(new_term_ids, minlength=len(vocab))
+        df = old_df + new_df
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+        
+        postings_doc_ids = np.empty(int(offsets[-1]), dtype=np.int32)
+        postings_tfs = np.empty(int(offsets[-1]), dtype=np.int32)
+        
+        # Existing postings keep their order, shifted to their term's new start
+        shift = offsets[:old_vocab_size] - old_offsets[:-1]
+        old_positions = np.arange(int(old_offsets[-1])) + np.repeat(shift, old_df[:old_vocab_size])
+        postings_doc_ids[old_positions] = self.postings_doc_ids
+        postings_tfs[old_positions] = self.postings_tfs
+        
+        # New postings go right after the existing ones of the same term
+        order = np.argsort(new_term_ids, kind="stable")
+        sorted_terms = new_term_ids[order]
+        new_starts = np.cumsum(new_df) - new_df
+        rank_in_term = np.arange(len(order)) - new_starts[sorted_terms]
+        new_positions = offsets[sorted_terms] + old_df[sorted_terms] + rank_in_term
+        postings_doc_ids[new_positions] = shard_doc_ids[order] + corpus_size
+        postings_tfs[new_positions] = shard_tfs[order]
+        
+        self._install_postings(
+            vocab,
+            df,
+            postings_doc_ids,
+            postings_tfs,
+            np.concatenate([self.doc_lengths, shard_doc_lengths]).astype(np.int32)
+        )
+        self.chunks = list(self.chunks) + list(chunks)
+        self._build_filter_masks()
+        self.token_stats = {}  # Recomputed on demand (log_token_stats / save_to_disk)
+        self.source_hash = None  # No longer matches chunks.json on disk
+    
+    def _drop_document(self, document_id: str) -> int:
+        """Remove a document's chunks from an unpublished copy; returns the count."""
+        keep_docs = np.fromiter(
+            (chunk.document_id != document_id for chunk in self.chunks),
+            dtype=bool,
+            count=len(self.chunks)
+        )
+        removed = int(len(keep_docs) - keep_docs.sum())
+        if removed == 0:
+            return 0
+        if removed == len(keep_docs):
+            raise ValueError("Cannot remove every chunk from the BM25 index")
+        
+        doc_remap = np.cumsum(keep_docs) - 1
+        keep_postings = keep_docs[self.postings_doc_ids]
+        
+        old_df = np.diff(self.postings_offsets)
+        posting_terms = np.repeat(np.arange(len(old_df)), old_df)[keep_postings]
+        df = np.bincount(posting_terms, minlength=len(old_df))
+        
+        # Drop terms that only occurred in the removed chunks
+        live_terms = df > 0
+        term_remap = (np.cumsum(live_terms) - 1).tolist()
+        live = live_terms.tolist()
+        vocab = {term: term_remap[i] for term, i in self.vocab.items() if live[i]}
+        
+        self._install_postings(
+            vocab,
+            df[live_terms],
+            doc_remap[self.postings_doc_ids[keep_postings]].astype(np.int32),
+            self.postings_tfs[keep_postings],
+            self.doc_lengths[keep_docs]
+        )
+        self.chunks = [chunk for chunk, keep in zip(self.chunks, keep_docs.tolist()) if keep]
+        self._build_filter_masks()
+        self.token_stats = {}  # Recomputed on demand (log_token_stats / save_to_disk)
+        self.source_hash = None  # No longer matches chunks.json on disk
+        return removed
+    
+    def _staged_copy(self) -> 'BM25Index':
+        """
+        Shallow copy of the index for a writer to modify before _publish().
+        
+        Writers only ever assign new arrays / dicts to the copy, so the
+        published state they were copied from stays unchanged. The copy gets
+        its own query cache (compiled term ids depend on the vocabulary).
+        """
+        staged = copy.copy(self)
+        staged.query_cache = LRUCache(self.query_cache.maxsize)
+        return staged
+    
+    def _publish(self, staged: 'BM25Index'):
+        """
+        Make staged the state new searches run against (one reference swap)
+        and mirror it on self. Callers hold self._lock.
+        """
+        staged._reader = staged
+        self.__dict__.update(
+            (name, value) for name, value in staged.__dict__.items() if name != "_reader"
+        )
+        self._reader = staged
+    
+    def _published(self) -> 'BM25Index':
+        """
+        State for a search (never modified once published).
+        
+        Raises:
+            ValueError: If the index has not been built or loaded
+        """
+        reader = self._reader
+        if reader is None or reader.idf is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        return reader
+    
+    def _build_filter_masks(self):
+        """
+        Precompute a boolean chunk mask per drug, authority family and tier,
+        and the chunk year column.
+        
+        Masks are rebuilt whenever the chunk list changes (build, add,
+        remove, load) so search(filters=) never inspects chunk objects.
+        A ChunkStore computes them from its metadata codes.
+        """
+        if isinstance(self.chunks, ChunkStore):
+            self.filter_masks = self.chunks.filter_masks()
+            self.chunk_years = self.chunks.years
+            return
+        
+        doc_ids_by_value: Dict[str, Dict[Any, List[int]]] = {
+            field: {} for field in FILTER_FIELDS
+        }
+        for doc_id, chunk in enumerate(self.chunks):
+            for field in FILTER_FIELDS:
+                values = getattr(chunk, field)
+                if field == "drug_names":
+                    values = set(values)
+                else:
+                    values = [values]
+                for value in values:
+                    doc_ids_by_value[field].setdefault(value, []).append(doc_id)
+        
+        corpus_size = len(self.chunks)
+        masks: Dict[str, Dict[Any, np.ndarray]] = {}
+        for field, by_value in doc_ids_by_value.items():
+            masks[field] = {}
+            for value, doc_ids in by_value.items():
+                mask = np.zeros(corpus_size, dtype=bool)
+                mask[doc_ids] = True
+                masks[field][value] = mask
+        self.filter_masks = masks
+        self.chunk_years = np.array(
+            [chunk.year if chunk.year is not None else -1 for chunk in self.chunks],
+            dtype=np.int64
+        )
+    
+    def filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Combine precomputed masks for a metadata filter.
+        
+        Fields are ANDed; a list of values for one field is ORed, e.g.
+        {"drug_names": "warfarin", "tier": [1, 2], "year_min": 2020}.
+        Unknown values match no chunks; chunks without a year never match
+        a year range.
+        
+        Args:
+            filters: Key -> value or list of values (chunk_store.FILTER_KEYS)
+            
+        Returns:
+            Boolean mask over chunks, or None if filters is empty
+            
+        Raises:
+            ValueError: If a key is not one of chunk_store.FILTER_KEYS
+        """
+        return combine_filter_masks(filters, self.filter_masks, self.chunk_years)
+    
+    def _compute_idf(self, df: np.ndarray):
+        """
+        Compute BM25Okapi IDF with epsilon floor, plus per-doc length norms.
+        
+        Uses math.log in vocab order (not np.log) so values are bit-identical
+        to rank_bm25.
+        
+        Args:
+            df: Document frequency per term id
+        """
+        corpus_size = len(self.doc_lengths)
+        
+        idf = [
+            math.log(corpus_size - freq + 0.5) - math.log(freq + 0.5)
+            for freq in df.tolist()
+        ]
+        idf_sum = 0
+        for value in idf:
+            idf_sum += value
+        self.average_idf = idf_sum / len(idf) if idf else 0.0
+        
+        idf_arr = np.asarray(idf, dtype=np.float64)
+        idf_arr[idf_arr < 0] = self.epsilon * self.average_idf
+        self.idf = idf_arr
+        
+        self.avgdl = int(self.doc_lengths.sum()) / corpus_size
+        self._doc_norms = self.k1 * (
+            1 - self.b + self.b * self.doc_lengths.astype(np.int64) / self.avgdl
+        )
+    
+    def _compile_tokens(self, query_tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Map query tokens to term ids and their IDF weights.
+        
+        Out-of-vocabulary tokens are dropped; duplicates are kept so repeated
+        terms count once per occurrence, as in BM25Okapi.
+        
+        Args:
+            query_tokens: Tokenized query
+            
+        Returns:
+            Tuple of (term ids in query order, IDF weight per term id)
+        """
+        term_ids = np.array(
+            [self.vocab[t] for t in query_tokens if t in self.vocab], dtype=np.int64
+        )
+        return term_ids, self.idf[term_ids]
+    
+    def _compile_query(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Term ids and IDF weights for a raw query string, via the LRU cache.
+        
+        Repeated queries skip tokenization and the vocab/IDF lookups. Each
+        published state has its own cache, so entries never outlive the
+        vocabulary they were compiled against.
+        
+        Args:
+            query: Search query text
+            
+        Returns:
+            Tuple of (term ids in query order, IDF weight per term id)
+        """
+        compiled = self.query_cache.get(query)
+        if compiled is None:
+            compiled = self._compile_tokens(self.tokenize(query))
+            self.query_cache.put(query, compiled)
+        return compiled
+    
+    def _score_query(self, query_tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score only the documents that contain at least one query term.
+        
+        Args:
+            query_tokens: Tokenized query
+            
+        Returns:
+            Tuple of (candidate doc ids ascending, BM25 scores)
+        """
+        return self._score_terms(*self._compile_tokens(query_tokens))
     
-    def _log_token_stats(self):
+    def _score_terms(
+        self,
+        term_ids: np.ndarray,
+        term_idfs: np.ndarray,
+        doc_mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Log token distribution statistics (Task 4.4.1).
+        Score the documents in the postings of a compiled query.
+        
+        Contributions are added term by term in query order (duplicates
+        included), matching BM25Okapi.get_scores bit for bit. With doc_mask,
+        postings of non-matching chunks are dropped before scoring (IDF and
+        length normalization still use the whole corpus).
+        
+        Args:
+            term_ids: Term ids in query order
+            term_idfs: IDF weight per term id
+            doc_mask: Optional boolean mask of chunks that may be scored
+            
+        Returns:
+            Tuple of (candidate doc ids ascending, BM25 scores)
+        """
+        if len(term_ids) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        
+        offsets = self.postings_offsets
+        term_postings = []
+        for term_id in term_ids:
+            start, end = offsets[term_id], offsets[term_id + 1]
+            docs = self.postings_doc_ids[start:end]
+            tf = self.postings_tfs[start:end]
+            if doc_mask is not None:
+                keep = doc_mask[docs]
+                docs, tf = docs[keep], tf[keep]
+            term_postings.append((docs, tf))
+        
+        candidates = np.unique(np.concatenate([docs for docs, _ in term_postings]))
+        scores = np.zeros(len(candidates), dtype=np.float64)
+        
+        k1_plus_1 = self.k1 + 1
+        for idf, (docs, tf) in zip(term_idfs, term_postings):
+            tf = tf.astype(np.int64)
+            contrib = idf * (tf * k1_plus_1 / (tf + self._doc_norms[docs]))
+            scores[np.searchsorted(candidates, docs)] += contrib
+        
+        return candidates, scores
+    
+    def _score_terms_pruned(
+        self,
+        term_ids: np.ndarray,
+        term_idfs: np.ndarray,
+        top_k: int,
+        doc_mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score only the chunks that can still enter the top-k (MaxScore).
+        
+        Each term's score upper bound is its IDF times its largest
+        per-posting term weight. Terms are processed by decreasing bound;
+        once the bounds of the unprocessed terms add up to less than the
+        current k-th best partial score, no chunk outside the candidate set
+        can reach the top-k. The remaining (common, low-IDF) terms such as
+        "the" or "what" are then only looked up for the surviving
+        candidates (binary search) instead of scanning their whole posting
+        lists, and after each one the candidates whose partial score plus
+        the remaining bounds falls below the (rising) threshold are dropped.
+        
+        The finalists are rescored in query order exactly as _score_terms
+        does, so the top-k (scores and tie order) is identical. Short
+        queries (under PRUNING_MIN_POSTINGS postings) and queries with
+        negative IDF terms fall back to _score_terms.
+        
+        Args:
+            term_ids: Term ids in query order
+            term_idfs: IDF weight per term id
+            top_k: Number of results that will be kept
+            doc_mask: Optional boolean mask of chunks that may be scored
+            
+        Returns:
+            Tuple of (candidate doc ids ascending, BM25 scores) covering at
+            least every chunk of the exact top-k
+        """
+        # Bounds need non-negative contributions (partial scores only grow)
+        offsets = self.postings_offsets
+        if (len(term_ids) < 2 or top_k <= 0 or (term_idfs < 0).any()
+                or (offsets[term_ids + 1] - offsets[term_ids]).sum() < PRUNING_MIN_POSTINGS):
+            return self._score_terms(term_ids, term_idfs, doc_mask)
+        
+        # Upper bound per distinct term (repeated terms count once per occurrence)
+        unique_ids, first_index, counts = np.unique(
+            term_ids, return_index=True, return_counts=True
+        )
+        weights = term_idfs[first_index] * counts
+        bounds = weights * self._max_weight_per_term()[unique_ids]
+        order = np.argsort(-bounds, kind="stable")
+        remaining_bounds = np.append(np.cumsum(bounds[order][::-1])[::-1][1:], 0.0)
+        
+        # Essential terms: full posting scans until the remaining terms alone
+        # can no longer reach the k-th best partial score. Only the current
+        # top-k pool and the new term's chunks can hold the new k-th best.
+        partial = np.zeros(len(self.doc_lengths), dtype=np.float64)
+        last_term = np.full(len(self.doc_lengths), -1, dtype=np.int64)  # Last essential term seen
+        pool = np.empty(0, dtype=np.int64)
+        threshold = 0.0
+        position = 0
+        while position < len(order):
+            term_index = order[position]
+            docs, term_weights = self._term_contributions(unique_ids[term_index], doc_mask)
+            partial[docs] += weights[term_index] * term_weights
+            last_term[docs] = position
+            position += 1
+            
+            pool = np.concatenate([docs, pool[last_term[pool] != position - 1]])
+            if len(pool) > top_k:
+                pool = pool[np.argpartition(partial[pool], len(pool) - top_k)[len(pool) - top_k:]]
+            threshold = _kth_largest(partial[pool], top_k) * (1 - PRUNING_TOLERANCE)
+            if threshold > 0 and remaining_bounds[position - 1] < threshold:
+                break
+        
+        # Non-essential terms: binary-search the surviving candidates only
+        candidates = np.flatnonzero(last_term >= 0)
+        scores = partial[candidates]
+        for position in range(position, len(order)):
+            keep = scores + remaining_bounds[position - 1] >= threshold
+            candidates, scores = candidates[keep], scores[keep]
+            
+            term_index = order[position]
+            found, term_weights = self._lookup_weights(unique_ids[term_index], candidates)
+            scores[found] += weights[term_index] * term_weights
+            threshold = max(threshold, _kth_largest(scores, top_k) * (1 - PRUNING_TOLERANCE))
+        
+        # Finalists (k-th best and anything within rounding of it), rescored
+        # in query order so scores and ties match _score_terms bit for bit
+        candidates = candidates[scores >= threshold]
+        exact = np.zeros(len(candidates), dtype=np.float64)
+        for idf, term_weights in zip(term_idfs, self._lookup_weight_matrix(term_ids, candidates)):
+            exact += idf * term_weights
+        
+        return candidates.astype(np.int32), exact
+    
+    def _term_contributions(
+        self,
+        term_id: int,
+        doc_mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Doc ids and BM25 term weights (without IDF) of one posting list.
+        
+        Args:
+            term_id: Term to read
+            doc_mask: Optional boolean mask of chunks to keep
+            
+        Returns:
+            Tuple of (doc ids ascending, term weights)
+        """
+        start, end = self.postings_offsets[term_id], self.postings_offsets[term_id + 1]
+        docs = self.postings_doc_ids[start:end]
+        tf = self.postings_tfs[start:end]
+        if doc_mask is not None:
+            keep = doc_mask[docs]
+            docs, tf = docs[keep], tf[keep]
+        tf = tf.astype(np.int64)
+        return docs, tf * (self.k1 + 1) / (tf + self._doc_norms[docs])
+    
+    def _lookup_weights(
+        self,
+        term_id: int,
+        doc_ids: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25 term weights (without IDF) of one term for given chunks only.
+        
+        Binary-searches doc_ids in the term's posting list instead of
+        scanning it.
+        
+        Args:
+            term_id: Term to look up
+            doc_ids: Chunk indices (ascending)
+            
+        Returns:
+            Tuple of (boolean mask over doc_ids containing the term,
+            term weights for those chunks)
+        """
+        start, end = self.postings_offsets[term_id], self.postings_offsets[term_id + 1]
+        docs = self.postings_doc_ids[start:end]
+        positions = np.searchsorted(docs, doc_ids)
+        found = positions < len(docs)
+        found[found] = docs[positions[found]] == doc_ids[found]
+        tf = self.postings_tfs[start + positions[found]].astype(np.int64)
+        return found, tf * (self.k1 + 1) / (tf + self._doc_norms[doc_ids[found]])
+    
+    def _lookup_weight_matrix(self, term_ids: np.ndarray, doc_ids: np.ndarray) -> np.ndarray:
+        """
+        BM25 term weights (without IDF) for every (term, chunk) pair.
+        
+        All pairs are located with one binary search over the postings keyed
+        by term_id * corpus_size + doc_id, which is ascending because
+        postings are grouped by term with doc ids ascending. Meant for a
+        handful of chunks (the top-k finalists).
+        
+        Args:
+            term_ids: Terms to look up
+            doc_ids: Chunk indices
+            
+        Returns:
+            Array of shape (len(term_ids), len(doc_ids)), 0.0 where the chunk
+            does not contain the term
+        """
+        posting_keys = self._posting_keys()
+        keys = (
+            np.asarray(term_ids, dtype=np.int64)[:, None] * len(self.doc_lengths)
+            + np.asarray(doc_ids, dtype=np.int64)[None, :]
+        )
+        positions = np.minimum(np.searchsorted(posting_keys, keys), len(posting_keys) - 1)
+        found = posting_keys[positions] == keys
+        
+        tf = self.postings_tfs[positions[found]].astype(np.int64)
+        term_weights = np.zeros(keys.shape, dtype=np.float64)
+        term_weights[found] = tf * (self.k1 + 1) / (
+            tf + self._doc_norms[np.broadcast_to(doc_ids, keys.shape)[found]]
+        )
+        return term_weights
+    
+    def _posting_keys(self) -> np.ndarray:
+        """
+        term_id * corpus_size + doc_id for every posting (ascending).
+        
+        Built lazily for MaxScore pruning and reset whenever the postings
+        change.
+        """
+        if self._pruning_keys is None:
+            term_of_posting = np.repeat(
+                np.arange(len(self.vocab), dtype=np.int64), np.diff(self.postings_offsets)
+            )
+            self._pruning_keys = term_of_posting * len(self.doc_lengths) + self.postings_doc_ids
+        return self._pruning_keys
+    
+    def _max_weight_per_term(self) -> np.ndarray:
+        """
+        Largest BM25 term weight (without IDF) per term, over its postings.
+        
+        Built lazily for MaxScore pruning and reset whenever the postings
+        change.
+        """
+        if self._max_term_weights is None:
+            tf = self.postings_tfs.astype(np.int64)
+            weights = tf * (self.k1 + 1) / (tf + self._doc_norms[self.postings_doc_ids])
+            self._max_term_weights = np.maximum.reduceat(weights, self.postings_offsets[:-1])
+        return self._max_term_weights
+    
+    def get_scores(self, query_tokens: List[str]) -> np.ndarray:
+        """
+        Dense BM25 scores for every chunk (BM25Okapi.get_scores equivalent).
+        
+        Args:
+            query_tokens: Tokenized query
+            
+        Returns:
+            Array of length corpus size (0.0 for chunks without query terms)
+        """
+        index = self._published()
+        scores = np.zeros(len(index.doc_lengths), dtype=np.float64)
+        doc_ids, doc_scores = index._score_query(query_tokens)
+        scores[doc_ids] = doc_scores
+        return scores
+    
+    def compute_token_stats(self) -> dict:
+        """
+        Compute token distribution statistics (Task 4.4.1 / 4.4.2).
+        
+        Corpus totals come from doc_lengths and per-term occurrence counts
+        from summing postings tfs per term, so the only Python-level loop is
+        one pass over the vocabulary (not over every token). Works on a
+        freshly built index and on one loaded from disk.
+        
+        Returns:
+            Dict of corpus stats, top tokens and suspicious token counts /
+            examples (JSON-serializable, stored in the index header)
+        """
+        if self.idf is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        
+        # Occurrences per term id = sum of its postings' term frequencies
+        term_counts = np.zeros(len(self.vocab), dtype=np.int64)
+        nonempty = np.flatnonzero(np.diff(self.postings_offsets) > 0)
+        if len(nonempty):
+            term_counts[nonempty] = np.add.reduceat(
+                self.postings_tfs.astype(np.int64), self.postings_offsets[nonempty]
+            )
+        
+        terms = [""] * len(self.vocab)
+        for term, term_id in self.vocab.items():
+            terms[term_id] = term
+        
+        # One pass over the vocabulary for suspicious token detection (Task 4.4.2)
+        punctuation = set(string.punctuation)
+        categories = {
+            "standalone_punct": [],
+            "single_char": [],
+            "very_long": [],
+            "trailing_punct": []
+        }
+        for term_id, term in enumerate(terms):
+            if not term_counts[term_id]:
+                continue
+            if term in punctuation:
+                categories["standalone_punct"].append(term_id)
+            elif len(term) == 1:
+                categories["single_char"].append(term_id)
+            if len(term) > 25:
+                categories["very_long"].append(term_id)
+            if len(term) > 1 and term[-1] in punctuation:
+                categories["trailing_punct"].append(term_id)
+        
+        def most_common(term_ids, n: int) -> List[Tuple[str, int]]:
+            # Ties keep first-seen order, like Counter.most_common
+            ids = np.asarray(term_ids, dtype=np.int64)
+            top = ids[top_k_indices(term_counts[ids], n)] if len(ids) else ids
+            return [(terms[i], int(term_counts[i])) for i in top.tolist()]
+        
+        doc_lengths = self.doc_lengths.astype(np.int64)
+        total_tokens = int(doc_lengths.sum())
+        unique_tokens = int(np.count_nonzero(term_counts))
+        
+        stats = {
+            'total_tokens': total_tokens,
+            'unique_tokens': unique_tokens,
+            'avg_tokens_per_chunk': total_tokens / len(doc_lengths),
+            'min_tokens_per_chunk': int(doc_lengths.min()),
+            'max_tokens_per_chunk': int(doc_lengths.max()),
+            'median_tokens_per_chunk': int(np.sort(doc_lengths)[len(doc_lengths) // 2]),
+            'top_20_tokens': most_common(range(len(terms)), 20)
+        }
+        example_limits = {"standalone_punct": 10, "single_char": 10, "very_long": 5, "trailing_punct": 10}
+        for name, term_ids in categories.items():
+            stats[f'{name}_count'] = len(term_ids)
+            stats[f'{name}_top'] = most_common(term_ids, example_limits[name])
+        return stats
+    
+    def log_token_stats(self):
+        """
+        Print token distribution statistics (Task 4.4.1).
         Includes corpus-level stats, top tokens, and suspicious token detection.
+        
+        Opt-in diagnostics: uses the stored token_stats (computing them if
+        the index was loaded without any).
         """
+        if 'standalone_punct_top' not in self.token_stats:
+            self.token_stats = self.compute_token_stats()
+        stats = self.token_stats
+        
         print(f"\n{'='*80}")
         print(f"📊 TOKEN DISTRIBUTION STATS (Task 4.4.1)")
         print(f"{'='*80}")
         
-        # Flatten all tokens
-        all_tokens = [token for doc_tokens in self.tokenized_corpus for token in doc_tokens]
-        token_counts = Counter(all_tokens)
-        
-        # Token counts per chunk
-        tokens_per_chunk = [len(doc_tokens) for doc_tokens in self.tokenized_corpus]
-        
         # Corpus-level stats
         print(f"\n📈 Corpus Stats:")
-        print(f"   Total tokens: {len(all_tokens):,}")
-        print(f"   Unique tokens (vocabulary): {len(token_counts):,}")
-        print(f"   Avg tokens/chunk: {len(all_tokens) / len(self.tokenized_corpus):.1f}")
-        print(f"   Min tokens/chunk: {min(tokens_per_chunk)}")
-        print(f"   Max tokens/chunk: {max(tokens_per_chunk)}")
-        print(f"   Median tokens/chunk: {sorted(tokens_per_chunk)[len(tokens_per_chunk)//2]}")
+        print(f"   Total tokens: {stats['total_tokens']:,}")
+        print(f"   Unique tokens (vocabulary): {stats['unique_tokens']:,}")
+        print(f"   Avg tokens/chunk: {stats['avg_tokens_per_chunk']:.1f}")
+        print(f"   Min tokens/chunk: {stats['min_tokens_per_chunk']}")
+        print(f"   Max tokens/chunk: {stats['max_tokens_per_chunk']}")
+        print(f"   Median tokens/chunk: {stats['median_tokens_per_chunk']}")
         
         # Top 20 most frequent tokens
         print(f"\n🔝 Top 20 Most Frequent Tokens:")
-        for i, (token, count) in enumerate(token_counts.most_common(20), 1):
+        for i, (token, count) in enumerate(stats['top_20_tokens'], 1):
             print(f"   {i:2d}. '{token}' → {count:,} occurrences")
         
         # Suspicious token detection (Task 4.4.2)
         print(f"\n⚠️  SUSPICIOUS TOKEN DETECTION (Task 4.4.2):")
         
         # 1. Standalone punctuation tokens
-        standalone_punct = {t: token_counts[t] for t in token_counts if t in string.punctuation}
-        print(f"\n   Standalone punctuation tokens: {len(standalone_punct)}")
-        if standalone_punct:
-            for token, count in sorted(standalone_punct.items(), key=lambda x: x[1], reverse=True)[:10]:
-                print(f"      '{token}' → {count} occurrences")
+        print(f"\n   Standalone punctuation tokens: {stats['standalone_punct_count']}")
+        for token, count in stats['standalone_punct_top']:
+            print(f"      '{token}' → {count} occurrences")
         
         # 2. Single-character tokens (excluding punctuation)
-        single_char = {t: token_counts[t] for t in token_counts if len(t) == 1 and t not in string.punctuation}
-        print(f"\n   Single-character tokens: {len(single_char)}")
-        if single_char:
-            for token, count in sorted(single_char.items(), key=lambda x: x[1], reverse=True)[:10]:
-                print(f"      '{token}' → {count} occurrences")
+        print(f"\n   Single-character tokens: {stats['single_char_count']}")
+        for token, count in stats['single_char_top']:
+            print(f"      '{token}' → {count} occurrences")
         
         # 3. Very long tokens (>25 chars)
-        very_long = {t: token_counts[t] for t in token_counts if len(t) > 25}
-        print(f"\n   Very long tokens (>25 chars): {len(very_long)}")
-        if very_long:
-            for token, count in sorted(very_long.items(), key=lambda x: x[1], reverse=True)[:5]:
-                print(f"      '{token[:30]}...' ({len(token)} chars) → {count} occurrences")
+        print(f"\n   Very long tokens (>25 chars): {stats['very_long_count']}")
+        for token, count in stats['very_long_top']:
+            print(f"      '{token[:30]}...' ({len(token)} chars) → {count} occurrences")
         
         # 4. Tokens with trailing punctuation
-        trailing_punct = {t: token_counts[t] for t in token_counts if t and len(t) > 1 and t[-1] in string.punctuation}
-        print(f"\n   Tokens with trailing punctuation: {len(trailing_punct)}")
-        if trailing_punct:
-            # Show top 10
-            for token, count in sorted(trailing_punct.items(), key=lambda x: x[1], reverse=True)[:10]:
-                print(f"      '{token}' → {count} occurrences")
+        print(f"\n   Tokens with trailing punctuation: {stats['trailing_punct_count']}")
+        for token, count in stats['trailing_punct_top']:
+            print(f"      '{token}' → {count} occurrences")
         
         print(f"\n{'='*80}")
-        
-        # Store stats for later access
-        self.token_stats = {
-            'total_tokens': len(all_tokens),
-            'unique_tokens': len(token_counts),
-            'avg_tokens_per_chunk': len(all_tokens) / len(self.tokenized_corpus),
-            'top_20_tokens': token_counts.most_common(20),
-            'standalone_punct_count': len(standalone_punct),
-            'single_char_count': len(single_char),
-            'very_long_count': len(very_long),
-            'trailing_punct_count': len(trailing_punct)
-        }
     
-    def search(self, query: str, top_k: int = 10) -> List[RetrievedChunk]:
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[RetrievedChunk]:
         """
         Perform BM25 search and return top-k results.
         
         Args:
             query: Search query text
             top_k: Number of results to return
+            filters: Optional metadata filter, e.g. {"drug_names": "warfarin"};
+                only matching chunks are scored (see filter_mask)
             
         Returns:
             List of RetrievedChunk objects, sorted by score (highest first)
         """
-        if self.bm25 is None:
-            raise ValueError("Index not built. Call build_index() first.")
+        return to_retrieved_chunks(self.search_views(query, top_k=top_k, filters=filters))
+    
+    def search_views(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[RetrievedChunkView]:
+        """
+        Same as search(), but results refer to self.chunks by index
+        instead of copying each chunk's text and metadata.
+        
+        Returns:
+            List of RetrievedChunkView objects, sorted by score (highest first)
+        """
+        index = self._published()
         
         # Handle empty query
         if not query or not query.strip():
             print("⚠️  Empty query provided, returning empty results")
             return []
         
-        # Tokenize query
-        query_tokens = self.tokenize(query)
+        # Score only documents that share a term with the query and match
+        # the filters, all against one published state (add/remove publish
+        # a new one instead of shifting doc ids under us)
+        term_ids, term_idfs = index._compile_query(query)
+        doc_mask = index.filter_mask(filters)
+        if self.dynamic_pruning:
+            doc_ids, scores = index._score_terms_pruned(term_ids, term_idfs, top_k, doc_mask)
+        else:
+            doc_ids, scores = index._score_terms(term_ids, term_idfs, doc_mask)
+        
+        return index._rank_results(doc_ids, scores, top_k, index.chunks)
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[RetrievedChunk]]:
+        """
+        Perform BM25 search for many queries with one sparse matrix product.
         
-        # Get BM25 scores for all documents
-        scores = self.bm25.get_scores(query_tokens)
+        All queries are tokenized into a (num_queries × vocab) matrix of
+        IDF weights (repeated terms summed) and multiplied with the
+        (vocab × chunks) matrix of per-posting BM25 term weights, which is
+        the postings arrays viewed as CSR. Each row of the product holds the
+        scores of the chunks matching that query.
         
-        # Get top-k indices (sorted by score, descending)
-        top_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k]
+        Scores equal search() up to floating-point summation order, so
+        results match except for exact near-ties.
+        
+        Args:
+            queries: Search query texts
+            top_k: Number of results to return per query
+            filters: Optional metadata filter applied to every query (see
+                filter_mask); non-matching chunks are dropped before top-k
+            
+        Returns:
+            One list of RetrievedChunk objects per query (empty for empty
+            queries), sorted by score (highest first)
+        """
+        index = self._published()
+        
+        if not queries:
+            return []
+        
+        # Query-term matrix entries (duplicate (query, term) pairs are summed)
+        compiled = [
+            index._compile_query(query) if query and query.strip()
+            else (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+            for query in queries
+        ]
+        rows = np.repeat(np.arange(len(queries)), [len(ids) for ids, _ in compiled])
+        cols = np.concatenate([ids for ids, _ in compiled])
+        weights = np.concatenate([idfs for _, idfs in compiled])
+        
+        term_weights = index._term_weight_matrix()
+        query_matrix = sp.csr_matrix(
+            (weights, (rows, cols)),
+            shape=(len(queries), term_weights.shape[0])
+        )
+        scores = (query_matrix @ term_weights).tocsr()
+        
+        scores.sort_indices()  # Ascending doc ids per row for tie-breaking
+        doc_mask = index.filter_mask(filters)
+        results = []
+        for query_idx in range(len(queries)):
+            start, end = scores.indptr[query_idx], scores.indptr[query_idx + 1]
+            doc_ids, doc_scores = scores.indices[start:end], scores.data[start:end]
+            if doc_mask is not None:
+                matching = doc_mask[doc_ids]
+                doc_ids, doc_scores = doc_ids[matching], doc_scores[matching]
+            results.append(to_retrieved_chunks(index._rank_results(
+                doc_ids, doc_scores, top_k, index.chunks
+            )))
+        return results
+    
+    def _term_weight_matrix(self) -> sp.csr_matrix:
+        """
+        Vocab × chunks CSR matrix of BM25 term weights (without IDF).
+        
+        Entry (t, d) = tf * (k1 + 1) / (tf + k1 * (1 - b + b * len_d / avgdl)).
+        Shares the postings layout (offsets = indptr, doc ids = indices);
+        built lazily and reset whenever the postings change.
+        """
+        if self._term_weights is None:
+            tf = self.postings_tfs.astype(np.int64)
+            weights = tf * (self.k1 + 1) / (tf + self._doc_norms[self.postings_doc_ids])
+            self._term_weights = sp.csr_matrix(
+                (weights, self.postings_doc_ids, self.postings_offsets),
+                shape=(len(self.vocab), len(self.doc_lengths))
+            )
+        return self._term_weights
+    
+    def _rank_results(
+        self,
+        doc_ids: np.ndarray,
+        scores: np.ndarray,
+        top_k: int,
+        chunks: Sequence[Chunk]
+    ) -> List[RetrievedChunkView]:
+        """
+        Select top-k positive scores, min-max normalize, and build result views.
+        
+        Args:
+            doc_ids: Candidate chunk indices (ascending)
+            scores: Raw BM25 scores aligned with doc_ids
+            top_k: Number of results to return
+            chunks: Chunk list the doc ids refer to
+            
+        Returns:
+            List of RetrievedChunkView objects, sorted by score (highest first)
+        """
+        if top_k <= 0:
+            return []
         
         # Filter out zero-score results
-        top_indices = [i for i in top_indices if scores[i] > 0]
+        positive = scores > 0
+        doc_ids, scores = doc_ids[positive], scores[positive]
         
-        if not top_indices:
+        if len(doc_ids) == 0:
             return []
         
+        # Partial top-k (doc_ids are ascending, so ties go to lower chunk index)
+        order = top_k_indices(scores, top_k)
+        top_indices = doc_ids[order].tolist()
+        
         # Normalize scores to [0, 1] range
-        top_scores = [scores[i] for i in top_indices]
+        top_scores = scores[order].tolist()
         min_score = min(top_scores)
         max_score = max(top_scores)
         
@@ -229,39 +1225,10 @@ class BM25Index:
         else:
             normalized_scores = [1.0] * len(top_scores)
         
-        # Convert to RetrievedChunk objects
-        retrieved_chunks = []
-        for rank, (idx, score) in enumerate(zip(top_indices, normalized_scores), start=1):
-            chunk = self.chunks[idx]
-            retrieved_chunk = self._chunk_to_retrieved_chunk(chunk, score, rank)
-            retrieved_chunks.append(retrieved_chunk)
-        
-        return retrieved_chunks
-    
-    def _chunk_to_retrieved_chunk(self, chunk: Chunk, score: float, rank: int) -> RetrievedChunk:
-        """
-        Convert Chunk object to RetrievedChunk with BM25 score.
-        
-        Args:
-            chunk: Original Chunk object
-            score: Normalized BM25 score (0-1)
-            rank: Result rank (1-indexed)
-            
-        Returns:
-            RetrievedChunk object
-        """
-        return RetrievedChunk(
-            chunk_id=chunk.id,
-            document_id=chunk.document_id,
-            text=chunk.text,
-            score=score,
-            rank=rank,
-            retriever_type="bm25",
-            authority_family=chunk.authority_family,
-            tier=chunk.tier,
-            year=chunk.year,
-            drug_names=chunk.drug_names
-        )
+        return [
+            RetrievedChunkView(chunks, idx, score, rank, "bm25")
+            for rank, (idx, score) in enumerate(zip(top_indices, normalized_scores), start=1)
+        ]
     
     def get_corpus_size(self) -> int:
         """
@@ -272,50 +1239,296 @@ class BM25Index:
         """
         return len(self.chunks)
     
-    def save_to_disk(self, filepath: str = "data/bm25_index.pkl"):
+    def save_to_disk(self, filepath: str = "data/bm25_index.bin", source_hash: Optional[str] = None):
         """
-        Save BM25 index to disk using pickle.
+        Save BM25 index to disk in the versioned binary format (see
+        binary_format): hyperparameters and corpus stats in the JSON header;
+        postings offsets/doc ids/tfs, doc lengths, IDF and the term
+        dictionary (UTF-8 blob + offsets) as arrays.
+        
+        Chunks are not stored; they are re-attached from chunks.json on load.
         
         Args:
-            filepath: Path to save pickle file
+            filepath: Path to save index file
+            source_hash: Content hash of the chunks.json this index was built
+                from (see hash_chunks_file); used to detect stale indexes
         """
+        if self.idf is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        
+        if source_hash is not None:
+            self.source_hash = source_hash
+        if not self.token_stats:
+            self.token_stats = self.compute_token_stats()
+        
         filepath = Path(filepath)
         filepath.parent.mkdir(parents=True, exist_ok=True)
         
         print(f"\nSaving BM25 index to {filepath}...")
-        with open(filepath, 'wb') as f:
-            pickle.dump(self, f)
+        
+        # Term dictionary in term-id order
+        terms = [""] * len(self.vocab)
+        for term, term_id in self.vocab.items():
+            terms[term_id] = term
+        term_offsets, term_blob = encode_strings(terms)
+        
+        arrays = {
+            "postings_offsets": self.postings_offsets.astype(np.int64, copy=False),
+            "postings_doc_ids": self.postings_doc_ids.astype(np.int32, copy=False),
+            "postings_tfs": self.postings_tfs.astype(np.int32, copy=False),
+            "doc_lengths": self.doc_lengths.astype(np.int32, copy=False),
+            "idf": self.idf.astype(np.float64, copy=False),
+            "term_offsets": term_offsets,
+            "term_blob": term_blob,
+        }
+        
+        header = {
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "avgdl": self.avgdl,
+            "average_idf": self.average_idf,
+            "corpus_size": int(len(self.doc_lengths)),
+            "vocab_size": len(self.vocab),
+            "num_postings": int(len(self.postings_doc_ids)),
+            "source_hash": self.source_hash,
+            "token_stats": self.token_stats,
+        }
+        binary_format.write_file(
+            filepath, BM25_INDEX_MAGIC, BM25_INDEX_FORMAT_VERSION, header, arrays
+        )
         
         file_size = filepath.stat().st_size / (1024 * 1024)  # MB
-        print(f"✅ BM25 index saved ({file_size:.2f} MB)")
+        print(f"✅ BM25 index saved ({file_size:.2f} MB, format v{BM25_INDEX_FORMAT_VERSION})")
     
     @staticmethod
-    def load_from_disk(filepath: str = "data/bm25_index.pkl") -> 'BM25Index':
+    def load_from_disk(
+        filepath: str = "data/bm25_index.bin",
+        chunks_json_path: str = "data/processed/chunks.json",
+        chunks: Optional[Sequence[Chunk]] = None,
+        query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE
+    ) -> 'BM25Index':
         """
-        Load BM25 index from disk.
+        Open a binary BM25 index with mmap.
+        
+        Postings, doc lengths and IDF are zero-copy read-only views over the
+        mapped file, so several API workers share one page-cached copy. Only
+        the term dictionary is decoded into a Python dict.
         
         Args:
-            filepath: Path to pickle file
+            filepath: Path to index file written by save_to_disk()
+            chunks_json_path: chunks.json to re-attach chunk objects from
+            chunks: Already loaded chunks or a shared ChunkStore (skips
+                reading chunks_json_path)
+            query_cache_size: Compiled queries kept in the LRU cache
             
         Returns:
             BM25Index object
+            
+        Raises:
+            ValueError: If the file is not a BM25 index, has an unsupported
+                format version, or does not match the chunk count
         """
         print(f"\nLoading BM25 index from {filepath}...")
-        with open(filepath, 'rb') as f:
-            index = pickle.load(f)
+        start_time = time.time()
         
-        print(f"✅ BM25 index loaded")
+        header, arrays, mm = binary_format.map_file(
+            filepath, BM25_INDEX_MAGIC, BM25_INDEX_FORMAT_VERSION, "BM25 index"
+        )
+        
+        index = BM25Index(
+            k1=header["k1"],
+            b=header["b"],
+            epsilon=header["epsilon"],
+            query_cache_size=query_cache_size
+        )
+        index._mmap = mm
+        index.postings_offsets = arrays["postings_offsets"]
+        index.postings_doc_ids = arrays["postings_doc_ids"]
+        index.postings_tfs = arrays["postings_tfs"]
+        index.doc_lengths = arrays["doc_lengths"]
+        index.idf = arrays["idf"]
+        index.avgdl = header["avgdl"]
+        index.average_idf = header["average_idf"]
+        index.token_stats = header.get("token_stats", {})
+        index.source_hash = header.get("source_hash")
+        index._doc_norms = index.k1 * (
+            1 - index.b + index.b * index.doc_lengths.astype(np.int64) / index.avgdl
+        )
+        
+        term_offsets = arrays["term_offsets"].tolist()
+        term_blob = arrays["term_blob"].tobytes()
+        index.vocab = {
+            term_blob[term_offsets[i]:term_offsets[i + 1]].decode("utf-8"): i
+            for i in range(header["vocab_size"])
+        }
+        
+        # Re-attach chunk objects (not stored in the index file)
+        if chunks is None:
+            chunks = index.load_chunks(chunks_json_path)
+        if len(chunks) != header["corpus_size"]:
+            raise ValueError(
+                f"BM25 index has {header['corpus_size']} chunks but "
+                f"{len(chunks)} were provided; rebuild the index"
+            )
+        index.chunks = chunks
+        index._build_filter_masks()
+        index._publish(index._staged_copy())
+        
+        elapsed = time.time() - start_time
+        print(f"✅ BM25 index loaded in {elapsed:.2f}s (mmap, format v{BM25_INDEX_FORMAT_VERSION})")
         print(f"   Corpus size: {index.get_corpus_size()} chunks")
-        print(f"   Vocabulary: {index.token_stats.get('unique_tokens', 'N/A'):,} unique tokens")
+        print(f"   Vocabulary: {len(index.vocab):,} unique tokens")
+        print(f"   Postings: {header['num_postings']:,}")
         return index
+    
+    @staticmethod
+    def read_header(filepath: str = "data/bm25_index.bin") -> dict:
+        """
+        Read only the JSON header of a binary index (no arrays are mapped).
+        
+        Args:
+            filepath: Path to index file
+            
+        Returns:
+            Header dict (hyperparameters, corpus stats, source_hash, ...)
+            
+        Raises:
+            ValueError: If the file is not a BM25 index or has an
+                unsupported format version
+        """
+        return binary_format.read_header(
+            filepath, BM25_INDEX_MAGIC, BM25_INDEX_FORMAT_VERSION, "BM25 index"
+        )
+    
+    @staticmethod
+    def hash_chunks_file(chunks_json_path: str = "data/processed/chunks.json") -> str:
+        """
+        Content hash (sha256) of chunks.json, used to detect stale indexes.
+        
+        Args:
+            chunks_json_path: Path to chunks.json
+            
+        Returns:
+            Hex digest string
+        """
+        return hash_chunks_file(chunks_json_path)
+    
+    @staticmethod
+    def load_or_build(
+        filepath: str = "data/bm25_index.bin",
+        chunks_json_path: str = "data/processed/chunks.json",
+        chunks: Optional[Sequence[Chunk]] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+        query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE
+    ) -> Tuple['BM25Index', bool]:
+        """
+        Load the persisted index if it was built from the current chunks.json,
+        otherwise rebuild it and save it for the next start-up.
+        
+        The index is reused only when the stored source_hash matches the
+        sha256 of chunks_json_path and k1/b/epsilon are unchanged.
+        
+        Args:
+            filepath: Path to index file
+            chunks_json_path: Path to chunks.json (hashed, and loaded if
+                chunks is None)
+            chunks: Already loaded chunks or a shared ChunkStore to attach / index
+            k1: Term frequency saturation parameter for a rebuild
+            b: Length normalization parameter for a rebuild
+            epsilon: IDF floor factor for a rebuild
+            query_cache_size: Compiled queries kept in the LRU cache
+            
+        Returns:
+            Tuple of (BM25Index, rebuilt) where rebuilt is True if the index
+            had to be built from chunks
+        """
+        source_hash = BM25Index.hash_chunks_file(chunks_json_path)
+        
+        if Path(filepath).exists():
+            try:
+                header = BM25Index.read_header(filepath)
+            except ValueError as e:
+                print(f"⚠️  Ignoring unreadable BM25 index: {e}")
+            else:
+                if (header.get("source_hash") == source_hash
+                        and header["k1"] == k1 and header["b"] == b
+                        and header["epsilon"] == epsilon):
+                    index = BM25Index.load_from_disk(
+                        filepath, chunks_json_path, chunks, query_cache_size
+                    )
+                    return index, False
+                print(f"⚠️  BM25 index at {filepath} is stale (chunks.json or k1/b/epsilon changed), rebuilding")
+        
+        index = BM25Index(k1=k1, b=b, epsilon=epsilon, query_cache_size=query_cache_size)
+        if chunks is None:
+            index.load_chunks(chunks_json_path)
+        else:
+            index.chunks = chunks
+        index.build_index()
+        index.save_to_disk(filepath, source_hash=source_hash)
+        return index, True
+
+
+# (terms in first-seen order, term ids, doc ids, tfs, doc lengths) for one shard
+_Shard = Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _count_shard(texts: List[str]) -> _Shard:
+    """
+    Tokenize a slice of chunk texts and count term frequencies.
+    
+    Module-level so it can run in ProcessPoolExecutor workers. Ids are
+    local to the shard (doc ids start at 0, terms numbered by first
+    occurrence); BM25Index._build_postings maps them to global ids.
+    
+    Args:
+        texts: Chunk texts, in chunk order
+        
+    Returns:
+        Shard tuple of term list and int32 arrays
+    """
+    vocab: Dict[str, int] = {}
+    term_ids: List[int] = []
+    doc_ids: List[int] = []
+    tfs: List[int] = []
+    doc_lengths: List[int] = []
+    
+    for doc_id, text in enumerate(texts):
+        tokens = BM25Index.tokenize(text)
+        doc_lengths.append(len(tokens))
+        for token, tf in Counter(tokens).items():
+            term_id = vocab.get(token)
+            if term_id is None:
+                term_id = len(vocab)
+                vocab[token] = term_id
+            term_ids.append(term_id)
+            doc_ids.append(doc_id)
+            tfs.append(tf)
+    
+    return (
+        list(vocab),
+        np.asarray(term_ids, dtype=np.int32),
+        np.asarray(doc_ids, dtype=np.int32),
+        np.asarray(tfs, dtype=np.int32),
+        np.asarray(doc_lengths, dtype=np.int32)
+    )
+
+
+def _kth_largest(values: np.ndarray, k: int) -> float:
+    """k-th largest value (0.0 if there are fewer than k values)."""
+    if len(values) < k:
+        return 0.0
+    return float(np.partition(values, len(values) - k)[len(values) - k])
+
 
 
 # Example usage and testing
 if __name__ == "__main__":
-    import os
-    
     # Check if index already exists
-    index_path = "data/bm25_index.pkl"
+    index_path = "data/bm25_index.bin"
     
     if os.path.exists(index_path):
         print(f"Found existing index at {index_path}")
@@ -328,13 +1541,13 @@ if __name__ == "__main__":
             # Build fresh
             bm25_index = BM25Index(k1=1.5, b=0.75)
             chunks = bm25_index.load_chunks("data/processed/chunks.json")
-            bm25_index.build_index()
+            bm25_index.build_index(diagnostics=True)
             bm25_index.save_to_disk(index_path)
     else:
         # Build fresh
         bm25_index = BM25Index(k1=1.5, b=0.75)
         chunks = bm25_index.load_chunks("data/processed/chunks.json")
-        bm25_index.build_index()
+        bm25_index.build_index(diagnostics=True)
         bm25_index.save_to_disk(index_path)
     
     # Test queries
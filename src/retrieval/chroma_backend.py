@@ -0,0 +1,224 @@
+"""
+ChromaDB backend for VectorStore
+Persistent HNSW collection (cosine space) that also keeps chunk text and
+metadata, so it can serve results without a chunk store
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import chromadb
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.models.schemas import Chunk
+from src.retrieval.chunk_store import FILTER_KEYS
+from src.retrieval.vector_backend import VectorBackend
+
+# Chroma metadata values must be scalars, so each drug gets its own
+# boolean key ("drug:warfarin": True) that `where` clauses can match
+DRUG_KEY_PREFIX = "drug:"
+
+# Bumped when the metadata layout changes; stored on every chunk so
+# VectorStore.ensure_filter_metadata() can upgrade older collections
+METADATA_SCHEMA_KEY = "metadata_schema"
+METADATA_SCHEMA_VERSION = 2
+
+# Max ids per collection.update() / collection.get() call
+UPDATE_BATCH_SIZE = 5000
+
+
+def chunk_metadata(chunk: Chunk) -> Dict[str, Any]:
+    """
+    Chroma metadata for a chunk (ChromaDB doesn't support None or lists).
+
+    drug_names is kept as a JSON string for display; the per-drug keys are
+    what filters match on.
+    """
+    metadata = {
+        "chunk_id": chunk.id,
+        "document_id": chunk.document_id,
+        "authority_family": chunk.authority_family,
+        "tier": chunk.tier,
+        "year": chunk.year if chunk.year else 0,  # ChromaDB doesn't support None
+        "drug_names": json.dumps(chunk.drug_names),  # ✅ Serialize to JSON string
+        METADATA_SCHEMA_KEY: METADATA_SCHEMA_VERSION
+    }
+    for drug in chunk.drug_names:
+        metadata[DRUG_KEY_PREFIX + drug] = True
+    return metadata
+
+
+def where_clause(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Translate a retriever metadata filter into a Chroma `where` clause.
+
+    Fields are ANDed and lists of values ORed, as in BM25 filtering;
+    year_min/year_max exclude chunks without a year (stored as 0).
+
+    Args:
+        filters: Key (chunk_store.FILTER_KEYS) -> value or list of values
+
+    Returns:
+        `where` dict, or None if filters is empty
+
+    Raises:
+        ValueError: If a key is not one of FILTER_KEYS
+    """
+    if not filters:
+        return None
+
+    clauses = []
+    for field, values in filters.items():
+        if field not in FILTER_KEYS:
+            raise ValueError(f"Unsupported filter '{field}' (expected one of {FILTER_KEYS})")
+        if field == "year_min":
+            clauses.append({"year": {"$gte": max(int(values), 1)}})
+            continue
+        if field == "year_max":
+            clauses.extend([{"year": {"$gte": 1}}, {"year": {"$lte": int(values)}}])
+            continue
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        values = list(values)
+        if not values:
+            # An empty value list matches nothing, as in BM25 filtering
+            clauses.append({"chunk_id": ""})
+        elif field == "drug_names":
+            options = [{DRUG_KEY_PREFIX + drug: True} for drug in values]
+            clauses.append(options[0] if len(options) == 1 else {"$or": options})
+        elif len(values) == 1:
+            clauses.append({field: values[0]})
+        else:
+            clauses.append({field: {"$in": values}})
+
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class ChromaBackend(VectorBackend):
+    """VectorBackend over a persistent ChromaDB collection."""
+
+    name = "chroma"
+    stores_payload = True
+
+    def __init__(
+        self,
+        persist_directory: str = "data/chromadb",
+        collection_name: str = "drug_chunks"
+    ):
+        """
+        Initialize the ChromaDB client (the collection is opened by open()).
+
+        Args:
+            persist_directory: Path to store ChromaDB data
+            collection_name: Name of ChromaDB collection
+        """
+        self.persist_directory = Path(persist_directory)
+        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        self.collection_name = collection_name
+
+        # Initialize ChromaDB client (persistent)
+        print(f"Initializing ChromaDB at {self.persist_directory}...")
+        self.client = chromadb.PersistentClient(path=str(self.persist_directory))
+        self.collection = None
+
+    def open(self, reset: bool = False):
+        """
+        Create or load the collection with cosine similarity.
+
+        Args:
+            reset: If True, delete existing collection and create new
+        """
+        if reset:
+            try:
+                self.client.delete_collection(name=self.collection_name)
+                print(f"🗑️  Deleted existing collection: {self.collection_name}")
+            except:
+                pass
+
+        # Create collection with cosine similarity metric
+        self.collection = self.client.get_or_create_collection(
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"}  # Explicitly set cosine similarity
+        )
+
+        count = self.collection.count()
+        print(f"✅ Collection '{self.collection_name}' ready (current count: {count})")
+
+    @property
+    def is_open(self) -> bool:
+        return self.collection is not None
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        self.collection.add(
+            ids=ids,
+            embeddings=embeddings,
+            documents=documents,
+            metadatas=metadatas
+        )
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[List[Any]]]:
+        return self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=top_k,
+            where=where_clause(filters),
+            include=["distances"]
+        )
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        found = set()
+        for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+            found.update(self.collection.get(ids=ids[start:start + UPDATE_BATCH_SIZE], include=[])["ids"])
+        return found
+
+    def get_payloads(self, ids: List[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        results = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        return {
+            chunk_id: (text, metadata)
+            for chunk_id, text, metadata in zip(
+                results["ids"], results["documents"], results["metadatas"]
+            )
+        }
+
+    def outdated_metadata_ids(self) -> List[str]:
+        # Ids only: chunks at METADATA_SCHEMA_VERSION, then (if some are
+        # missing) every id; documents and metadata are never read
+        current = set(self._ids(where={METADATA_SCHEMA_KEY: METADATA_SCHEMA_VERSION}))
+        if len(current) == self.count():
+            return []
+        return [chunk_id for chunk_id in self._ids() if chunk_id not in current]
+
+    def _ids(self, where: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Stored ids (optionally matching a `where` clause), read in pages."""
+        ids = []
+        while True:
+            page = self.collection.get(
+                where=where, limit=UPDATE_BATCH_SIZE, offset=len(ids), include=[]
+            )["ids"]
+            ids.extend(page)
+            if len(page) < UPDATE_BATCH_SIZE:
+                return ids
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+            self.collection.update(
+                ids=ids[start:start + UPDATE_BATCH_SIZE],
+                metadatas=metadatas[start:start + UPDATE_BATCH_SIZE]
+            )
+
+    def count(self) -> int:
+        if self.collection is None:
+            return 0
+        return self.collection.count()
@@ -0,0 +1,448 @@
+"""
+Columnar, read-only chunk store shared by the retrievers
+Holds every chunk once: ids/text as UTF-8 blobs + offsets, metadata as
+integer codes into small string tables
+
+The store is saved in a versioned binary file and opened with mmap, so the
+text blob lives in the page cache (shared by all API workers) instead of
+being copied into every BM25Index / VectorStore as Python strings.
+Retrievers refer to chunks by integer index and materialize Chunk objects
+only for the results they return.
+"""
+
+import hashlib
+import json
+import mmap
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.models.schemas import Chunk
+from src.retrieval import binary_format
+from src.retrieval.binary_format import encode_strings
+
+
+# On-disk format (see ChunkStore.save)
+CHUNK_STORE_MAGIC = b"EBRCHNK\0"
+CHUNK_STORE_FORMAT_VERSION = 1
+
+# Chunk fields with per-value masks (same keys as BM25 search filters)
+MASK_FIELDS = ("drug_names", "authority_family", "tier")
+
+# Metadata filter keys accepted by the retrievers: MASK_FIELDS (value or
+# list of values) plus an inclusive year range
+YEAR_RANGE_FIELDS = ("year_min", "year_max")
+FILTER_KEYS = MASK_FIELDS + YEAR_RANGE_FIELDS
+
+
+def hash_chunks_file(chunks_json_path: str = "data/processed/chunks.json") -> str:
+    """
+    Content hash (sha256) of chunks.json, used to detect stale files.
+
+    Args:
+        chunks_json_path: Path to chunks.json
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    with open(chunks_json_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChunkStore(Sequence):
+    """
+    Array-backed, read-only sequence of chunks.
+
+    Columns (one row per chunk, in chunks.json order):
+    - id_offsets / id_blob, text_offsets / text_blob: UTF-8 strings
+    - document_codes, section_codes (-1 = None), authority_codes: indexes
+      into the documents / sections / authorities tables
+    - token_counts, chunk_indexes, tiers, years (-1 = None)
+    - drug_offsets / drug_codes: drug names per chunk (CSR) into drugs
+
+    store[i] returns a freshly built Chunk; text(i), chunk_id(i) and
+    index_of(chunk_id) avoid building one.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], tables: Dict[str, List[Any]]):
+        """
+        Wrap prebuilt columns (use from_chunks() or load()).
+
+        Args:
+            arrays: Column name -> numpy array
+            tables: documents / sections / authorities / drugs string tables
+        """
+        self.id_offsets = arrays["id_offsets"]
+        self.id_blob = arrays["id_blob"]
+        self.text_offsets = arrays["text_offsets"]
+        self.text_blob = arrays["text_blob"]
+        self.document_codes = arrays["document_codes"]
+        self.section_codes = arrays["section_codes"]
+        self.authority_codes = arrays["authority_codes"]
+        self.token_counts = arrays["token_counts"]
+        self.chunk_indexes = arrays["chunk_indexes"]
+        self.tiers = arrays["tiers"]
+        self.years = arrays["years"]
+        self.drug_offsets = arrays["drug_offsets"]
+        self.drug_codes = arrays["drug_codes"]
+
+        self.documents: List[str] = tables["documents"]
+        self.sections: List[str] = tables["sections"]
+        self.authorities: List[str] = tables["authorities"]
+        self.drugs: List[str] = tables["drugs"]
+
+        self.source_hash: Optional[str] = None  # sha256 of the chunks.json stored
+        self._mmap: Optional[mmap.mmap] = None  # Backing file when loaded from disk
+        self._id_to_index: Optional[Dict[str, int]] = None  # Lazy
+        self._filter_masks: Optional[Dict[str, Dict[Any, np.ndarray]]] = None  # Lazy
+
+    @staticmethod
+    def from_chunks(chunks: List[Chunk]) -> 'ChunkStore':
+        """
+        Build an in-memory store from Chunk objects.
+
+        Args:
+            chunks: Chunks in index order
+
+        Returns:
+            ChunkStore object
+        """
+        tables: Dict[str, Dict[Any, int]] = {
+            "documents": {}, "sections": {}, "authorities": {}, "drugs": {}
+        }
+
+        def code(table: str, value) -> int:
+            return tables[table].setdefault(value, len(tables[table]))
+
+        drug_counts = []
+        drug_codes = []
+        for chunk in chunks:
+            drug_counts.append(len(chunk.drug_names))
+            drug_codes.extend(code("drugs", name) for name in chunk.drug_names)
+
+        id_offsets, id_blob = encode_strings([chunk.id for chunk in chunks])
+        text_offsets, text_blob = encode_strings([chunk.text for chunk in chunks])
+        drug_offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum(drug_counts, out=drug_offsets[1:])
+
+        arrays = {
+            "id_offsets": id_offsets,
+            "id_blob": id_blob,
+            "text_offsets": text_offsets,
+            "text_blob": text_blob,
+            "document_codes": np.array(
+                [code("documents", c.document_id) for c in chunks], dtype=np.int32
+            ),
+            "section_codes": np.array(
+                [-1 if c.section is None else code("sections", c.section) for c in chunks],
+                dtype=np.int32
+            ),
+            "authority_codes": np.array(
+                [code("authorities", c.authority_family) for c in chunks], dtype=np.int32
+            ),
+            "token_counts": np.array([c.token_count for c in chunks], dtype=np.int32),
+            "chunk_indexes": np.array([c.chunk_index for c in chunks], dtype=np.int32),
+            "tiers": np.array([c.tier for c in chunks], dtype=np.int32),
+            "years": np.array([-1 if c.year is None else c.year for c in chunks], dtype=np.int32),
+            "drug_offsets": drug_offsets,
+            "drug_codes": np.array(drug_codes, dtype=np.int32),
+        }
+        return ChunkStore(arrays, {name: list(values) for name, values in tables.items()})
+
+    def __len__(self) -> int:
+        return len(self.document_codes)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Chunk, List[Chunk]]:
+        """Chunk at index (built on access), or a list of chunks for a slice."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chunk index out of range")
+
+        section_code = int(self.section_codes[index])
+        year = int(self.years[index])
+        return Chunk(
+            id=self.chunk_id(index),
+            document_id=self.documents[self.document_codes[index]],
+            text=self.text(index),
+            token_count=int(self.token_counts[index]),
+            chunk_index=int(self.chunk_indexes[index]),
+            section=None if section_code < 0 else self.sections[section_code],
+            authority_family=self.authorities[self.authority_codes[index]],
+            tier=int(self.tiers[index]),
+            year=None if year < 0 else year,
+            drug_names=self.drug_names(index)
+        )
+
+    def chunk_id(self, index: int) -> str:
+        """Chunk id string of chunk index."""
+        start, end = self.id_offsets[index], self.id_offsets[index + 1]
+        return bytes(self.id_blob[start:end]).decode("utf-8")
+
+    def text(self, index: int) -> str:
+        """Text of chunk index (decoded from the text blob)."""
+        start, end = self.text_offsets[index], self.text_offsets[index + 1]
+        return bytes(self.text_blob[start:end]).decode("utf-8")
+
+    def drug_names(self, index: int) -> List[str]:
+        """Drug names of chunk index."""
+        start, end = self.drug_offsets[index], self.drug_offsets[index + 1]
+        return [self.drugs[code] for code in self.drug_codes[start:end].tolist()]
+
+    def document_id(self, index: int) -> str:
+        """Document id of chunk index."""
+        return self.documents[self.document_codes[index]]
+
+    def index_of(self, chunk_id: str) -> Optional[int]:
+        """
+        Integer index of a chunk id (e.g. from a Chroma result).
+
+        Args:
+            chunk_id: Chunk id string
+
+        Returns:
+            Chunk index, or None if the id is not in the store
+        """
+        if self._id_to_index is None:
+            ids = bytes(self.id_blob).decode("utf-8")
+            offsets = self.id_offsets.tolist()
+            # Ids are ASCII in practice; fall back to per-id decoding otherwise
+            if len(ids) == len(self.id_blob):
+                self._id_to_index = {
+                    ids[offsets[i]:offsets[i + 1]]: i for i in range(len(self))
+                }
+            else:
+                self._id_to_index = {self.chunk_id(i): i for i in range(len(self))}
+        return self._id_to_index.get(chunk_id)
+
+    def filter_masks(self) -> Dict[str, Dict[Any, np.ndarray]]:
+        """
+        Boolean chunk mask per drug, authority family and tier value.
+
+        Computed from the metadata codes, without building Chunk objects.
+
+        Returns:
+            Field (MASK_FIELDS) -> value -> boolean mask over chunks
+        """
+        masks: Dict[str, Dict[Any, np.ndarray]] = {field: {} for field in MASK_FIELDS}
+
+        drug_rows = np.repeat(np.arange(len(self)), np.diff(self.drug_offsets))
+        for code, drug in enumerate(self.drugs):
+            mask = np.zeros(len(self), dtype=bool)
+            mask[drug_rows[self.drug_codes == code]] = True
+            masks["drug_names"][drug] = mask
+        for code, authority in enumerate(self.authorities):
+            masks["authority_family"][authority] = self.authority_codes == code
+        for tier in np.unique(self.tiers).tolist():
+            masks["tier"][tier] = self.tiers == tier
+        return masks
+
+    def filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Boolean chunk mask for a metadata filter (see combine_filter_masks).
+
+        Raises:
+            ValueError: If a key is not one of FILTER_KEYS
+        """
+        if not filters:
+            return None
+        if self._filter_masks is None:
+            self._filter_masks = self.filter_masks()
+        return combine_filter_masks(filters, self._filter_masks, self.years)
+
+    def nbytes(self) -> int:
+        """Total size of the column arrays (mmap-backed when loaded from disk)."""
+        return sum(
+            array.nbytes for array in (
+                self.id_offsets, self.id_blob, self.text_offsets, self.text_blob,
+                self.document_codes, self.section_codes, self.authority_codes,
+                self.token_counts, self.chunk_indexes, self.tiers, self.years,
+                self.drug_offsets, self.drug_codes
+            )
+        )
+
+    def save(self, filepath: str = "data/chunk_store.bin", source_hash: Optional[str] = None):
+        """
+        Save the store in the versioned binary format (see binary_format),
+        with the string tables in the JSON header.
+
+        Args:
+            filepath: Path to save the store
+            source_hash: Content hash of the chunks.json the store was built
+                from (see hash_chunks_file)
+        """
+        if source_hash is not None:
+            self.source_hash = source_hash
+
+        filepath = Path(filepath)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        arrays = {
+            "id_offsets": self.id_offsets,
+            "id_blob": self.id_blob,
+            "text_offsets": self.text_offsets,
+            "text_blob": self.text_blob,
+            "document_codes": self.document_codes,
+            "section_codes": self.section_codes,
+            "authority_codes": self.authority_codes,
+            "token_counts": self.token_counts,
+            "chunk_indexes": self.chunk_indexes,
+            "tiers": self.tiers,
+            "years": self.years,
+            "drug_offsets": self.drug_offsets,
+            "drug_codes": self.drug_codes,
+        }
+
+        header = {
+            "num_chunks": len(self),
+            "source_hash": self.source_hash,
+            "tables": {
+                "documents": self.documents,
+                "sections": self.sections,
+                "authorities": self.authorities,
+                "drugs": self.drugs,
+            },
+        }
+        binary_format.write_file(
+            filepath, CHUNK_STORE_MAGIC, CHUNK_STORE_FORMAT_VERSION, header, arrays
+        )
+
+        file_size = filepath.stat().st_size / (1024 * 1024)  # MB
+        print(f"✅ Chunk store saved to {filepath} ({file_size:.2f} MB)")
+
+    @staticmethod
+    def load(filepath: str = "data/chunk_store.bin") -> 'ChunkStore':
+        """
+        Open a saved store with mmap (columns are zero-copy read-only views).
+
+        Args:
+            filepath: Path to a file written by save()
+
+        Returns:
+            ChunkStore object
+
+        Raises:
+            ValueError: If the file is not a chunk store or has an
+                unsupported format version
+        """
+        header, arrays, mm = binary_format.map_file(
+            filepath, CHUNK_STORE_MAGIC, CHUNK_STORE_FORMAT_VERSION, "chunk store"
+        )
+        store = ChunkStore(arrays, header["tables"])
+        store.source_hash = header.get("source_hash")
+        store._mmap = mm
+        return store
+
+    @staticmethod
+    def read_header(filepath: str = "data/chunk_store.bin") -> dict:
+        """
+        Read only the JSON header of a saved store.
+
+        Raises:
+            ValueError: If the file is not a chunk store or has an
+                unsupported format version
+        """
+        return binary_format.read_header(
+            filepath, CHUNK_STORE_MAGIC, CHUNK_STORE_FORMAT_VERSION, "chunk store"
+        )
+
+    @staticmethod
+    def load_or_build(
+        filepath: str = "data/chunk_store.bin",
+        chunks_json_path: str = "data/processed/chunks.json"
+    ) -> Tuple['ChunkStore', bool]:
+        """
+        Open the saved store if it was built from the current chunks.json,
+        otherwise build it from chunks.json and save it.
+
+        Args:
+            filepath: Path to the store file
+            chunks_json_path: Path to chunks.json
+
+        Returns:
+            Tuple of (ChunkStore, rebuilt)
+        """
+        start_time = time.time()
+        source_hash = hash_chunks_file(chunks_json_path)
+
+        if Path(filepath).exists():
+            try:
+                header = ChunkStore.read_header(filepath)
+            except ValueError as e:
+                print(f"⚠️  Ignoring unreadable chunk store: {e}")
+            else:
+                if header.get("source_hash") == source_hash:
+                    store = ChunkStore.load(filepath)
+                    elapsed = time.time() - start_time
+                    print(f"✅ Chunk store loaded in {elapsed:.2f}s (mmap, {len(store)} chunks)")
+                    return store, False
+                print(f"⚠️  Chunk store at {filepath} is stale (chunks.json changed), rebuilding")
+
+        print(f"\nBuilding chunk store from {chunks_json_path}...")
+        with open(chunks_json_path, 'r', encoding='utf-8') as f:
+            chunks = [Chunk(**chunk_data) for chunk_data in json.load(f)]
+        ChunkStore.from_chunks(chunks).save(filepath, source_hash=source_hash)
+
+        # Reopen so the columns are mmap-backed like a normal start-up
+        store = ChunkStore.load(filepath)
+        elapsed = time.time() - start_time
+        print(f"✅ Chunk store built in {elapsed:.2f}s ({len(store)} chunks)")
+        return store, True
+
+
+def combine_filter_masks(
+    filters: Optional[Dict[str, Any]],
+    masks: Dict[str, Dict[Any, np.ndarray]],
+    years: np.ndarray
+) -> Optional[np.ndarray]:
+    """
+    Combine per-value masks and a year range into one chunk mask.
+
+    Fields are ANDed; a list of values for one field is ORed, e.g.
+    {"drug_names": "warfarin", "tier": [1, 2], "year_min": 2020}. Unknown
+    values match no chunks; chunks without a year never match a year range.
+
+    Args:
+        filters: Key (FILTER_KEYS) -> value or list of values
+        masks: Field (MASK_FIELDS) -> value -> boolean mask over chunks
+        years: Year per chunk (-1 = None)
+
+    Returns:
+        Boolean mask over chunks, or None if filters is empty
+
+    Raises:
+        ValueError: If a key is not one of FILTER_KEYS
+    """
+    if not filters:
+        return None
+
+    combined = np.ones(len(years), dtype=bool)
+    for field, values in filters.items():
+        if field not in FILTER_KEYS:
+            raise ValueError(f"Unsupported filter '{field}' (expected one of {FILTER_KEYS})")
+        if field == "year_min":
+            combined &= (years >= 0) & (years >= values)
+            continue
+        if field == "year_max":
+            combined &= (years >= 0) & (years <= values)
+            continue
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        field_mask = np.zeros(len(years), dtype=bool)
+        for value in values:
+            value_mask = masks[field].get(value)
+            if value_mask is not None:
+                field_mask |= value_mask
+        combined &= field_mask
+    return combined
+
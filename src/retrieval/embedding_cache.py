@@ -0,0 +1,326 @@
+"""
+Embedding caches for the vector retriever
+Query embeddings: in-memory LRU tier backed by an optional sqlite tier
+that survives restarts. Chunk embeddings: content-addressed sqlite store,
+so re-indexing only encodes chunks whose text changed
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.retrieval.lru_cache import LRUCache
+
+DEFAULT_QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+# Keys per SELECT ... IN (...) (below SQLite's bound-parameter limit)
+_SQLITE_LOOKUP_BATCH = 900
+
+
+class QueryEmbeddingCache:
+    """
+    Cache of query embeddings keyed on (model name, normalized query).
+
+    Lookups go to the in-memory LRU first, then to the sqlite file (if a
+    path is given); disk hits are promoted into memory. Embeddings are
+    stored as float32, the dtype the model produces, so cached vectors
+    are identical to freshly encoded ones.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        maxsize: int = DEFAULT_QUERY_EMBEDDING_CACHE_SIZE,
+        path: Optional[str] = None
+    ):
+        """
+        Initialize the cache, creating the sqlite file if needed.
+
+        Args:
+            model_name: Embedding model the vectors come from (part of the key)
+            maxsize: Entries kept in memory (0 disables the memory tier)
+            path: sqlite file for the disk tier, or None for memory only
+        """
+        self.model_name = model_name
+        self.memory = LRUCache(maxsize)
+        self.path = path
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "model TEXT NOT NULL, query TEXT NOT NULL, embedding BLOB NOT NULL, "
+                "PRIMARY KEY (model, query))"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """
+        Cache key for a query: surrounding whitespace stripped and inner
+        runs collapsed to one space (the tokenizer ignores both).
+        """
+        return " ".join(query.split())
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """
+        Look up a query embedding.
+
+        Args:
+            query: Query text (normalized internally)
+
+        Returns:
+            Read-only float32 embedding, or None on a miss
+        """
+        key = self.normalize(query)
+        embedding = self.memory.get((self.model_name, key))
+        if embedding is not None or self._db is None:
+            return embedding
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT embedding FROM query_embeddings WHERE model = ? AND query = ?",
+                (self.model_name, key)
+            ).fetchone()
+            if row is None:
+                self.disk_misses += 1
+                return None
+            self.disk_hits += 1
+
+        embedding = np.frombuffer(row[0], dtype=np.float32)
+        self.memory.put((self.model_name, key), embedding)
+        return embedding
+
+    def put(self, query: str, embedding: np.ndarray):
+        """
+        Store a query embedding in memory and (if enabled) on disk.
+
+        Args:
+            query: Query text (normalized internally)
+            embedding: Embedding vector
+        """
+        key = self.normalize(query)
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        self.memory.put((self.model_name, key), embedding)
+
+        if self._db is not None:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (model, query, embedding) "
+                    "VALUES (?, ?, ?)",
+                    (self.model_name, key, embedding.tobytes())
+                )
+                self._db.commit()
+
+    def get_or_encode(
+        self,
+        queries: List[str],
+        encode: Callable[[List[str]], np.ndarray]
+    ) -> List[np.ndarray]:
+        """
+        Embeddings for queries, encoding only the cache misses.
+
+        Misses are de-duplicated by cache key and passed to encode() in a
+        single call.
+
+        Args:
+            queries: Query texts
+            encode: Function mapping a list of texts to a (n, dim) array
+
+        Returns:
+            One embedding per query, in order
+        """
+        embeddings: List[Optional[np.ndarray]] = [self.get(query) for query in queries]
+
+        missing: Dict[str, List[int]] = {}
+        for position, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(self.normalize(queries[position]), []).append(position)
+
+        if missing:
+            texts = [queries[positions[0]] for positions in missing.values()]
+            for text, positions, embedding in zip(texts, missing.values(), encode(texts)):
+                self.put(text, embedding)
+                for position in positions:
+                    embeddings[position] = embedding
+        return embeddings
+
+    def __len__(self) -> int:
+        """Entries on disk (or in memory if there is no disk tier)."""
+        if self._db is None:
+            return len(self.memory)
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM query_embeddings WHERE model = ?",
+                (self.model_name,)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters for both tiers.
+
+        Returns:
+            Dict with overall hits, misses and hit_rate, plus "memory"
+            (LRUCache.stats()) and "disk" (None when disabled)
+        """
+        memory = self.memory.stats()
+        if self._db is None:
+            hits, misses, disk = memory["hits"], memory["misses"], None
+        else:
+            hits, misses = memory["hits"] + self.disk_hits, self.disk_misses
+            disk_lookups = self.disk_hits + self.disk_misses
+            disk = {
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+                "hit_rate": round(self.disk_hits / disk_lookups, 4) if disk_lookups else 0.0,
+                "size": len(self),
+                "path": self.path
+            }
+        lookups = hits + misses
+        return {
+            "model": self.model_name,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory": memory,
+            "disk": disk
+        }
+
+    def close(self):
+        """Close the sqlite connection (the memory tier stays usable)."""
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
+
+
+class ChunkEmbeddingCache:
+    """
+    Persistent chunk embeddings keyed by sha256(model name + chunk text).
+
+    Keys depend only on content, so chunk ids, order and file layout can
+    change freely: after re-chunking or re-ingesting, only chunks whose
+    text (or the model) changed miss the cache. Hits and misses are
+    counted per run (reset_counts()).
+    """
+
+    def __init__(self, model_name: str, path: str = "data/chunk_embeddings.sqlite"):
+        """
+        Open (or create) the sqlite file.
+
+        Args:
+            model_name: Embedding model the vectors come from (part of the key)
+            path: sqlite file
+        """
+        self.model_name = model_name
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_embeddings ("
+            "key TEXT PRIMARY KEY, embedding BLOB NOT NULL)"
+        )
+        self._db.commit()
+
+    def key(self, text: str) -> str:
+        """Content address of a chunk text under this model."""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up chunk embeddings.
+
+        Args:
+            texts: Chunk texts
+
+        Returns:
+            One float32 embedding (or None on a miss) per text, in order
+        """
+        keys = [self.key(text) for text in texts]
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), _SQLITE_LOOKUP_BATCH):
+                batch = unique[start:start + _SQLITE_LOOKUP_BATCH]
+                found.update(self._db.execute(
+                    f"SELECT key, embedding FROM chunk_embeddings "
+                    f"WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall())
+
+        embeddings = [
+            np.frombuffer(found[key], dtype=np.float32) if key in found else None
+            for key in keys
+        ]
+        hits = sum(embedding is not None for embedding in embeddings)
+        self.hits += hits
+        self.misses += len(embeddings) - hits
+        return embeddings
+
+    def put_many(self, texts: List[str], embeddings: np.ndarray):
+        """
+        Store chunk embeddings (one transaction).
+
+        Args:
+            texts: Chunk texts
+            embeddings: (len(texts), dim) embeddings
+        """
+        rows = [
+            (self.key(text), np.asarray(embedding, dtype=np.float32).tobytes())
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunk_embeddings (key, embedding) VALUES (?, ?)",
+                rows
+            )
+            self._db.commit()
+
+    def reset_counts(self):
+        """Start a new run's hit/miss counts."""
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        """Embeddings stored (all models)."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counts of the current run.
+
+        Returns:
+            Dict with model, hits, misses, hit_rate, size and path
+        """
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self),
+            "path": self.path
+        }
+
+    def close(self):
+        """Close the sqlite connection."""
+        with self._lock:
+            self._db.close()
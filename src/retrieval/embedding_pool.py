@@ -0,0 +1,142 @@
+"""
+Multi-process embedding pool for corpus (re)indexing
+Each worker process loads its own SentenceTransformer and encodes whole
+batches, so bulk embedding scales with the number of cores
+"""
+
+import contextlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional
+
+import numpy as np
+
+# Environment variables read by the BLAS / OpenMP runtimes at import time;
+# workers inherit them from this process when they are spawned
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+
+class EmbeddingPool:
+    """
+    Pool of worker processes that each hold a SentenceTransformer.
+
+    encode_batches() sends one batch of texts per task and yields the
+    embeddings in submission order, so callers can write them back by
+    position. Workers are started with "spawn" (torch is not fork-safe)
+    and each is pinned to threads_per_worker intra-op threads, so the
+    workers don't oversubscribe the cores.
+
+    Use as a context manager; the worker processes (and their models) live
+    until close().
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        load_model: Optional[Callable[[str, int], Any]] = None
+    ):
+        """
+        Create the pool. Worker processes (and their models) start on the
+        first encode_batches() call, so an unused pool costs nothing.
+
+        Args:
+            model_name: sentence-transformers model name
+            workers: Number of worker processes (default: CPU count)
+            threads_per_worker: torch threads per worker (default: CPU
+                count // workers, at least 1)
+            load_model: Module-level function (model_name, threads) → model
+                with encode(), run once in each worker (default:
+                load_sentence_transformer)
+        """
+        cpu_count = os.cpu_count() or 1
+        self.model_name = model_name
+        self.workers = workers or cpu_count
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.workers)
+
+        print(f"Starting embedding pool: {self.workers} workers × "
+              f"{self.threads_per_worker} threads ({model_name})")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, self.threads_per_worker, load_model or load_sentence_transformer)
+        )
+
+    def encode_batches(self, batches: List[List[str]]) -> Iterator[np.ndarray]:
+        """
+        Encode batches of texts in parallel.
+
+        Args:
+            batches: Lists of texts; each list is one forward pass
+
+        Yields:
+            float32 (len(batch), dim) embeddings, in the order of batches
+        """
+        # Submit everything up front; map() yields results in order. Workers
+        # are spawned by these submissions, so they start with the thread
+        # limits in their environment (before numpy / torch are imported)
+        with _thread_env(self.threads_per_worker):
+            results = self._executor.map(_encode_batch, batches)
+        yield from results
+
+    def close(self):
+        """Shut down the worker processes."""
+        self._executor.shutdown()
+
+    def __enter__(self) -> 'EmbeddingPool':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_sentence_transformer(model_name: str, threads: int):
+    """Load a CPU SentenceTransformer running on threads torch threads."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    return SentenceTransformer(model_name, device="cpu")
+
+
+@contextlib.contextmanager
+def _thread_env(threads: int):
+    """Set _THREAD_ENV_VARS to threads in this process, restoring them on exit."""
+    saved = {name: os.environ.get(name) for name in _THREAD_ENV_VARS}
+    os.environ.update({name: str(threads) for name in _THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _init_worker(model_name: str, threads: int, load_model: Callable[[str, int], Any]):
+    """Load the model in a worker process."""
+    global _worker_model
+    _worker_model = load_model(model_name, threads)
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    """
+    Encode one batch of texts with the model this worker loaded, as a
+    single forward pass.
+
+    Returns:
+        float32 (len(texts), dim) embeddings, in the order of texts
+    """
+    return _worker_model.encode(
+        texts,
+        batch_size=len(texts),
+        convert_to_numpy=True,
+        show_progress_bar=False
+    ).astype(np.float32, copy=False)
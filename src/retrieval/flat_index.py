@@ -0,0 +1,383 @@
+"""
+In-process exact-search vector backend (NumPy, mmap)
+All chunk embeddings live in one contiguous, L2-normalized float32 matrix;
+a query batch is one matrix product plus partial top-k per query
+
+For a corpus of this size this is faster than an HNSW round trip and
+exact (recall 1.0). The matrix is saved in a versioned binary file and
+opened with mmap, so API workers share one page-cached copy.
+
+For larger corpora the index can also keep int8 scalar-quantized or
+binary (sign bit) codes: queries scan the compact codes first and rescore
+only the best candidates with the float32 rows.
+"""
+
+import mmap
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.retrieval import binary_format
+from src.retrieval.binary_format import encode_strings
+from src.retrieval.top_k import top_k_indices
+from src.retrieval.vector_backend import VectorBackend, normalize_rows
+
+
+# On-disk format (see FlatIndexBackend.save)
+FLAT_INDEX_MAGIC = b"EBRVECS\0"
+FLAT_INDEX_FORMAT_VERSION = 1
+
+# Quantized first pass: candidates rescored = top_k × multiplier
+QUANTIZATIONS = ("int8", "binary")
+DEFAULT_RESCORE_MULTIPLIERS = {"int8": 4, "binary": 10}
+_INT8_BLOCK_ROWS = 65536  # Rows widened to float32 at a time in the int8 pass
+
+
+class FlatIndexBackend(VectorBackend):
+    """
+    VectorBackend with brute-force cosine search over a float32 matrix.
+
+    Only ids and vectors are stored, so VectorStore needs a chunk store to
+    build results. add() only buffers rows in memory; flush() appends them
+    to the matrix and rewrites the file once, so a bulk add costs one
+    concatenation and one write however many add() calls it takes.
+
+    With quantization="int8" (per-dimension symmetric scales, 4× smaller
+    than float32) or "binary" (sign bits of the mean-centered vectors, 32×
+    smaller, Hamming distance),
+    query() ranks all rows on the codes, then rescores the top
+    top_k × rescore_multiplier candidates with exact cosine similarity.
+    Returned distances are always exact.
+
+    Filters are evaluated against the attached chunk store's filter masks
+    (attach_chunk_store) and mapped onto index rows; rows that don't match
+    are never ranked.
+    """
+
+    name = "flat"
+    stores_payload = False
+
+    def __init__(
+        self,
+        filepath: str = "data/vector_index.bin",
+        quantization: Optional[str] = None,
+        rescore_multiplier: Optional[int] = None
+    ):
+        """
+        Initialize an unopened index.
+
+        Args:
+            filepath: Path of the saved index
+            quantization: None (exact float32 scan), "int8" or "binary"
+            rescore_multiplier: Candidates rescored per result (default
+                DEFAULT_RESCORE_MULTIPLIERS[quantization])
+        """
+        if quantization is not None and quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {quantization!r} (expected one of {QUANTIZATIONS})")
+        self.filepath = Path(filepath)
+        self.quantization = quantization
+        self.rescore_multiplier = rescore_multiplier or DEFAULT_RESCORE_MULTIPLIERS.get(quantization, 1)
+        self.codes: Optional[np.ndarray] = None        # int8 (n, dim) or packed uint64 (n, words)
+        # int8: per-dimension scales; binary: mean vector subtracted before taking signs
+        self.code_params: Optional[np.ndarray] = None
+        self.embeddings: Optional[np.ndarray] = None  # (n, dim) float32, rows L2-normalized
+        self.id_offsets = np.zeros(1, dtype=np.int64)
+        self.id_blob = np.empty(0, dtype=np.uint8)
+        self._id_to_row: Optional[Dict[str, int]] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self.chunk_store = None
+        self._store_rows: Optional[np.ndarray] = None  # Row → chunk store index (-1 = missing)
+        # Rows added since the last flush(), appended after the matrix rows
+        self._pending_ids: List[str] = []
+        self._pending_vectors: List[np.ndarray] = []
+        self._dirty = False  # Merged rows not saved yet
+
+    def open(self, reset: bool = False):
+        """
+        Load the saved index (mmap) or start an empty one.
+
+        Args:
+            reset: If True, delete the saved index and start empty
+        """
+        if reset and self.filepath.exists():
+            self.filepath.unlink()
+            print(f"🗑️  Deleted existing flat index: {self.filepath}")
+
+        if self.filepath.exists():
+            self._load()
+        else:
+            self.embeddings = np.empty((0, 0), dtype=np.float32)
+            self.id_offsets = np.zeros(1, dtype=np.int64)
+            self.id_blob = np.empty(0, dtype=np.uint8)
+            self.codes = self.code_params = None
+            self._id_to_row = None
+            self._store_rows = None
+        self._pending_ids, self._pending_vectors = [], []
+        self._dirty = False
+
+        print(f"✅ Flat index '{self.filepath}' ready (current count: {self.count()})")
+
+    @property
+    def is_open(self) -> bool:
+        return self.embeddings is not None
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        known = self.id_to_row()
+        new_rows = [i for i, chunk_id in enumerate(ids) if chunk_id not in known]
+        if not new_rows:
+            return
+
+        vectors = normalize_rows([embeddings[i] for i in new_rows])
+        if self._pending_vectors:
+            dim = self._pending_vectors[0].shape[1]
+        else:
+            dim = self.embeddings.shape[1] if len(self.embeddings) else vectors.shape[1]
+        if vectors.shape[1] != dim:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match the index ({dim})"
+            )
+
+        for i in new_rows:
+            known[ids[i]] = len(known)  # Row the id gets once flushed
+            self._pending_ids.append(ids[i])
+        self._pending_vectors.append(vectors)
+
+    def flush(self):
+        """
+        Append rows buffered by add() to the matrix and save the index, if
+        anything was added since the last save (queries merge buffered rows
+        without saving them).
+        """
+        if self._pending_ids or self._dirty:
+            self.save()
+
+    def _merge_pending(self):
+        """
+        Append buffered rows to the in-memory matrix and ids, and rebuild
+        the quantized codes.
+        """
+        if not self._pending_ids:
+            return
+
+        vectors = self._pending_vectors
+        if self.embeddings is not None and len(self.embeddings):
+            vectors = [self.embeddings] + vectors
+        all_ids = [self.chunk_id(row) for row in range(len(self.id_offsets) - 1)]
+        all_ids.extend(self._pending_ids)
+
+        self.embeddings = np.concatenate(vectors)
+        self.id_offsets, self.id_blob = encode_strings(all_ids)
+        self._pending_ids, self._pending_vectors = [], []
+        self._dirty = True
+        self._store_rows = None
+        self._quantize()
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[List[Any]]]:
+        self._merge_pending()
+        queries = normalize_rows(query_embeddings)
+        allowed = self.row_mask(filters)
+        if self.count() == 0 or (allowed is not None and not allowed.any()):
+            return {"ids": [[] for _ in queries], "distances": [[] for _ in queries]}
+        top_k = min(top_k, self.count() if allowed is None else int(allowed.sum()))
+
+        ids, distances = [], []
+        if self.quantization is None:
+            for row in queries @ self.embeddings.T:
+                if allowed is not None:
+                    row[~allowed] = -np.inf
+                top = top_k_indices(row, top_k)
+                ids.append([self.chunk_id(i) for i in top.tolist()])
+                distances.append((1.0 - row[top]).tolist())
+            return {"ids": ids, "distances": distances}
+
+        # Quantized first pass, exact rescoring of the best candidates
+        # (sorted by row so ties break as in the exact scan)
+        num_candidates = top_k * self.rescore_multiplier
+        for query, row in zip(queries, self._code_scores(queries)):
+            if allowed is not None:
+                row = row.astype(np.float32)
+                row[~allowed] = -np.inf
+                candidates = np.sort(top_k_indices(row, min(num_candidates, len(row))))
+                candidates = candidates[allowed[candidates]]
+            else:
+                candidates = np.sort(top_k_indices(row, num_candidates))
+            exact = self.embeddings[candidates] @ query
+            order = top_k_indices(exact, top_k)
+            ids.append([self.chunk_id(i) for i in candidates[order].tolist()])
+            distances.append((1.0 - exact[order]).tolist())
+        return {"ids": ids, "distances": distances}
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        known = self.id_to_row()
+        return {chunk_id for chunk_id in ids if chunk_id in known}
+
+    def attach_chunk_store(self, chunk_store):
+        self.chunk_store = chunk_store
+        self._store_rows = None
+
+    def row_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Boolean mask over index rows for a metadata filter.
+
+        Returns:
+            Mask (rows missing from the chunk store never match), or None
+            if filters is empty
+
+        Raises:
+            ValueError: If filters are given but no chunk store is attached
+        """
+        if not filters:
+            return None
+        if self.chunk_store is None:
+            raise ValueError("The flat backend needs a chunk store to apply filters")
+        self._merge_pending()
+
+        store_mask = self.chunk_store.filter_mask(filters)
+        if self._store_rows is None:
+            self._store_rows = np.array([
+                -1 if (index := self.chunk_store.index_of(self.chunk_id(row))) is None else index
+                for row in range(self.count())
+            ], dtype=np.int64)
+        return (self._store_rows >= 0) & store_mask[self._store_rows]
+
+    def _quantize(self):
+        """Build the codes for self.quantization from the float32 matrix."""
+        if self.quantization is None or self.count() == 0:
+            self.codes = self.code_params = None
+        elif self.quantization == "int8":
+            self.codes, self.code_params = _int8_codes(self.embeddings)
+        else:
+            # Centering spreads the sign bits of same-direction embeddings
+            self.code_params = self.embeddings.mean(axis=0).astype(np.float32)
+            self.codes = _binary_codes(self.embeddings - self.code_params)
+
+    def _code_scores(self, queries: np.ndarray) -> np.ndarray:
+        """
+        First-pass (num_queries, n) scores from the quantized codes
+        (higher is better; only the ranking matters).
+        """
+        if self.quantization == "int8":
+            # x ≈ codes * scales, so q · x ≈ (q * scales) · codes
+            weighted = queries * self.code_params
+            scores = np.empty((len(queries), self.count()), dtype=np.float32)
+            for start in range(0, self.count(), _INT8_BLOCK_ROWS):
+                block = self.codes[start:start + _INT8_BLOCK_ROWS].astype(np.float32)
+                scores[:, start:start + len(block)] = weighted @ block.T
+            return scores
+
+        # Binary: negative Hamming distance between sign-bit codes
+        query_codes = _binary_codes(queries - self.code_params)
+        return np.stack([
+            -np.bitwise_count(self.codes ^ code).sum(axis=1, dtype=np.int64)
+            for code in query_codes
+        ])
+
+    def count(self) -> int:
+        if self.embeddings is None:
+            return 0
+        return len(self.id_offsets) - 1 + len(self._pending_ids)
+
+    def chunk_id(self, row: int) -> str:
+        """Chunk id of a matrix row (buffered rows are not in the matrix yet)."""
+        start, end = self.id_offsets[row], self.id_offsets[row + 1]
+        return self.id_blob[start:end].tobytes().decode("utf-8")
+
+    def id_to_row(self) -> Dict[str, int]:
+        """Chunk id → matrix row (built lazily)."""
+        if self._id_to_row is None:
+            ids = [self.chunk_id(row) for row in range(len(self.id_offsets) - 1)]
+            self._id_to_row = {chunk_id: row for row, chunk_id in enumerate(ids + self._pending_ids)}
+        return self._id_to_row
+
+    def save(self):
+        """
+        Save the index in the versioned binary format (see binary_format):
+        count, dim and quantization in the JSON header; ids, the float32
+        matrix, then any quantized codes as arrays. Rows buffered by add()
+        are included.
+        """
+        self._merge_pending()
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        arrays = {
+            "id_offsets": self.id_offsets,
+            "id_blob": self.id_blob,
+            "embeddings": np.ascontiguousarray(self.embeddings, dtype=np.float32),
+        }
+        if self.codes is not None:
+            arrays["codes"] = self.codes
+        if self.code_params is not None:
+            arrays["code_params"] = self.code_params
+
+        header = {
+            "count": self.count(),
+            "dim": int(self.embeddings.shape[1]),
+            "quantization": self.quantization if self.codes is not None else None,
+        }
+        binary_format.write_file(
+            self.filepath, FLAT_INDEX_MAGIC, FLAT_INDEX_FORMAT_VERSION, header, arrays
+        )
+        self._dirty = False
+
+    def _load(self):
+        """
+        Open the saved index with mmap (arrays are zero-copy read-only views).
+
+        Raises:
+            ValueError: If the file is not a flat index or has an
+                unsupported format version
+        """
+        header, arrays, mm = binary_format.map_file(
+            self.filepath, FLAT_INDEX_MAGIC, FLAT_INDEX_FORMAT_VERSION, "flat vector index"
+        )
+        self.id_offsets = arrays["id_offsets"]
+        self.id_blob = arrays["id_blob"]
+        self.embeddings = arrays["embeddings"].reshape(header["count"], header["dim"])
+        self._id_to_row = None
+        self._store_rows = None
+        self._mmap = mm
+
+        # Codes saved under another (or no) quantization are rebuilt in memory
+        if header.get("quantization") == self.quantization and "codes" in arrays:
+            self.codes = arrays["codes"].reshape(header["count"], -1)
+            self.code_params = arrays["code_params"]
+        else:
+            self._quantize()
+
+
+def _int8_codes(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-dimension int8 quantization.
+
+    Returns:
+        Tuple of (int8 codes (n, dim), float32 scales (dim,)) with
+        matrix ≈ codes * scales
+    """
+    scales = np.abs(matrix).max(axis=0) / 127
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _binary_codes(matrix: np.ndarray) -> np.ndarray:
+    """Sign bits packed into uint64 words (n, ceil(dim / 64))."""
+    bits = np.packbits(matrix > 0, axis=1)
+    padding = -bits.shape[1] % 8
+    if padding:
+        bits = np.pad(bits, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(bits).view(np.uint64)
+
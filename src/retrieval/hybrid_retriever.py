@@ -3,16 +3,18 @@ Hybrid Retrieval Orchestrator for Evidence-Bound Drug RAG
 Combines vector search (semantic) and BM25 search (lexical) with weighted averaging
 """
 
-from typing import List, Optional
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
 from collections import defaultdict
 
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from src.models.schemas import RetrievedChunk
+from src.models.schemas import RetrievedChunk, RetrievalHit, to_retrieved_chunks
 from src.retrieval.vector_store import VectorStore
 from src.retrieval.bm25_index import BM25Index
+from src.retrieval.top_k import top_k_items
 
 
 class HybridRetriever:
@@ -41,41 +43,102 @@ class HybridRetriever:
         print(f"   Vector store: {self.vector_store.get_chunk_count()} chunks")
         print(f"   BM25 index: {self.bm25_index.get_corpus_size()} chunks")
     
-    def retrieve_vector(self, query: str, top_k: int = 10) -> List[RetrievedChunk]:
+    def retrieve_vector(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[RetrievedChunk]:
         """
         Retrieve using vector search only.
         
         Args:
             query: Search query
             top_k: Number of results to return
+            filters: Optional metadata filter (see BM25Index.filter_mask)
             
         Returns:
             List of RetrievedChunk objects from vector search
         """
-        return self.vector_store.search(query, top_k=top_k)
+        return to_retrieved_chunks(self.retrieve_vector_views(query, top_k=top_k, filters=filters))
     
-    def retrieve_bm25(self, query: str, top_k: int = 10) -> List[RetrievedChunk]:
+    def retrieve_bm25(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[RetrievedChunk]:
         """
         Retrieve using BM25 search only.
         
         Args:
             query: Search query
             top_k: Number of results to return
+            filters: Optional metadata filter (see BM25Index.filter_mask)
             
         Returns:
             List of RetrievedChunk objects from BM25 search
         """
-        return self.bm25_index.search(query, top_k=top_k)
+        return to_retrieved_chunks(self.retrieve_bm25_views(query, top_k=top_k, filters=filters))
     
     def retrieve_hybrid(
         self,
         query: str,
         top_k: int = 10,
-        vector_weight: float = 0.7
+        vector_weight: float = 0.7,
+        filters: Optional[Dict[str, Any]] = None
     ) -> List[RetrievedChunk]:
         """
         Retrieve using hybrid search (vector + BM25).
         
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            vector_weight: Weight for vector scores (0-1), default 0.5 (50/50)
+            filters: Optional metadata filter, applied by both retrievers
+            
+        Returns:
+            List of RetrievedChunk objects with hybrid scores
+        """
+        return to_retrieved_chunks(
+            self.retrieve_hybrid_views(
+                query, top_k=top_k, vector_weight=vector_weight, filters=filters
+            )
+        )
+    
+    def retrieve_vector_views(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[RetrievalHit]:
+        """
+        Vector search returning result views (full RetrievedChunk objects
+        if the vector store has no chunk store attached).
+        """
+        if self.vector_store.chunk_store is None:
+            return self.vector_store.search(query, top_k=top_k, filters=filters)
+        return self.vector_store.search_views(query, top_k=top_k, filters=filters)
+    
+    def retrieve_bm25_views(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[RetrievalHit]:
+        """BM25 search returning result views."""
+        return self.bm25_index.search_views(query, top_k=top_k, filters=filters)
+    
+    def retrieve_hybrid_views(
+        self,
+        query: str,
+        top_k: int = 10,
+        vector_weight: float = 0.7,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[RetrievalHit]:
+        """
+        Hybrid search returning result views; see retrieve_hybrid().
+        
         Strategy:
         1. Retrieve 2×top_k from each retriever (better merge quality)
         2. Normalize scores to [0, 1]
@@ -88,9 +151,11 @@ class HybridRetriever:
             query: Search query
             top_k: Number of results to return
             vector_weight: Weight for vector scores (0-1), default 0.5 (50/50)
+            filters: Optional metadata filter, applied inside both retrievers
+                (before top-k, so filtered queries still get top_k results)
             
         Returns:
-            List of RetrievedChunk objects with hybrid scores
+            List of results with hybrid scores, sorted by score
         """
         if not query or not query.strip():
             print("⚠️  Empty query provided, returning empty results")
@@ -98,8 +163,8 @@ class HybridRetriever:
         
         # Retrieve 2× results from each retriever (Correction #4)
         retrieval_depth = top_k * 2
-        vector_results = self.retrieve_vector(query, top_k=retrieval_depth)
-        bm25_results = self.retrieve_bm25(query, top_k=retrieval_depth)
+        vector_results = self.retrieve_vector_views(query, top_k=retrieval_depth, filters=filters)
+        bm25_results = self.retrieve_bm25_views(query, top_k=retrieval_depth, filters=filters)
         
         # Handle edge cases
         if not vector_results and not bm25_results:
@@ -123,7 +188,7 @@ class HybridRetriever:
         
         return hybrid_results
     
-    def _normalize_scores(self, chunks: List[RetrievedChunk]) -> List[RetrievedChunk]:
+    def _normalize_scores(self, chunks: List[RetrievalHit]) -> List[RetrievalHit]:
         """
         Normalize scores to [0, 1] range using min-max scaling.
         
@@ -131,10 +196,10 @@ class HybridRetriever:
         Ensures both retrievers use same scale before merging.
         
         Args:
-            chunks: List of RetrievedChunk objects
+            chunks: Search results (RetrievedChunk or RetrievedChunkView)
             
         Returns:
-            List of RetrievedChunk objects with normalized scores
+            The same results with normalized scores
         """
         if not chunks:
             return chunks
@@ -157,11 +222,11 @@ class HybridRetriever:
     
     def _merge_and_rerank(
         self,
-        vector_results: List[RetrievedChunk],
-        bm25_results: List[RetrievedChunk],
+        vector_results: List[RetrievalHit],
+        bm25_results: List[RetrievalHit],
         vector_weight: float,
         top_k: int
-    ) -> List[RetrievedChunk]:
+    ) -> List[RetrievalHit]:
         """
         Merge results from both retrievers and rerank by weighted score.
         
@@ -177,7 +242,7 @@ class HybridRetriever:
             top_k: Number of results to return
             
         Returns:
-            List of RetrievedChunk objects with hybrid scores, sorted by score
+            List of results with hybrid scores, sorted by score
         """
         # Build merged dictionary
         merged = {}
@@ -221,24 +286,13 @@ class HybridRetriever:
                 # BM25 only: keep full BM25 score (no penalty)
                 final_score = b_score
             
-            # Create new RetrievedChunk with hybrid score
-            hybrid_chunk = RetrievedChunk(
-                chunk_id=chunk.chunk_id,
-                document_id=chunk.document_id,
-                text=chunk.text,
-                score=final_score,
-                rank=0,  # Will be reassigned after sorting
-                retriever_type="hybrid",  # Mark as hybrid result
-                authority_family=chunk.authority_family,
-                tier=chunk.tier,
-                year=chunk.year,
-                drug_names=chunk.drug_names
-            )
+            # Copy the result (a view stays a view) with the hybrid score;
+            # rank is reassigned after sorting
+            hybrid_chunk = replace(chunk, score=final_score, rank=0, retriever_type="hybrid")
             final_results.append(hybrid_chunk)
         
-        # Sort by final score (descending) and take top_k
-        final_results.sort(key=lambda x: x.score, reverse=True)
-        final_results = final_results[:top_k]
+        # Select top_k by final score (descending) without sorting everything
+        final_results = top_k_items(final_results, top_k, key=lambda x: x.score)
         
         # Reassign ranks
         for rank, chunk in enumerate(final_results, start=1):
@@ -267,7 +321,7 @@ if __name__ == "__main__":
     
     # Load BM25 index
     print("\n📦 Loading BM25 Index...")
-    bm25_index = BM25Index.load_from_disk("data/bm25_index.pkl")
+    bm25_index = BM25Index.load_from_disk("data/bm25_index.bin")
     
     # Initialize hybrid retriever
     print("\n🔗 Initializing Hybrid Retriever...")
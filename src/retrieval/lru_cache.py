@@ -0,0 +1,93 @@
+"""
+Thread-safe LRU cache with hit/miss counters
+Used for per-query caches on the retrieval hot path
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache.
+
+    get() returns None on a miss, so None cannot be cached as a value.
+    A maxsize of 0 disables caching (every lookup is a miss).
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries before the least recently
+                used entry is evicted
+        """
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a key, marking it most recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Insert or refresh an entry, evicting the least recently used one
+        when full.
+
+        Args:
+            key: Cache key
+            value: Value to cache (not None)
+        """
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and occupancy.
+
+        Returns:
+            Dict with hits, misses, hit_rate, size and maxsize
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._data),
+            "maxsize": self.maxsize
+        }
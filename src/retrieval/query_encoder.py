@@ -0,0 +1,133 @@
+"""
+Selectable inference backend for the sentence-transformers encoder
+PyTorch (default), or the same model exported to ONNX and run under
+onnxruntime, optionally with dynamic int8 quantization
+"""
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# "onnx" and "onnx-int8" need `optimum[onnxruntime]`
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Dynamic int8 quantization target. AVX2 runs on any x86-64 server CPU;
+# "avx512_vnni" is faster where available.
+ONNX_INT8_CONFIG = os.getenv("ONNX_INT8_CONFIG", "avx2")
+
+# Weight type of optimum's dynamic quantization presets, which names the
+# quantized file (avx2 uses unsigned weights: onnx/model_quint8_avx2.onnx)
+ONNX_INT8_WEIGHT_TYPES = {
+    "arm64": "qint8",
+    "avx2": "quint8",
+    "avx512": "qint8",
+    "avx512_vnni": "qint8",
+}
+
+# Exported models are kept here when the model repo has no ONNX files
+ONNX_EXPORT_DIR = Path("data/onnx")
+
+
+def int8_file_suffix(config: str) -> str:
+    """
+    Suffix of the dynamically quantized ONNX file for an optimum preset,
+    as written by sentence-transformers (e.g. "quint8_avx2").
+
+    Raises:
+        ValueError: If config is not one of ONNX_INT8_WEIGHT_TYPES
+    """
+    if config not in ONNX_INT8_WEIGHT_TYPES:
+        raise ValueError(
+            f"Unknown int8 quantization config {config!r} "
+            f"(expected one of {tuple(ONNX_INT8_WEIGHT_TYPES)})"
+        )
+    return f"{ONNX_INT8_WEIGHT_TYPES[config]}_{config}"
+
+
+def load_encoder(
+    model_name: str,
+    backend: str = "torch",
+    threads: Optional[int] = None
+) -> "SentenceTransformer":
+    """
+    Load a SentenceTransformer on the given inference backend.
+
+    For "onnx-int8" the dynamically quantized file shipped in the model
+    repo (onnx/model_<int8_file_suffix>.onnx) is used. If the repo doesn't
+    have one, the model is exported and quantized once into
+    ONNX_EXPORT_DIR.
+
+    Args:
+        model_name: sentence-transformers model name
+        backend: "torch", "onnx" or "onnx-int8"
+        threads: onnxruntime intra-op threads (None = onnxruntime default,
+            one per physical core); ignored for "torch"
+
+    Returns:
+        SentenceTransformer whose encode() runs on the backend
+
+    Raises:
+        ValueError: If backend is not one of ENCODER_BACKENDS, or
+            ONNX_INT8_CONFIG is not a known preset
+        ImportError: If an ONNX backend is selected and optimum is not
+            installed
+    """
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend {backend!r} (expected one of {ENCODER_BACKENDS})")
+    if backend != "torch":
+        try:
+            import optimum.onnxruntime  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                f"Encoder backend {backend!r} needs optimum: "
+                f"pip install 'optimum[onnxruntime]==1.23.3'"
+            ) from e
+    
+    from sentence_transformers import SentenceTransformer
+    
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    import onnxruntime as ort
+
+    session_options = ort.SessionOptions()
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session_options.inter_op_num_threads = 1  # A single query graph has no parallel branches
+    if threads:
+        session_options.intra_op_num_threads = threads
+    model_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+
+    file_suffix = int8_file_suffix(ONNX_INT8_CONFIG)
+    file_name = f"onnx/model_{file_suffix}.onnx"
+    def load_int8(path: str) -> SentenceTransformer:
+        # export=False: a missing file raises instead of silently exporting fp32.
+        # Fresh kwargs per call; sentence-transformers edits them in place.
+        return SentenceTransformer(
+            path,
+            backend="onnx",
+            model_kwargs={**model_kwargs, "file_name": file_name, "export": False}
+        )
+
+    try:
+        return load_int8(model_name)
+    except OSError as e:  # File not in the model repo (or hub unreachable)
+        print(f"⚠️  No {file_name} for {model_name} ({type(e).__name__}); using a local export")
+
+    # No quantized file in the model repo: export + quantize locally (once)
+    export_dir = ONNX_EXPORT_DIR / model_name.replace("/", "__")
+    if not (export_dir / file_name).exists():
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        print(f"Exporting {model_name} to int8 ONNX ({ONNX_INT8_CONFIG}) in {export_dir}...")
+        fp32_model = SentenceTransformer(model_name, backend="onnx")
+        fp32_model.save_pretrained(str(export_dir))
+        export_dynamic_quantized_onnx_model(
+            fp32_model, ONNX_INT8_CONFIG, str(export_dir), file_suffix=file_suffix
+        )
+    return load_int8(str(export_dir))
@@ -0,0 +1,63 @@
+"""
+Partial top-k selection shared by the retrievers and the hybrid merge
+Avoids fully sorting every score when only top_k results are kept
+"""
+
+import heapq
+from typing import Callable, Iterable, List, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first.
+
+    Uses np.argpartition (O(n)) to find the k-th best score, then sorts only
+    the candidates at or above it. Ties are broken by lower index, so the
+    result equals a stable descending full sort truncated to k.
+
+    Args:
+        scores: 1-D array of scores
+        k: Number of indices to return
+
+    Returns:
+        Array of at most k indices into scores, sorted by score (highest first)
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    neg_scores = -scores
+    if k < n:
+        # k-th largest score; keep every tie at the boundary for exact tie-breaking.
+        # Partitioning the negated scores at k-1 stays fast on zero-heavy arrays.
+        kth = np.argpartition(neg_scores, k - 1)[k - 1]
+        candidates = np.flatnonzero(neg_scores <= neg_scores[kth])
+    else:
+        candidates = np.arange(n)
+
+    order = np.lexsort((candidates, neg_scores[candidates]))[:k]
+    return candidates[order]
+
+
+def top_k_items(items: Iterable[T], k: int, key: Callable[[T], float]) -> List[T]:
+    """
+    The k items with the highest key, best first (bounded heap).
+
+    Equivalent to sorted(items, key=key, reverse=True)[:k], including
+    stability for equal keys, in O(n log k).
+
+    Args:
+        items: Items to select from
+        k: Number of items to return
+        key: Score function
+
+    Returns:
+        List of at most k items, sorted by key (highest first)
+    """
+    if k <= 0:
+        return []
+    return heapq.nlargest(k, items, key=key)
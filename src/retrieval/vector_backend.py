@@ -0,0 +1,150 @@
+"""
+Storage/search backend interface for VectorStore
+VectorStore owns the embedding model and result building; a backend only
+stores chunk embeddings by id and answers nearest-neighbour queries
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+class VectorBackend(ABC):
+    """
+    Cosine-similarity index over chunk embeddings, keyed by chunk id.
+
+    query() returns Chroma-shaped results, one inner list per query:
+    {"ids": [[...]], "distances": [[...]]} with cosine distances
+    (1 - cosine similarity, best first). Backends that store chunk text
+    and metadata (stores_payload) return them by id from get_payloads().
+
+    filters use the retrievers' metadata filter format
+    (chunk_store.FILTER_KEYS), e.g. {"drug_names": ["warfarin"],
+    "tier": 1, "year_min": 2020}, and are applied inside the backend.
+    """
+
+    name: str = ""
+    stores_payload: bool = False  # Keeps documents/metadatas next to the vectors
+
+    @abstractmethod
+    def open(self, reset: bool = False):
+        """
+        Create or load the index.
+
+        Args:
+            reset: If True, drop any existing vectors first
+        """
+
+    @property
+    @abstractmethod
+    def is_open(self) -> bool:
+        """True once open() has been called."""
+
+    @abstractmethod
+    def add(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """
+        Add chunk embeddings (ids already in the index are ignored).
+
+        Args:
+            ids: Chunk ids
+            embeddings: One embedding per id
+            documents: Chunk texts (kept only if stores_payload)
+            metadatas: Chunk metadata dicts (kept only if stores_payload)
+        """
+
+    def flush(self):
+        """
+        Persist rows buffered by add(). VectorStore.add_chunks calls it once
+        per run (also when interrupted); backends that write on every add()
+        need nothing here.
+        """
+
+    @abstractmethod
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[List[Any]]]:
+        """
+        Nearest chunks for each query embedding.
+
+        Args:
+            query_embeddings: One embedding per query
+            top_k: Number of results per query
+            filters: Optional metadata filter; only matching chunks are
+                searched
+
+        Returns:
+            Chroma-shaped result dict (see class docstring)
+        """
+
+    @abstractmethod
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """
+        Subset of ids already in the index (used to resume an interrupted
+        add_chunks without re-embedding).
+        """
+
+    def get_payloads(self, ids: List[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """
+        Stored text and metadata of chunks.
+
+        Args:
+            ids: Chunk ids
+
+        Returns:
+            Dict of chunk id → (text, metadata dict) for the ids found
+
+        Raises:
+            ValueError: If the backend does not store payloads
+        """
+        raise ValueError(f"The {self.name} backend stores no chunk text/metadata")
+
+    def outdated_metadata_ids(self) -> List[str]:
+        """
+        Ids of chunks whose stored metadata predates the current layout
+        (see VectorStore.ensure_filter_metadata).
+
+        Raises:
+            ValueError: If the backend does not store payloads
+        """
+        raise ValueError(f"The {self.name} backend stores no chunk text/metadata")
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Replace the stored metadata of existing chunks (no re-embedding).
+
+        Raises:
+            ValueError: If the backend does not store payloads
+        """
+        raise ValueError(f"The {self.name} backend stores no chunk text/metadata")
+
+    def attach_chunk_store(self, chunk_store):
+        """
+        Hook called by VectorStore.attach_chunk_store, for backends that
+        evaluate filters against the chunk store instead of their own
+        metadata.
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of vectors in the index (0 before open())."""
+
+
+def normalize_rows(embeddings: Sequence[Sequence[float]]) -> np.ndarray:
+    """
+    L2-normalize embeddings as a float32 (n, dim) matrix, so dot products
+    are cosine similarities. Zero vectors are left as zeros.
+    """
+    matrix = np.array(embeddings, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
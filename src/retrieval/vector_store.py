@@ -1,64 +1,145 @@
 """
-ChromaDB Vector Store for Evidence-Bound Drug RAG
+Vector Store for Evidence-Bound Drug RAG
 Handles embedding generation, storage, and vector similarity search
+Vectors are kept by a pluggable backend: ChromaDB (default) or an
+in-process NumPy flat index
 """
 
+import contextlib
 import json
 import time
 from pathlib import Path
-from typing import List, Optional
-from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Sequence, Union
+from dataclasses import asdict, replace
 
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+import numpy as np
 from tqdm import tqdm
 
 import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from src.models.schemas import Chunk, RetrievedChunk
+from src.models.schemas import Chunk, RetrievedChunk, RetrievedChunkView, to_retrieved_chunks
+from src.retrieval.chroma_backend import ChromaBackend, chunk_metadata
+from src.retrieval.chunk_store import ChunkStore
+from src.retrieval.flat_index import FlatIndexBackend
+from src.retrieval.vector_backend import VectorBackend
+from src.retrieval.embedding_cache import (
+    DEFAULT_QUERY_EMBEDDING_CACHE_SIZE,
+    ChunkEmbeddingCache,
+    QueryEmbeddingCache,
+)
+from src.retrieval.embedding_pool import EmbeddingPool
+from src.retrieval.query_encoder import load_encoder
+
+# Backends selectable by name (VectorStore(backend=...))
+VECTOR_BACKENDS = ("chroma", "flat")
+
+# Queries are short, so search_batch encodes this many per forward pass
+QUERY_BATCH_SIZE = 256
+
+# Corpus embedding: length-sorted batches of at most EMBED_BATCH_TOKENS
+# padded tokens (token count estimated from characters), streamed into
+# the backend every ADD_CHECKPOINT_SIZE chunks
+EMBED_BATCH_TOKENS = 16384
+EMBED_MAX_BATCH_SIZE = 256
+CHARS_PER_TOKEN = 4
+ADD_CHECKPOINT_SIZE = 1024
+# Buffering backends (flat) are saved every this many checkpoints, so a
+# killed run loses at most this much embedding work
+ADD_FLUSH_EVERY = 8
 
 
 class VectorStore:
     """
-    Vector store using ChromaDB for semantic search over drug document chunks.
+    Vector store for semantic search over drug document chunks.
+    
+    Embeds chunks and queries with a sentence-transformers model and keeps
+    the vectors in a VectorBackend (ChromaDB or the NumPy flat index).
     """
     
     def __init__(
         self,
         persist_directory: str = "data/chromadb",
         embedding_model_name: str = "all-MiniLM-L6-v2",
-        collection_name: str = "drug_chunks"
+        collection_name: str = "drug_chunks",
+        query_cache_size: int = DEFAULT_QUERY_EMBEDDING_CACHE_SIZE,
+        query_cache_path: Optional[str] = None,
+        backend: Union[str, VectorBackend] = "chroma",
+        flat_index_path: str = "data/vector_index.bin",
+        quantization: Optional[str] = None,
+        chunk_cache_path: Optional[str] = None,
+        encoder_backend: str = "torch",
+        encoder_threads: Optional[int] = None
     ):
         """
-        Initialize ChromaDB client and embedding model.
+        Initialize the vector backend and embedding model.
         
         Args:
             persist_directory: Path to store ChromaDB data
             embedding_model_name: sentence-transformers model name
             collection_name: Name of ChromaDB collection
+            query_cache_size: Query embeddings kept in memory (0 disables)
+            query_cache_path: sqlite file persisting query embeddings across
+                restarts (None keeps them in memory only)
+            backend: "chroma", "flat", or a VectorBackend instance
+            flat_index_path: Index file of the "flat" backend
+            quantization: "int8" or "binary" codes for the flat backend's
+                first pass (rescored with float32); None searches float32 only
+            chunk_cache_path: sqlite file of chunk embeddings keyed by
+                model + text hash, reused by add_chunks (None disables)
+            encoder_backend: Query encoder inference backend: "torch",
+                "onnx" or "onnx-int8" (chunks are always embedded with torch)
+            encoder_threads: onnxruntime intra-op threads for the query
+                encoder (None = onnxruntime default)
         """
-        self.persist_directory = Path(persist_directory)
-        self.persist_directory.mkdir(parents=True, exist_ok=True)
-        
-        self.collection_name = collection_name
-        
-        # Initialize ChromaDB client (persistent)
-        print(f"Initializing ChromaDB at {self.persist_directory}...")
-        self.client = chromadb.PersistentClient(path=str(self.persist_directory))
+        if quantization is not None and backend != "flat":
+            raise ValueError("Quantized embeddings are only supported by the flat backend")
+        if backend == "chroma":
+            backend = ChromaBackend(persist_directory, collection_name)
+        elif backend == "flat":
+            backend = FlatIndexBackend(flat_index_path, quantization=quantization)
+        elif not isinstance(backend, VectorBackend):
+            raise ValueError(f"Unknown vector backend {backend!r} (expected one of {VECTOR_BACKENDS})")
+        self.backend: VectorBackend = backend
         
         # Initialize embedding model
         print(f"Loading embedding model: {embedding_model_name}...")
-        self.embedding_model = SentenceTransformer(embedding_model_name)
+        self.embedding_model_name = embedding_model_name
+        self.embedding_model = load_encoder(embedding_model_name)
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
         print(f"✅ Embedding model loaded ({self.embedding_dim} dimensions)")
         
-        self.collection = None
-        self.chunks_loaded = []
+        # Queries are encoded one at a time on the request path, so they can
+        # run on a faster (ONNX, optionally int8) copy of the same model
+        self.encoder_backend = encoder_backend
+        if encoder_backend == "torch":
+            self.query_encoder = self.embedding_model
+        else:
+            print(f"Loading {encoder_backend} query encoder...")
+            self.query_encoder = load_encoder(embedding_model_name, encoder_backend, encoder_threads)
+            print(f"✅ Query encoder loaded ({encoder_backend})")
+        
+        # Repeated queries skip the encoder (keyed per backend: int8
+        # embeddings differ slightly from torch ones)
+        self.query_embedding_cache = QueryEmbeddingCache(
+            embedding_model_name if encoder_backend == "torch"
+            else f"{embedding_model_name}#{encoder_backend}",
+            maxsize=query_cache_size,
+            path=query_cache_path
+        )
+        
+        # Re-indexing only encodes chunks whose text changed
+        self.chunk_embedding_cache: Optional[ChunkEmbeddingCache] = None
+        if chunk_cache_path:
+            self.chunk_embedding_cache = ChunkEmbeddingCache(embedding_model_name, chunk_cache_path)
+        
+        self.chunks_loaded: Sequence[Chunk] = []
+        # chunk_id → decoded result template, filled on first hit when no chunk store is attached
+        self._payload_cache: Dict[str, RetrievedChunk] = {}
+        self.chunk_store: Optional[ChunkStore] = None  # Resolves search hits by chunk index
     
     def load_chunks(self, chunks_json_path: str) -> List[Chunk]:
         """
-        Load chunks from JSON file.
+        Load chunks from JSON file into an in-memory ChunkStore.
         
         Args:
             chunks_json_path: Path to chunks.json
@@ -76,69 +157,127 @@ class VectorStore:
             chunks.append(chunk)
         
         print(f"✅ Loaded {len(chunks)} chunks")
-        self.chunks_loaded = chunks
+        self.attach_chunk_store(ChunkStore.from_chunks(chunks))
         return chunks
     
-    def _generate_embeddings(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+    def attach_chunk_store(self, chunk_store: ChunkStore):
+        """
+        Use a (shared) chunk store for chunk text and metadata.
+        
+        Search results are then resolved from the store by chunk index;
+        the backend only returns ids and distances.
+        
+        Args:
+            chunk_store: ChunkStore with the chunks in the collection
+        """
+        self.chunk_store = chunk_store
+        self.chunks_loaded = chunk_store
+        self.backend.attach_chunk_store(chunk_store)
+    
+    def _generate_embeddings(
+        self,
+        texts: List[str],
+        max_batch_tokens: int = EMBED_BATCH_TOKENS,
+        progress: Optional[tqdm] = None,
+        pool: Optional[EmbeddingPool] = None
+    ) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
         
+        Texts are sorted by length and grouped into dynamic batches of at
+        most max_batch_tokens padded tokens (and EMBED_MAX_BATCH_SIZE
+        texts), so short chunks share large batches and long ones aren't
+        padded against short ones. With a pool, the batches are encoded in
+        its worker processes and written back by position.
+        
         Args:
             texts: List of text strings
-            batch_size: Batch size for embedding generation
+            max_batch_tokens: Padded-token budget per forward pass
+            progress: Optional progress bar advanced by texts embedded
+            pool: Optional EmbeddingPool (same model) to encode in parallel
             
         Returns:
-            List of embedding vectors
+            float32 array (len(texts), embedding_dim), in input order
         """
-        print(f"\nGenerating embeddings for {len(texts)} texts...")
-        start_time = time.time()
-        
-        # Generate embeddings with progress bar
-        embeddings = []
-        for i in tqdm(range(0, len(texts), batch_size), desc="Embedding batches"):
-            batch = texts[i:i + batch_size]
-            batch_embeddings = self.embedding_model.encode(
-                batch,
-                convert_to_numpy=True,
-                show_progress_bar=False
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        batches = self._length_sorted_batches(texts, max_batch_tokens)
+        if pool is not None:
+            encoded = pool.encode_batches([[texts[i] for i in positions] for positions in batches])
+        else:
+            encoded = (
+                self.embedding_model.encode(
+                    [texts[i] for i in positions],
+                    batch_size=len(positions),
+                    convert_to_numpy=True,
+                    show_progress_bar=False
+                )
+                for positions in batches
             )
-            embeddings.extend(batch_embeddings.tolist())
-        
-        elapsed = time.time() - start_time
-        avg_time = (elapsed / len(texts)) * 1000  # ms per chunk
-        
-        print(f"✅ Generated {len(embeddings)} embeddings in {elapsed:.2f}s ({avg_time:.2f}ms/chunk)")
+        for positions, batch_embeddings in zip(batches, encoded):
+            embeddings[positions] = batch_embeddings
+            if progress is not None:
+                progress.update(len(positions))
         return embeddings
     
+    def _length_sorted_batches(self, texts: List[str], max_batch_tokens: int) -> List[List[int]]:
+        """
+        Split text positions into batches by estimated token length
+        (longest first, so a batch that doesn't fit fails early).
+        """
+        max_tokens = self.embedding_model.max_seq_length or EMBED_BATCH_TOKENS
+        lengths = [min(len(text) // CHARS_PER_TOKEN + 2, max_tokens) for text in texts]
+        order = sorted(range(len(texts)), key=lambda i: -lengths[i])
+        
+        batches, batch = [], []
+        for position in order:
+            # Sorted longest first, so the batch's first text sets its padded length
+            padded = lengths[batch[0]] if batch else lengths[position]
+            if batch and ((len(batch) + 1) * padded > max_batch_tokens or len(batch) == EMBED_MAX_BATCH_SIZE):
+                batches.append(batch)
+                batch = []
+            batch.append(position)
+        if batch:
+            batches.append(batch)
+        return batches
+    
     def create_or_load_collection(self, reset: bool = False):
         """
-        Create or load ChromaDB collection with cosine similarity.
+        Create or load the backend index (ChromaDB collection with cosine
+        similarity, or the flat index file).
         
         Args:
-            reset: If True, delete existing collection and create new
-        """
-        if reset:
-            try:
-                self.client.delete_collection(name=self.collection_name)
-                print(f"🗑️  Deleted existing collection: {self.collection_name}")
-            except:
-                pass
-        
-        # Create collection with cosine similarity metric
-        self.collection = self.client.get_or_create_collection(
-            name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}  # Explicitly set cosine similarity
-        )
-        
-        count = self.collection.count()
-        print(f"✅ Collection '{self.collection_name}' ready (current count: {count})")
+            reset: If True, delete existing vectors and start empty
+        """
+        self.backend.open(reset=reset)
+        self._payload_cache.clear()
     
-    def add_chunks(self, chunks: Optional[List[Chunk]] = None):
+    def add_chunks(
+        self,
+        chunks: Optional[List[Chunk]] = None,
+        checkpoint_size: int = ADD_CHECKPOINT_SIZE,
+        workers: Optional[int] = None
+    ) -> Dict[str, int]:
         """
-        Add chunks to ChromaDB collection with embeddings and metadata.
+        Add chunks to the backend with embeddings and metadata.
+        
+        Embeddings are streamed into the backend every checkpoint_size
+        chunks instead of in one call at the end, and chunks already in the
+        backend are skipped, so an interrupted run resumes where it stopped.
+        ChromaDB stores each checkpoint as it is added; the flat index
+        buffers them and is saved (backend.flush()) every ADD_FLUSH_EVERY
+        checkpoints and when the run ends or raises, so a killed run only
+        re-embeds the checkpoints since the last save.
+        With a chunk embedding cache, only chunks whose text isn't cached
+        are encoded.
         
         Args:
             chunks: List of Chunk objects (uses self.chunks_loaded if None)
+            checkpoint_size: Chunks embedded per backend.add() call
+            workers: Embedding worker processes, each with its own model
+                (None or 1 = encode in this process)
+            
+        Returns:
+            Counts for this run: added, encoded, cache_hits, cache_misses
         """
         if chunks is None:
             chunks = self.chunks_loaded
@@ -146,59 +285,156 @@ class VectorStore:
         if not chunks:
             raise ValueError("No chunks to add. Call load_chunks() first.")
         
-        if self.collection is None:
+        if not self.backend.is_open:
             raise ValueError("Collection not initialized. Call create_or_load_collection() first.")
         
-        print(f"\nAdding {len(chunks)} chunks to ChromaDB...")
+        stored = self.backend.existing_ids([chunk.id for chunk in chunks])
+        pending = [chunk for chunk in chunks if chunk.id not in stored]
+        if stored:
+            print(f"⏭️  {len(stored)} chunks already in the {self.backend.name} backend, resuming")
+        counts = {"added": 0, "encoded": 0, "cache_hits": 0, "cache_misses": 0}
+        if not pending:
+            print(f"✅ All {len(chunks)} chunks already in collection")
+            return counts
         
-        # Prepare data
-        ids = []
-        texts = []
-        metadatas = []
+        print(f"\nAdding {len(pending)} chunks to the {self.backend.name} backend...")
+        start_time = time.time()
+        self._payload_cache.clear()
+        
+        pool = None
+        if workers is not None and workers > 1 and len(pending) > 1:
+            pool = EmbeddingPool(self.embedding_model_name, workers=workers)
+        
+        try:
+            with pool or contextlib.nullcontext(), \
+                    tqdm(total=len(pending), desc="Embedding chunks", unit="chunk") as progress:
+                for checkpoint, start in enumerate(range(0, len(pending), checkpoint_size), start=1):
+                    batch = pending[start:start + checkpoint_size]
+                    texts = [chunk.text for chunk in batch]
+                    embeddings = self._cached_embeddings(texts, counts, progress=progress, pool=pool)
+                    
+                    # Checkpoint: stored chunks are skipped if the run is restarted
+                    self.backend.add(
+                        ids=[chunk.id for chunk in batch],
+                        embeddings=embeddings,
+                        documents=texts,
+                        metadatas=[chunk_metadata(chunk) for chunk in batch]
+                    )
+                    if checkpoint % ADD_FLUSH_EVERY == 0:
+                        self.backend.flush()
+        finally:
+            # Buffering backends (flat) write everything added so far once
+            self.backend.flush()
+        
+        counts["added"] = len(pending)
+        elapsed = time.time() - start_time
+        avg_time = (elapsed / len(pending)) * 1000  # ms per chunk
+        print(f"✅ Added {len(pending)} chunks to collection in {elapsed:.2f}s ({avg_time:.2f}ms/chunk)")
+        if self.chunk_embedding_cache is not None:
+            print(f"   Embedding cache: {counts['cache_hits']} hits, {counts['cache_misses']} misses "
+                  f"({counts['encoded']} chunks encoded)")
+        print(f"   Total chunks in collection: {self.backend.count()}")
+        return counts
+    
+    def _cached_embeddings(
+        self,
+        texts: List[str],
+        counts: Dict[str, int],
+        progress: Optional[tqdm] = None,
+        pool: Optional[EmbeddingPool] = None
+    ) -> np.ndarray:
+        """
+        Embeddings for chunk texts, encoding only chunk-cache misses (all
+        texts if there is no cache) and storing them in the cache.
         
-        for chunk in chunks:
-            ids.append(chunk.id)
-            texts.append(chunk.text)
+        Args:
+            texts: Chunk texts
+            counts: Run counters (encoded, cache_hits, cache_misses), updated
+            progress: Optional progress bar advanced by texts embedded
+            pool: Optional EmbeddingPool to encode misses in parallel
             
-            # Store drug_names as JSON string (ChromaDB doesn't support list metadata)
-            metadata = {
-                "chunk_id": chunk.id,
-                "document_id": chunk.document_id,
-                "authority_family": chunk.authority_family,
-                "tier": chunk.tier,
-                "year": chunk.year if chunk.year else 0,  # ChromaDB doesn't support None
-                "drug_names": json.dumps(chunk.drug_names)  # ✅ Serialize to JSON string
-            }
-            metadatas.append(metadata)
-        
-        # Generate embeddings
-        embeddings = self._generate_embeddings(texts)
-        
-        # Add to ChromaDB
-        print(f"Storing chunks in ChromaDB...")
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=texts,
-            metadatas=metadatas
-        )
+        Returns:
+            float32 array (len(texts), embedding_dim), in input order
+        """
+        if self.chunk_embedding_cache is None:
+            counts["encoded"] += len(texts)
+            return self._generate_embeddings(texts, progress=progress, pool=pool)
+        
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        missing = []
+        for position, cached in enumerate(self.chunk_embedding_cache.get_many(texts)):
+            if cached is None:
+                missing.append(position)
+            else:
+                embeddings[position] = cached
+        counts["cache_hits"] += len(texts) - len(missing)
+        counts["cache_misses"] += len(missing)
+        if progress is not None:
+            progress.update(len(texts) - len(missing))
+        
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            encoded = self._generate_embeddings(missing_texts, progress=progress, pool=pool)
+            self.chunk_embedding_cache.put_many(missing_texts, encoded)
+            embeddings[missing] = encoded
+            counts["encoded"] += len(missing)
+        return embeddings
+    
+    def ensure_filter_metadata(self) -> int:
+        """
+        Upgrade stored chunk metadata written before metadata filtering
+        (no per-drug keys) in place, without re-embedding.
         
-        print(f"✅ Added {len(chunks)} chunks to collection")
-        print(f"   Total chunks in collection: {self.collection.count()}")
-
+        Only backends that store metadata (ChromaDB) need this; metadata is
+        rebuilt from the attached chunk store. Up-to-date collections are
+        detected from stored ids alone, so this is cheap on every start-up.
+        
+        Returns:
+            Number of chunks whose metadata was rewritten
+        """
+        if not self.backend.stores_payload or self.chunk_store is None or not self.backend.count():
+            return 0
+        
+        stale = []
+        for chunk_id in self.backend.outdated_metadata_ids():
+            index = self.chunk_store.index_of(chunk_id)
+            if index is not None:
+                stale.append(self.chunk_store[index])
+        if stale:
+            self.backend.update_metadatas(
+                [chunk.id for chunk in stale],
+                [chunk_metadata(chunk) for chunk in stale]
+            )
+        updated = len(stale)
+        
+        if updated:
+            self._payload_cache.clear()
+            print(f"✅ Added filter metadata to {updated} stored chunks")
+        return updated
     
-    def search(self, query: str, top_k: int = 10) -> List[RetrievedChunk]:
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[RetrievedChunk]:
         """
         Perform vector similarity search.
         
         Args:
             query: Search query text
             top_k: Number of results to return
+            filters: Optional metadata filter, applied inside the backend
+                (see BM25Index.filter_mask for the format)
             
         Returns:
             List of RetrievedChunk objects, sorted by score (highest first)
         """
-        if self.collection is None:
+        # Text/metadata come from the chunk store if attached
+        if self.chunk_store is not None:
+            return to_retrieved_chunks(self.search_views(query, top_k=top_k, filters=filters))
+        
+        if not self.backend.is_open:
             raise ValueError("Collection not initialized. Call create_or_load_collection() first.")
         
         # Handle empty query
@@ -206,81 +442,212 @@ class VectorStore:
             print("⚠️  Empty query provided, returning empty results")
             return []
         
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode(
-            query,
-            convert_to_numpy=True,
-            show_progress_bar=False
-        ).tolist()
-        
-        # Search ChromaDB
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k
-        )
+        results = self.backend.query([self._encode_query(query)], top_k, filters=filters)
+        return self._results_from_payloads(results['ids'][0], results['distances'][0])
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[RetrievedChunk]]:
+        """
+        Perform vector search for many queries at once.
         
-        # Convert to RetrievedChunk objects
-        retrieved_chunks = []
+        All queries are embedded in one encode() call (one forward pass per
+        QUERY_BATCH_SIZE queries) and sent to the backend as a single
+        query (one Chroma query_embeddings request, or one matrix product
+        for the flat index), instead of one encode and one round trip per
+        query. Queries already in the query-embedding cache are not encoded
+        again.
         
-        if results['ids'] and results['ids'][0]:
-            for rank, (chunk_id, distance, metadata, text) in enumerate(
-                zip(
-                    results['ids'][0],
-                    results['distances'][0],
-                    results['metadatas'][0],
-                    results['documents'][0]
-                ),
-                start=1
-            ):
-                retrieved_chunk = self._chunk_to_retrieved_chunk(
-                    chunk_id=chunk_id,
-                    distance=distance,
-                    metadata=metadata,
-                    text=text,
-                    rank=rank
-                )
-                retrieved_chunks.append(retrieved_chunk)
+        Args:
+            queries: Search query texts
+            top_k: Number of results to return per query
+            filters: Optional metadata filter applied to every query
+            
+        Returns:
+            One list of RetrievedChunk objects per query (empty for empty
+            queries), sorted by score (highest first)
+        """
+        if not self.backend.is_open:
+            raise ValueError("Collection not initialized. Call create_or_load_collection() first.")
+        
+        results: List[List[RetrievedChunk]] = [[] for _ in queries]
+        positions = [i for i, query in enumerate(queries) if query and query.strip()]
+        if not positions or top_k <= 0:
+            return results
+        
+        query_embeddings = self._encode_queries([queries[i] for i in positions])
+        batch = self.backend.query(query_embeddings, top_k, filters=filters)
+        for row, position in enumerate(positions):
+            results[position] = self._results_from_hits(batch['ids'][row], batch['distances'][row])
+        return results
+    
+    def _results_from_hits(
+        self,
+        chunk_ids: List[str],
+        distances: List[float]
+    ) -> List[RetrievedChunk]:
+        """
+        Build one query's results from backend hits: from the attached
+        chunk store, or else from text/metadata stored in the backend.
+        """
+        if self.chunk_store is not None:
+            return to_retrieved_chunks(self._views_from_store(chunk_ids, distances))
+        return self._results_from_payloads(chunk_ids, distances)
+    
+    def _results_from_payloads(
+        self,
+        chunk_ids: List[str],
+        distances: List[float]
+    ) -> List[RetrievedChunk]:
+        """
+        Build results from text/metadata stored in the backend (used when
+        no chunk store is attached).
         
+        Each chunk's payload is fetched and decoded (drug_names JSON) once,
+        the first time it is hit, and kept as a result template; later hits
+        only copy the template with their score and rank.
+        
+        Args:
+            chunk_ids: Chunk ids returned by the backend (best first)
+            distances: Cosine distances aligned with chunk_ids
+            
+        Returns:
+            List of RetrievedChunk objects, sorted by score (highest first)
+        """
+        missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in self._payload_cache]
+        if missing:
+            self._require_payload()
+            for chunk_id, (text, metadata) in self.backend.get_payloads(missing).items():
+                self._payload_cache[chunk_id] = self._decode_payload(chunk_id, text, metadata)
+        
+        retrieved_chunks = []
+        for chunk_id, distance in zip(chunk_ids, distances):
+            template = self._payload_cache.get(chunk_id)
+            if template is None:
+                print(f"⚠️  Chunk '{chunk_id}' has no stored text/metadata, skipping")
+                continue
+            # Normalize score: cosine distance [0, 2] → score [0, 1]
+            # (drug_names copied too, so callers can't edit the template)
+            retrieved_chunks.append(replace(
+                template,
+                score=max(0.0, min(1.0, 1.0 - distance)),
+                rank=len(retrieved_chunks) + 1,
+                drug_names=list(template.drug_names)
+            ))
         return retrieved_chunks
     
-    def _chunk_to_retrieved_chunk(
+    def search_views(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[RetrievedChunkView]:
+        """
+        Same as search(), but results refer to the attached chunk store by
+        index; the backend only returns ids and distances.
+        
+        Returns:
+            List of RetrievedChunkView objects, sorted by score (highest first)
+        """
+        if not self.backend.is_open:
+            raise ValueError("Collection not initialized. Call create_or_load_collection() first.")
+        if self.chunk_store is None:
+            raise ValueError("No chunk store attached. Call load_chunks() or attach_chunk_store() first.")
+        
+        # Handle empty query
+        if not query or not query.strip():
+            print("⚠️  Empty query provided, returning empty results")
+            return []
+        
+        results = self.backend.query([self._encode_query(query)], top_k, filters=filters)
+        return self._views_from_store(results['ids'][0], results['distances'][0])
+    
+    def _require_payload(self):
+        """Results without a chunk store need text/metadata from the backend."""
+        if not self.backend.stores_payload:
+            raise ValueError(
+                f"The {self.backend.name} backend stores no chunk text/metadata. "
+                "Call load_chunks() or attach_chunk_store() first."
+            )
+    
+    def _encode_query(self, query: str) -> List[float]:
+        """Embed a query with the same model used for the chunks (cached)."""
+        return self._encode_queries([query])[0]
+    
+    def _encode_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed queries, encoding only those missing from the query-embedding
+        cache (in one encode() call).
+        """
+        embeddings = self.query_embedding_cache.get_or_encode(
+            queries,
+            lambda texts: self.query_encoder.encode(
+                texts,
+                batch_size=QUERY_BATCH_SIZE,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        )
+        return [embedding.tolist() for embedding in embeddings]
+    
+    def _views_from_store(
         self,
-        chunk_id: str,
-        distance: float,
-        metadata: dict,
-        text: str,
-        rank: int
-    ) -> RetrievedChunk:
+        chunk_ids: List[str],
+        distances: List[float]
+    ) -> List[RetrievedChunkView]:
         """
-        Convert ChromaDB result to RetrievedChunk object.
+        Resolve backend hits to result views over the attached chunk store.
+        
+        Args:
+            chunk_ids: Chunk ids returned by the backend (best first)
+            distances: Cosine distances aligned with chunk_ids
+            
+        Returns:
+            List of RetrievedChunkView objects, sorted by score (highest first)
+        """
+        views = []
+        for chunk_id, distance in zip(chunk_ids, distances):
+            index = self.chunk_store.index_of(chunk_id)
+            if index is None:
+                print(f"⚠️  Chunk '{chunk_id}' is in the collection but not in the chunk store, skipping")
+                continue
+            views.append(RetrievedChunkView(
+                self.chunk_store,
+                index,
+                max(0.0, min(1.0, 1.0 - distance)),
+                len(views) + 1,
+                "vector"
+            ))
+        return views
+    
+    def _decode_payload(self, chunk_id: str, text: str, metadata: dict) -> RetrievedChunk:
+        """
+        Convert stored ChromaDB text/metadata to a result template
+        (score and rank are filled in per hit).
         
         Args:
             chunk_id: Chunk ID
-            distance: Cosine distance from ChromaDB (0-2, lower is better)
-            metadata: Chunk metadata dict
             text: Chunk text
-            rank: Result rank (1-indexed)
+            metadata: Chunk metadata dict
             
         Returns:
-            RetrievedChunk object with normalized score
+            RetrievedChunk object with score 0 and rank 0
         """
-        # Normalize score: cosine distance [0, 2] → score [0, 1]
-        # Lower distance = higher similarity → higher score
-        score = max(0.0, min(1.0, 1.0 - distance))
-        
         return RetrievedChunk(
             chunk_id=chunk_id,
             document_id=metadata['document_id'],
             text=text,
-            score=score,
-            rank=rank,
+            score=0.0,
+            rank=0,
             retriever_type="vector",
             authority_family=metadata['authority_family'],
             tier=metadata['tier'],
             year=metadata['year'] if metadata['year'] != 0 else None,
             drug_names=json.loads(metadata['drug_names'])  # ✅ Deserialize JSON string
         )
-
     
     def get_chunk_count(self) -> int:
         """
@@ -289,9 +656,7 @@ class VectorStore:
         Returns:
             Chunk count
         """
-        if self.collection is None:
-            return 0
-        return self.collection.count()
+        return self.backend.count()
 
 
 # Example usage
@@ -0,0 +1,30 @@
+"""
+Tests for the API request models
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.api.models import RetrievalFilters, RetrieveRequest
+
+
+def test_drug_name_filters_are_normalized():
+    filters = RetrievalFilters(drug_names=["  Warfarin", "METFORMIN "], tier=[1])
+
+    assert filters.to_filter_dict() == {"drug_names": ["warfarin", "metformin"], "tier": [1]}
+
+
+def test_authority_family_filters_are_normalized():
+    filters = RetrievalFilters(authority_family=["fda", " Nice "])
+
+    assert filters.to_filter_dict() == {"authority_family": ["FDA", "NICE"]}
+
+
+def test_request_filters_are_optional():
+    request = RetrieveRequest(query=" warfarin ", filters={"drug_names": ["Aspirin"]})
+
+    assert request.query == "warfarin"
+    assert request.filters.to_filter_dict() == {"drug_names": ["aspirin"]}
+    assert RetrieveRequest(query="warfarin").filters is None
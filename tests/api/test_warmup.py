@@ -0,0 +1,105 @@
+"""
+Tests for the staged API warm-up
+Checks readiness and /retrieve while a (patched, slow) warm-up is still running
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.api import main
+from src.models.schemas import RetrievedChunk
+
+
+RESULT = RetrievedChunk(
+    chunk_id="doc_1_chunk_0000", document_id="doc_1", text="Warfarin may cause bleeding.",
+    score=1.0, rank=1, retriever_type="bm25", authority_family="FDA", tier=1,
+    year=2020, drug_names=["warfarin"]
+)
+
+
+class FakeComponent:
+    """Stands in for the vector store and BM25 index."""
+
+    def get_chunk_count(self) -> int:
+        return 1
+
+    def get_corpus_size(self) -> int:
+        return 1
+
+
+class FakeRetriever:
+    """Stands in for HybridRetriever; counts warm-up queries."""
+
+    warmup_queries = 0
+
+    def __init__(self, vector_store, bm25_index):
+        pass
+
+    def retrieve_hybrid(self, query, top_k=10):
+        FakeRetriever.warmup_queries += 1
+        return [RESULT]
+
+    def retrieve_bm25_views(self, query, top_k=10, filters=None):
+        return [RESULT]
+
+
+@pytest.fixture
+def vector_store_loaded(monkeypatch) -> threading.Event:
+    """Patch the loaders; the vector store load blocks until the event is set."""
+    loaded = threading.Event()
+
+    def load_vector_store():
+        assert loaded.wait(timeout=10)
+        return FakeComponent()
+
+    monkeypatch.setattr(main, "_load_chunk_store", lambda: [])
+    monkeypatch.setattr(main, "_load_vector_store", load_vector_store)
+    monkeypatch.setattr(main, "_load_bm25_index", FakeComponent)
+    monkeypatch.setattr(main, "_load_llm_generator", lambda: None)
+    monkeypatch.setattr(main, "HybridRetriever", FakeRetriever)
+    monkeypatch.setattr(main.retrieval_logger, "log_retrieval", lambda **kwargs: None)
+    # Module state is restored after the test (shutdown stops the executor)
+    monkeypatch.setattr(main, "retrieval_executor", ThreadPoolExecutor(max_workers=1))
+    for name in ("chunk_store", "vector_store", "bm25_index", "hybrid_retriever", "llm_generator"):
+        monkeypatch.setattr(main, name, None)
+    monkeypatch.setattr(main, "component_status", dict.fromkeys(main.component_status, "pending"))
+    monkeypatch.setattr(main, "startup_timings", {**main.startup_timings, "components_ms": {}})
+    yield loaded
+    loaded.set()
+
+
+def test_ready_and_retrieve_wait_for_warmup(vector_store_loaded):
+    FakeRetriever.warmup_queries = 0
+    request = {"query": "warfarin bleeding", "top_k": 1, "retriever_type": "bm25"}
+
+    with TestClient(main.app) as client:
+        # Warm-up is still loading the vector store
+        assert client.get("/health/live").status_code == 200
+        ready = client.get("/health/ready")
+        assert ready.status_code == 503
+        assert ready.json()["components"]["warmup"] == "pending"
+        assert client.post("/retrieve", json=request).status_code == 503
+
+        vector_store_loaded.set()
+        deadline = time.time() + 10
+        while client.get("/health/ready").status_code != 200:
+            assert time.time() < deadline, "warm-up did not finish"
+            time.sleep(0.01)
+
+        assert FakeRetriever.warmup_queries == 1  # Ready only after the warm-up query
+        assert client.get("/health/ready").json()["components"]["warmup"] == "ready"
+        response = client.post("/retrieve", json=request)
+        assert response.status_code == 200
+        assert [r["chunk_id"] for r in response.json()["results"]] == [RESULT.chunk_id]
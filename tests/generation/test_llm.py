@@ -0,0 +1,83 @@
+"""
+Tests for the LLM generator
+Checks log write failures and queueing of concurrent async Groq calls (no network)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("groq")
+pytest.importorskip("tiktoken")
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.generation import llm as llm_module
+from src.generation.llm import LLMGenerator
+from src.models.schemas import RetrievedChunk
+
+
+CHUNKS = [
+    RetrievedChunk(
+        chunk_id="doc_1_chunk_0000", document_id="doc_1", text="Warfarin may cause bleeding.",
+        score=1.0, rank=1, retriever_type="hybrid", authority_family="FDA", tier=1,
+        year=2020, drug_names=["warfarin"]
+    )
+]
+
+
+def make_generator(tmp_path, monkeypatch, **kwargs) -> LLMGenerator:
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(llm_module.tiktoken, "encoding_for_model", lambda model: None)
+    return LLMGenerator(log_dir=str(tmp_path / "logs"), **kwargs)
+
+
+def test_log_write_failure_keeps_the_answer(tmp_path, monkeypatch):
+    generator = make_generator(tmp_path, monkeypatch)
+
+    async def answer(messages):
+        return "Warfarin may cause bleeding [1].", 10, 5
+
+    def fail(**kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(generator, "_acall_groq", answer)
+    monkeypatch.setattr(generator, "_call_groq", lambda messages: ("Bleeding [1].", 10, 5))
+    monkeypatch.setattr(generator, "log_generation", fail)
+
+    result = asyncio.run(generator.agenerate_answer("Side effects of warfarin?", CHUNKS))
+    assert result.answer_text == "Warfarin may cause bleeding [1]."
+    assert result.cited_chunk_ids == ["doc_1_chunk_0000"]
+
+    result = generator.generate_answer("Side effects of warfarin?", CHUNKS)
+    assert result.answer_text == "Bleeding [1]."
+
+
+def test_async_calls_beyond_the_limit_wait_for_a_slot(tmp_path, monkeypatch):
+    generator = make_generator(tmp_path, monkeypatch, max_concurrent_requests=2)
+    in_flight, peak = 0, 0
+
+    async def create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Bleeding [1]."))],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+        )
+
+    monkeypatch.setattr(generator.async_client.chat.completions, "create", create)
+
+    async def ask_all():
+        return await asyncio.gather(*(
+            generator.agenerate_answer("Side effects of warfarin?", CHUNKS) for _ in range(6)
+        ))
+
+    results = asyncio.run(ask_all())
+    assert [r.answer_text for r in results] == ["Bleeding [1]."] * 6
+    assert peak == 2
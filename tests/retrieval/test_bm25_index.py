@@ -0,0 +1,343 @@
+"""
+BM25 index parity tests
+Checks the inverted-index engine against rank_bm25's BM25Okapi
+"""
+
+import json
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.schemas import Chunk
+from src.retrieval import bm25_index as bm25_module
+from src.retrieval.bm25_index import BM25Index
+from src.retrieval.lru_cache import LRUCache
+
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+
+TEXTS = [
+    "Warfarin may cause major or fatal bleeding. Monitor INR regularly.",
+    "Metformin is contraindicated in severe renal impairment (eGFR below 30 mL/min).",
+    "Common adverse reactions to atorvastatin include nasopharyngitis and arthralgia.",
+    "Lisinopril may cause angioedema. Discontinue lisinopril if angioedema occurs.",
+    "Amoxicillin 500 mg every 8 hours for 5 days in adults.",
+    "Bleeding risk with warfarin increases with NSAIDs such as ibuprofen.",
+    "Ciprofloxacin may cause tendon rupture, especially in older adults.",
+    "The recommended starting dose of metformin is 500 mg twice daily.",
+    "the the the of of and",
+]
+
+QUERIES = [
+    "warfarin bleeding",
+    "What are the side effects of metformin?",
+    "lisinopril lisinopril angioedema",
+    "500 mg",
+    "the",
+    "aspirin contraindications",
+]
+
+
+DRUGS = ["warfarin", "metformin", "atorvastatin", "lisinopril", "amoxicillin",
+         "warfarin", "ciprofloxacin", "metformin", "unknown"]
+
+
+def make_chunk(i: int, text: str) -> Chunk:
+    return Chunk(
+        id=f"doc_{i}_chunk_0000",
+        document_id=f"doc_{i}",
+        text=text,
+        token_count=len(text.split()),
+        chunk_index=0,
+        section=None,
+        authority_family="FDA" if i % 2 == 0 else "NICE",
+        tier=1,
+        year=2024,
+        drug_names=[DRUGS[i]]
+    )
+
+
+@pytest.fixture(scope="module")
+def index() -> BM25Index:
+    bm25_index = BM25Index(k1=1.5, b=0.75)
+    bm25_index.chunks = [make_chunk(i, text) for i, text in enumerate(TEXTS)]
+    bm25_index.build_index()
+    return bm25_index
+
+
+@pytest.fixture(scope="module")
+def okapi(index):
+    return rank_bm25.BM25Okapi(
+        [index.tokenize(text) for text in TEXTS], k1=1.5, b=0.75
+    )
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_scores_match_bm25okapi(index, okapi, query):
+    tokens = index.tokenize(query)
+    assert np.array_equal(index.get_scores(tokens), okapi.get_scores(tokens))
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_ranking_matches_full_sort(index, okapi, query):
+    scores = okapi.get_scores(index.tokenize(query))
+    expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:5]
+    expected = [index.chunks[i].id for i in expected if scores[i] > 0]
+
+    results = index.search(query, top_k=5)
+
+    assert [r.chunk_id for r in results] == expected
+    assert [r.rank for r in results] == list(range(1, len(results) + 1))
+
+
+def test_unknown_and_empty_queries(index):
+    assert index.search("zzz_not_in_vocab", top_k=5) == []
+    assert index.search("   ", top_k=5) == []
+
+
+def test_non_positive_top_k_returns_no_results(index):
+    for top_k in (0, -1):
+        assert index.search("warfarin bleeding", top_k=top_k) == []
+        assert index.search_views("warfarin bleeding", top_k=top_k) == []
+        assert index.search_batch(["warfarin bleeding", "metformin"], top_k=top_k) == [[], []]
+
+
+def test_binary_roundtrip_matches_built_index(index, tmp_path):
+    path = tmp_path / "bm25_index.bin"
+    index.save_to_disk(str(path))
+
+    loaded = BM25Index.load_from_disk(str(path), chunks=index.chunks)
+
+    assert loaded.vocab == index.vocab
+    assert loaded.avgdl == index.avgdl
+    assert not loaded.postings_doc_ids.flags.writeable  # mmap-backed view
+    for query in QUERIES:
+        tokens = index.tokenize(query)
+        assert np.array_equal(loaded.get_scores(tokens), index.get_scores(tokens))
+
+
+def test_load_rejects_mismatched_chunks(index, tmp_path):
+    path = tmp_path / "bm25_index.bin"
+    index.save_to_disk(str(path))
+
+    with pytest.raises(ValueError):
+        BM25Index.load_from_disk(str(path), chunks=index.chunks[:-1])
+
+
+def test_load_rejects_non_index_file(tmp_path):
+    path = tmp_path / "bm25_index.pkl"
+    path.write_bytes(b"not an index")
+
+    with pytest.raises(ValueError):
+        BM25Index.load_from_disk(str(path), chunks=[])
+
+
+def test_load_or_build_reuses_index_until_chunks_change(index, tmp_path):
+    chunks_path = tmp_path / "chunks.json"
+    index_path = tmp_path / "bm25_index.bin"
+    chunks_path.write_text(json.dumps([asdict(c) for c in index.chunks]))
+
+    _, rebuilt = BM25Index.load_or_build(str(index_path), str(chunks_path))
+    assert rebuilt
+    loaded, rebuilt = BM25Index.load_or_build(str(index_path), str(chunks_path))
+    assert not rebuilt
+    assert loaded.source_hash == BM25Index.hash_chunks_file(str(chunks_path))
+
+    # A changed IDF floor rebuilds too
+    floored, rebuilt = BM25Index.load_or_build(str(index_path), str(chunks_path), epsilon=0.5)
+    assert rebuilt and floored.epsilon == 0.5
+    assert BM25Index.read_header(str(index_path))["epsilon"] == 0.5
+    assert BM25Index.load_or_build(str(index_path), str(chunks_path), epsilon=0.5)[1] is False
+
+    changed = [asdict(c) for c in index.chunks]
+    changed[0]["text"] = "warfarin interacts with aspirin"
+    chunks_path.write_text(json.dumps(changed))
+
+    rebuilt_index, rebuilt = BM25Index.load_or_build(str(index_path), str(chunks_path))
+    assert rebuilt
+    assert "aspirin" in rebuilt_index.vocab
+
+
+def test_token_stats_match_counter_scan(index):
+    all_tokens = [t for text in TEXTS for t in index.tokenize(text)]
+    token_counts = Counter(all_tokens)
+
+    stats = index.token_stats
+
+    assert stats["total_tokens"] == len(all_tokens)
+    assert stats["unique_tokens"] == len(token_counts)
+    assert [tuple(t) for t in stats["top_20_tokens"]] == token_counts.most_common(20)
+
+
+def test_parallel_build_matches_serial(index, monkeypatch):
+    monkeypatch.setattr(bm25_module, "PARALLEL_BUILD_MIN_CHUNKS", 0)
+    monkeypatch.setattr(bm25_module.os, "cpu_count", lambda: 4)
+    parallel = BM25Index(k1=1.5, b=0.75)
+    parallel.chunks = index.chunks
+    parallel.build_index(workers=2)
+
+    assert parallel.vocab == index.vocab
+    assert np.array_equal(parallel.postings_doc_ids, index.postings_doc_ids)
+    assert np.array_equal(parallel.postings_tfs, index.postings_tfs)
+    assert np.array_equal(parallel.idf, index.idf)
+
+
+@pytest.mark.parametrize("min_chunks, cpu_count", [(len(TEXTS) + 1, 4), (0, 2)])
+def test_parallel_build_falls_back_to_serial(index, monkeypatch, min_chunks, cpu_count):
+    monkeypatch.setattr(bm25_module, "PARALLEL_BUILD_MIN_CHUNKS", min_chunks)
+    monkeypatch.setattr(bm25_module.os, "cpu_count", lambda: cpu_count)
+    monkeypatch.setattr(bm25_module, "ProcessPoolExecutor", None)  # Must not be used
+    fallback = BM25Index(k1=1.5, b=0.75)
+    fallback.chunks = index.chunks
+    fallback.build_index(workers=2)
+
+    assert fallback.vocab == index.vocab
+    assert np.array_equal(fallback.postings_tfs, index.postings_tfs)
+
+
+def build(chunks) -> BM25Index:
+    bm25_index = BM25Index(k1=1.5, b=0.75)
+    bm25_index.chunks = list(chunks)
+    bm25_index.build_index()
+    return bm25_index
+
+
+def test_add_chunks_matches_full_rebuild(index):
+    incremental = build(index.chunks[:5])
+    incremental.add_chunks(index.chunks[5:])
+
+    assert incremental.vocab == index.vocab
+    assert np.array_equal(incremental.postings_offsets, index.postings_offsets)
+    assert np.array_equal(incremental.postings_doc_ids, index.postings_doc_ids)
+    assert np.array_equal(incremental.postings_tfs, index.postings_tfs)
+    assert np.array_equal(incremental.idf, index.idf)
+    assert incremental.avgdl == index.avgdl
+
+
+def test_remove_document_matches_full_rebuild(index):
+    incremental = build(index.chunks)
+    removed = incremental.remove_document("doc_3")
+    rebuilt = build([c for c in index.chunks if c.document_id != "doc_3"])
+
+    assert removed == 1
+    assert set(incremental.vocab) == set(rebuilt.vocab)
+    assert "angioedema" not in incremental.vocab
+    assert incremental.avgdl == rebuilt.avgdl
+    for query in QUERIES:
+        tokens = index.tokenize(query)
+        assert np.allclose(incremental.get_scores(tokens), rebuilt.get_scores(tokens))
+        assert [r.chunk_id for r in incremental.search(query, top_k=5)] == \
+            [r.chunk_id for r in rebuilt.search(query, top_k=5)]
+    assert incremental.remove_document("doc_missing") == 0
+
+
+def test_search_batch_matches_single_queries(index):
+    queries = QUERIES + ["", "zzz_not_in_vocab"]
+
+    batch = index.search_batch(queries, top_k=5)
+
+    assert len(batch) == len(queries)
+    for query, results in zip(queries, batch):
+        single = index.search(query, top_k=5)
+        assert [r.chunk_id for r in results] == [r.chunk_id for r in single]
+        assert np.allclose([r.score for r in results], [r.score for r in single])
+
+
+def test_searches_do_not_wait_for_writers(index):
+    live = build(index.chunks[:5])
+    published = live._published()
+    before = [(r.chunk_id, r.score) for r in live.search("warfarin bleeding", top_k=5)]
+    postings = published.postings_doc_ids.copy()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with live._lock:  # A writer mid-update
+            results = executor.submit(live.search, "warfarin bleeding", 5).result(timeout=5)
+    assert [(r.chunk_id, r.score) for r in results] == before
+
+    # Writers publish a new state; the one a search already holds is unchanged
+    live.add_chunks(index.chunks[5:])
+    live.remove_document(index.chunks[0].document_id)
+    assert live._published() is not published
+    assert np.array_equal(published.postings_doc_ids, postings)
+    assert [(r.chunk_id, r.score) for r in published.search("warfarin bleeding", top_k=5)] == before
+
+
+def test_query_cache_hits_and_invalidation(index):
+    cached = build(index.chunks[:5])
+    cached.search("warfarin bleeding", top_k=5)
+    cached.search("warfarin bleeding", top_k=5)
+    cached.search_batch(["warfarin bleeding", "metformin"], top_k=5)
+
+    stats = cached.query_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 2)
+
+    cached.add_chunks(index.chunks[5:])  # Term ids / IDF change
+    assert len(cached.query_cache) == 0
+    assert [r.chunk_id for r in cached.search("warfarin bleeding", top_k=5)] == \
+        [r.chunk_id for r in index.search("warfarin bleeding", top_k=5)]
+
+
+def test_query_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_filtered_search_scores_only_matching_chunks(index):
+    results = index.search("500 mg metformin", top_k=5, filters={"drug_names": "metformin"})
+
+    assert [r.chunk_id for r in results] == ["doc_7_chunk_0000", "doc_1_chunk_0000"]
+
+    results = index.search(
+        "500 mg metformin", top_k=5,
+        filters={"drug_names": ["metformin", "amoxicillin"], "authority_family": "FDA"}
+    )
+    assert [r.chunk_id for r in results] == ["doc_4_chunk_0000"]
+    assert index.search("warfarin", top_k=5, filters={"drug_names": "aspirin"}) == []
+
+    with pytest.raises(ValueError):
+        index.search("warfarin", top_k=5, filters={"section": "x"})
+
+
+def test_filtered_search_batch_matches_single_queries(index):
+    queries = QUERIES + ["500 mg metformin"]
+    for filters in (
+        {"drug_names": "metformin"},
+        {"drug_names": ["metformin", "amoxicillin"], "authority_family": "FDA"},
+        {"drug_names": "aspirin"},
+    ):
+        batch = index.search_batch(queries, top_k=5, filters=filters)
+        for query, results in zip(queries, batch):
+            single = index.search(query, top_k=5, filters=filters)
+            assert [r.chunk_id for r in results] == [r.chunk_id for r in single]
+            assert np.allclose([r.score for r in results], [r.score for r in single])
+
+    with pytest.raises(ValueError):
+        index.search_batch(queries, top_k=5, filters={"section": "x"})
+
+
+def test_pruned_search_matches_exhaustive(index, monkeypatch):
+    monkeypatch.setattr(bm25_module, "PRUNING_MIN_POSTINGS", 0)
+    # Repeated chunks give exact score ties at the top-k boundary
+    large = build(index.chunks * 7)
+    exhaustive = build(index.chunks * 7)
+    exhaustive.dynamic_pruning = False
+
+    for query in QUERIES + ["what are the side effects of warfarin and metformin"]:
+        for top_k in (1, 3, 10):
+            pruned = large.search(query, top_k=top_k)
+            full = exhaustive.search(query, top_k=top_k)
+            assert [(r.chunk_id, r.score) for r in pruned] == \
+                [(r.chunk_id, r.score) for r in full]
@@ -0,0 +1,72 @@
+"""
+ChromaDB backend tests
+Checks stale metadata detection and filtered queries
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.schemas import Chunk
+from src.retrieval import chroma_backend
+from src.retrieval.chroma_backend import (
+    METADATA_SCHEMA_KEY,
+    ChromaBackend,
+    chunk_metadata,
+)
+
+
+rng = np.random.default_rng(0)
+CHUNKS = [
+    Chunk(
+        id=f"doc_{i}_chunk_0000", document_id=f"doc_{i}", text=f"chunk {i}",
+        token_count=2, chunk_index=0, section=None, authority_family="FDA",
+        tier=1 + i % 2, year=2020, drug_names=["warfarin"] if i % 3 == 0 else []
+    )
+    for i in range(7)
+]
+EMBEDDINGS = rng.normal(size=(7, 8)).astype(np.float32)
+
+
+def legacy_metadata(chunk: Chunk) -> dict:
+    """Metadata as written before filter support (no per-drug keys, no schema)."""
+    metadata = chunk_metadata(chunk)
+    del metadata[METADATA_SCHEMA_KEY]
+    return {key: value for key, value in metadata.items() if not key.startswith("drug:")}
+
+
+@pytest.fixture
+def backend(tmp_path) -> ChromaBackend:
+    backend = ChromaBackend(str(tmp_path / "chromadb"), collection_name="test_chunks")
+    backend.open()
+    return backend
+
+
+def test_outdated_metadata_ids_finds_legacy_chunks(backend, monkeypatch):
+    monkeypatch.setattr(chroma_backend, "UPDATE_BATCH_SIZE", 2)  # Several pages
+    legacy = {0, 3, 4}
+    backend.add(
+        ids=[chunk.id for chunk in CHUNKS],
+        embeddings=EMBEDDINGS.tolist(),
+        documents=[chunk.text for chunk in CHUNKS],
+        metadatas=[
+            legacy_metadata(chunk) if i in legacy else chunk_metadata(chunk)
+            for i, chunk in enumerate(CHUNKS)
+        ]
+    )
+
+    stale = backend.outdated_metadata_ids()
+    assert sorted(stale) == sorted(CHUNKS[i].id for i in legacy)
+    warfarin = {"drug_names": "warfarin"}
+    assert backend.query(EMBEDDINGS[:1].tolist(), top_k=7, filters=warfarin)["ids"] == [[CHUNKS[6].id]]
+
+    backend.update_metadatas(stale, [chunk_metadata(CHUNKS[i]) for i in sorted(legacy)])
+    assert backend.outdated_metadata_ids() == []
+    results = backend.query(EMBEDDINGS[:1].tolist(), top_k=7, filters=warfarin)
+    assert sorted(results["ids"][0]) == [CHUNKS[0].id, CHUNKS[3].id, CHUNKS[6].id]
@@ -0,0 +1,158 @@
+"""
+Chunk store tests
+Checks the columnar store against the Chunk objects it was built from
+"""
+
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.schemas import Chunk, RetrievedChunkView
+from src.retrieval.bm25_index import BM25Index
+from src.retrieval.chunk_store import ChunkStore
+
+
+CHUNKS = [
+    Chunk(
+        id="fda_warfarin_label_2022_chunk_0000",
+        document_id="fda_warfarin_label_2022",
+        text="Warfarin may cause major or fatal bleeding.",
+        token_count=8,
+        chunk_index=0,
+        section="Boxed Warning",
+        authority_family="FDA",
+        tier=1,
+        year=2022,
+        drug_names=["warfarin"]
+    ),
+    Chunk(
+        id="nice_interactions_2024_chunk_0003",
+        document_id="nice_interactions_2024",
+        text="Ibuprofen increases bleeding risk with warfarin — monitor INR (µg/L).",
+        token_count=11,
+        chunk_index=3,
+        section=None,
+        authority_family="NICE",
+        tier=1,
+        year=None,
+        drug_names=["ibuprofen", "warfarin"]
+    ),
+    Chunk(
+        id="who_misc_chunk_0001",
+        document_id="who_misc",
+        text="",
+        token_count=0,
+        chunk_index=1,
+        section="Boxed Warning",
+        authority_family="WHO",
+        tier=2,
+        year=0,
+        drug_names=[]
+    ),
+]
+
+
+def test_store_returns_original_chunks():
+    store = ChunkStore.from_chunks(CHUNKS)
+
+    assert len(store) == len(CHUNKS)
+    assert list(store) == CHUNKS
+    assert store[-1] == CHUNKS[-1]
+    assert store[1:] == CHUNKS[1:]
+    assert store.text(1) == CHUNKS[1].text
+    assert store.index_of("nice_interactions_2024_chunk_0003") == 1
+    assert store.index_of("missing") is None
+
+
+def test_saved_store_is_mmap_backed(tmp_path):
+    path = tmp_path / "chunk_store.bin"
+    ChunkStore.from_chunks(CHUNKS).save(str(path), source_hash="abc")
+
+    store = ChunkStore.load(str(path))
+
+    assert list(store) == CHUNKS
+    assert store.source_hash == "abc"
+    assert not store.text_blob.flags.writeable
+
+
+def test_load_or_build_rebuilds_when_chunks_change(tmp_path):
+    chunks_path = tmp_path / "chunks.json"
+    store_path = tmp_path / "chunk_store.bin"
+    chunks_path.write_text(json.dumps([asdict(c) for c in CHUNKS]))
+
+    _, rebuilt = ChunkStore.load_or_build(str(store_path), str(chunks_path))
+    assert rebuilt
+    store, rebuilt = ChunkStore.load_or_build(str(store_path), str(chunks_path))
+    assert not rebuilt and list(store) == CHUNKS
+
+    chunks_path.write_text(json.dumps([asdict(c) for c in CHUNKS[:2]]))
+    store, rebuilt = ChunkStore.load_or_build(str(store_path), str(chunks_path))
+    assert rebuilt and len(store) == 2
+
+
+def test_load_rejects_non_store_file(tmp_path):
+    path = tmp_path / "chunk_store.bin"
+    path.write_bytes(b"not a store")
+
+    with pytest.raises(ValueError):
+        ChunkStore.load(str(path))
+
+
+def test_bm25_index_over_store_matches_chunk_list():
+    from_list = BM25Index()
+    from_list.chunks = list(CHUNKS)
+    from_list.build_index()
+    from_store = BM25Index()
+    from_store.chunks = ChunkStore.from_chunks(CHUNKS)
+    from_store.build_index()
+
+    for field, masks in from_list.filter_masks.items():
+        assert masks.keys() == from_store.filter_masks[field].keys()
+        for value, mask in masks.items():
+            assert np.array_equal(mask, from_store.filter_masks[field][value])
+
+    filters = {"drug_names": "warfarin", "tier": 1}
+    assert from_store.search("bleeding warfarin", top_k=3, filters=filters) == \
+        from_list.search("bleeding warfarin", top_k=3, filters=filters)
+
+
+def test_search_views_refer_to_shared_store():
+    store = ChunkStore.from_chunks(CHUNKS)
+    index = BM25Index()
+    index.chunks = store
+    index.build_index()
+
+    views = index.search_views("bleeding warfarin", top_k=3)
+
+    assert all(isinstance(view, RetrievedChunkView) and view.chunks is store for view in views)
+    assert [view.chunk_id for view in views] == [store[view.index].id for view in views]
+    assert [view.to_retrieved_chunk() for view in views] == index.search("bleeding warfarin", top_k=3)
+    with pytest.raises(AttributeError):
+        store[0].text = "mutated"
+
+
+def test_year_range_filters_skip_chunks_without_year():
+    store = ChunkStore.from_chunks(CHUNKS)
+    index = BM25Index()
+    index.chunks = list(CHUNKS)
+    index.build_index()
+
+    for filters, expected in [
+        ({"year_min": 2020}, [True, False, False]),
+        ({"year_max": 2023}, [True, False, True]),
+        ({"drug_names": "warfarin", "year_min": 2020, "year_max": 2022}, [True, False, False]),
+        ({"authority_family": ["NICE", "WHO"], "tier": [1, 2]}, [False, True, True]),
+    ]:
+        assert store.filter_mask(filters).tolist() == expected
+        assert index.filter_mask(filters).tolist() == expected
+
+    assert [r.chunk_id for r in index.search("bleeding warfarin", top_k=3, filters={"year_min": 2020})] == \
+        [CHUNKS[0].id]
+    with pytest.raises(ValueError):
+        store.filter_mask({"year": 2022})
@@ -0,0 +1,80 @@
+"""
+Embedding cache tests
+Checks the query cache tiers, that only misses are encoded, and the
+content-addressed chunk cache
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.retrieval.embedding_cache import ChunkEmbeddingCache, QueryEmbeddingCache
+
+
+class CountingEncoder:
+    """Deterministic stand-in for SentenceTransformer.encode."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(t), t.count(" "), 1.5] for t in texts], dtype=np.float32)
+
+
+def test_only_misses_are_encoded_once():
+    cache = QueryEmbeddingCache("all-MiniLM-L6-v2", maxsize=8)
+    encode = CountingEncoder()
+
+    first = cache.get_or_encode(["warfarin bleeding", "  warfarin   bleeding ", "metformin"], encode)
+    second = cache.get_or_encode(["metformin", "warfarin bleeding"], encode)
+
+    assert encode.calls == [["warfarin bleeding", "metformin"]]
+    assert np.array_equal(first[0], first[1])
+    assert np.array_equal(second[1], first[0])
+    assert cache.stats()["hits"] == 2 and cache.stats()["disk"] is None
+
+
+def test_disk_tier_survives_restart_and_is_keyed_by_model(tmp_path):
+    path = str(tmp_path / "query_embeddings.sqlite")
+    cache = QueryEmbeddingCache("all-MiniLM-L6-v2", path=path)
+    cache.put("warfarin bleeding", np.array([0.1, 0.2, 0.3], dtype=np.float32))
+    cache.close()
+
+    reopened = QueryEmbeddingCache("all-MiniLM-L6-v2", path=path)
+    embedding = reopened.get("warfarin  bleeding")
+    assert embedding.dtype == np.float32
+    assert np.array_equal(embedding, np.array([0.1, 0.2, 0.3], dtype=np.float32))
+    assert reopened.get("warfarin bleeding") is embedding  # Promoted to memory
+
+    stats = reopened.stats()
+    assert stats["disk"]["hits"] == 1 and stats["memory"]["hits"] == 1
+    assert stats["disk"]["size"] == 1
+
+    other_model = QueryEmbeddingCache("all-mpnet-base-v2", path=path)
+    assert other_model.get("warfarin bleeding") is None
+    assert other_model.stats()["misses"] == 1
+
+
+def test_chunk_cache_is_content_addressed(tmp_path):
+    path = str(tmp_path / "chunk_embeddings.sqlite")
+    texts = ["Warfarin may cause bleeding.", "Metformin lowers glucose.", "Warfarin may cause bleeding."]
+    cache = ChunkEmbeddingCache("all-MiniLM-L6-v2", path=path)
+    assert cache.get_many(texts) == [None, None, None]
+    cache.put_many(texts[:2], CountingEncoder()(texts[:2]))
+    cache.close()
+
+    # Re-chunked corpus: one text unchanged (twice), one edited
+    reopened = ChunkEmbeddingCache("all-MiniLM-L6-v2", path=path)
+    found = reopened.get_many(["Warfarin may cause bleeding.", "Metformin lowers glucose!", texts[0]])
+    assert np.array_equal(found[0], CountingEncoder()([texts[0]])[0])
+    assert found[1] is None and np.array_equal(found[2], found[0])
+    assert reopened.stats()["hits"] == 2 and reopened.stats()["misses"] == 1
+    assert reopened.stats()["size"] == 2
+
+    reopened.reset_counts()
+    assert ChunkEmbeddingCache("all-mpnet-base-v2", path=path).get_many(texts[:1]) == [None]
+    assert reopened.stats()["hits"] == 0
@@ -0,0 +1,68 @@
+"""
+Embedding pool tests
+Checks pooled batch order, parity with single-process encoding and worker thread limits
+"""
+
+import os
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.retrieval.embedding_pool import _THREAD_ENV_VARS, EmbeddingPool
+
+# In a spawned worker this runs while unpickling the pool's initializer
+# arguments, i.e. with the environment the worker was started with
+IMPORT_THREAD_LIMITS = [os.environ.get(name) for name in _THREAD_ENV_VARS]
+
+
+class StubModel:
+    """Tiny deterministic encoder (no torch), loadable in spawned workers."""
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        return np.array(
+            [[len(text), zlib.crc32(text.encode()) % 997, text.count(" ")] for text in texts],
+            dtype=np.float64
+        )
+
+
+def load_stub_model(model_name: str, threads: int) -> StubModel:
+    return StubModel()
+
+
+def test_pooled_batches_match_single_process_in_order():
+    texts = [f"chunk {i} " + "word " * (i % 7) for i in range(40)]
+    batches = [texts[start:start + size] for start, size in zip(range(0, 40, 8), (8, 1, 8, 5, 8))]
+
+    with EmbeddingPool("stub", workers=2, load_model=load_stub_model) as pool:
+        pooled = list(pool.encode_batches(batches))
+
+    assert len(pooled) == len(batches)
+    for batch, embeddings in zip(batches, pooled):
+        assert embeddings.dtype == np.float32
+        assert np.array_equal(embeddings, StubModel().encode(batch).astype(np.float32))
+
+
+class ThreadEnvModel:
+    """Encodes every text as the thread limits the worker started with."""
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        return np.array([[int(limit or 0) for limit in IMPORT_THREAD_LIMITS] for _ in texts])
+
+
+def load_thread_env_model(model_name: str, threads: int) -> ThreadEnvModel:
+    return ThreadEnvModel()
+
+
+def test_workers_start_with_thread_limits(monkeypatch):
+    for name in _THREAD_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+
+    with EmbeddingPool("stub", workers=2, threads_per_worker=3, load_model=load_thread_env_model) as pool:
+        pooled = list(pool.encode_batches([["a"], ["b", "c"], ["d"], ["e"]]))
+
+    assert all((embeddings == 3).all() for embeddings in pooled)
+    assert not any(name in os.environ for name in _THREAD_ENV_VARS)  # Restored here
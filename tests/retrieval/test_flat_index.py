@@ -0,0 +1,181 @@
+"""
+Flat vector index tests
+Checks exact cosine search and the mmap'd on-disk format
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.schemas import Chunk
+from src.retrieval.chunk_store import ChunkStore
+from src.retrieval.flat_index import FlatIndexBackend
+
+
+rng = np.random.default_rng(0)
+IDS = [f"doc_{i}_chunk_{i:04d}" for i in range(50)]
+EMBEDDINGS = rng.normal(size=(50, 16)).astype(np.float32)
+QUERIES = rng.normal(size=(4, 16)).astype(np.float32)
+
+
+def exact_top_k(query: np.ndarray, k: int):
+    unit = EMBEDDINGS / np.linalg.norm(EMBEDDINGS, axis=1, keepdims=True)
+    similarities = unit @ (query / np.linalg.norm(query))
+    order = np.argsort(-similarities, kind="stable")[:k]
+    return [IDS[i] for i in order], (1.0 - similarities[order]).tolist()
+
+
+@pytest.fixture
+def index(tmp_path) -> FlatIndexBackend:
+    backend = FlatIndexBackend(str(tmp_path / "vector_index.bin"))
+    backend.open()
+    backend.add(IDS[:30], EMBEDDINGS[:30], [], [])
+    backend.add(IDS[20:], EMBEDDINGS[20:], [], [])  # Overlapping ids are skipped
+    backend.flush()
+    return backend
+
+
+def test_query_matches_exact_cosine_search(index):
+    results = index.query(QUERIES, top_k=5)
+
+    assert index.count() == len(IDS)
+    for query, ids, distances in zip(QUERIES, results["ids"], results["distances"]):
+        expected_ids, expected_distances = exact_top_k(query, 5)
+        assert ids == expected_ids
+        assert np.allclose(distances, expected_distances, atol=1e-5)
+
+
+def test_reopened_index_is_mmap_backed(index):
+    reopened = FlatIndexBackend(str(index.filepath))
+    reopened.open()
+
+    assert reopened.count() == len(IDS)
+    assert not reopened.embeddings.flags.writeable
+    assert reopened.query(QUERIES, top_k=5) == index.query(QUERIES, top_k=5)
+
+    reopened.open(reset=True)
+    assert reopened.count() == 0 and not index.filepath.exists()
+    assert reopened.query(QUERIES[:1], top_k=5) == {"ids": [[]], "distances": [[]]}
+
+
+def test_add_buffers_rows_until_flush(tmp_path, monkeypatch):
+    index = FlatIndexBackend(str(tmp_path / "vector_index.bin"))
+    index.open()
+    saves = []
+    monkeypatch.setattr(index, "save", lambda: saves.append(index.count()))
+
+    for start in range(0, len(IDS), 7):
+        index.add(IDS[start:start + 7], EMBEDDINGS[start:start + 7], [], [])
+    index.add(IDS[:5], EMBEDDINGS[:5], [], [])  # Buffered ids are skipped too
+
+    assert saves == [] and index.count() == len(IDS)
+    assert index.existing_ids(IDS[-3:] + ["missing"]) == set(IDS[-3:])
+    assert index.query(QUERIES[:1], top_k=5)["ids"][0] == exact_top_k(QUERIES[0], 5)[0]
+
+    index.add(IDS[:1], EMBEDDINGS[:1], [], [])
+    with pytest.raises(ValueError):
+        index.add(["other"], EMBEDDINGS[:1, :3], [], [])
+    index.flush()
+    assert saves == [len(IDS)]  # Rows merged for the query are still saved
+
+
+def test_rows_merged_by_a_query_are_saved_on_flush(tmp_path):
+    path = tmp_path / "vector_index.bin"
+    index = FlatIndexBackend(str(path))
+    index.open()
+    index.add(IDS[:2], EMBEDDINGS[:2], [], [])
+    index.query(QUERIES[:1], top_k=1)  # Merges the buffered rows
+    index.flush()
+
+    reopened = FlatIndexBackend(str(path))
+    reopened.open()
+    assert reopened.count() == 2
+    assert reopened.existing_ids(IDS[:3]) == set(IDS[:2])
+
+
+def test_flush_saves_buffered_rows_once(tmp_path):
+    path = tmp_path / "vector_index.bin"
+    index = FlatIndexBackend(str(path))
+    index.open()
+    index.add(IDS[:30], EMBEDDINGS[:30], [], [])
+    index.add(IDS[30:], EMBEDDINGS[30:], [], [])
+    assert not path.exists()
+
+    index.flush()
+    reopened = FlatIndexBackend(str(path))
+    reopened.open()
+    assert reopened.count() == len(IDS)
+    assert reopened.query(QUERIES, top_k=5) == index.query(QUERIES, top_k=5)
+
+
+def test_open_rejects_non_index_file(tmp_path):
+    path = tmp_path / "vector_index.bin"
+    path.write_bytes(b"not an index")
+
+    with pytest.raises(ValueError):
+        FlatIndexBackend(str(path)).open()
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_quantized_search_rescored_to_exact_distances(tmp_path, quantization):
+    exact = FlatIndexBackend(str(tmp_path / "exact.bin"))
+    exact.open()
+    exact.add(IDS, EMBEDDINGS, [], [])
+    path = str(tmp_path / f"{quantization}.bin")
+    quantized = FlatIndexBackend(path, quantization=quantization)
+    quantized.open()
+    quantized.add(IDS, EMBEDDINGS, [], [])
+    quantized.flush()
+
+    # Rescoring every row is exact; a small candidate pool still returns
+    # exact distances for the rows it finds
+    quantized.rescore_multiplier = len(IDS)
+    rescored, expected = quantized.query(QUERIES, top_k=5), exact.query(QUERIES, top_k=5)
+    assert rescored["ids"] == expected["ids"]
+    assert np.allclose(rescored["distances"], expected["distances"], atol=1e-6)
+
+    reopened = FlatIndexBackend(path, quantization=quantization, rescore_multiplier=2)
+    reopened.open()
+    assert np.array_equal(reopened.codes, quantized.codes)
+    distances = dict(zip(IDS, (1.0 - EMBEDDINGS @ QUERIES[0] / (
+        np.linalg.norm(EMBEDDINGS, axis=1) * np.linalg.norm(QUERIES[0]))).tolist()))
+    result = reopened.query(QUERIES[:1], top_k=5)
+    for chunk_id, distance in zip(result["ids"][0], result["distances"][0]):
+        assert distance == pytest.approx(distances[chunk_id], abs=1e-5)
+
+
+@pytest.mark.parametrize("quantization", [None, "int8", "binary"])
+def test_filtered_query_searches_only_matching_rows(tmp_path, quantization):
+    # Chunk i: tier 1 + 2020 for even i, tier 2 + no year for odd i; the
+    # last ten ids are not in the store and never match a filter
+    store = ChunkStore.from_chunks([
+        Chunk(
+            id=chunk_id, document_id=f"doc_{i}", text="", token_count=0,
+            chunk_index=i, section=None, authority_family="FDA",
+            tier=1 + i % 2, year=None if i % 2 else 2020,
+            drug_names=["warfarin"] if i % 3 == 0 else []
+        )
+        for i, chunk_id in enumerate(IDS[:40])
+    ])
+    index = FlatIndexBackend(str(tmp_path / "vector_index.bin"), quantization=quantization)
+    index.open()
+    index.add(IDS, EMBEDDINGS, [], [])
+    index.rescore_multiplier = len(IDS)
+
+    with pytest.raises(ValueError):
+        index.query(QUERIES, top_k=5, filters={"tier": 1})
+    index.attach_chunk_store(store)
+
+    filters = {"drug_names": "warfarin", "year_min": 2019}  # i % 6 == 0
+    matching = {IDS[i] for i in range(0, 40, 6)}
+    results = index.query(QUERIES, top_k=5, filters=filters)
+    for query, ids in zip(QUERIES, results["ids"]):
+        expected_ids, _ = exact_top_k(query, len(IDS))
+        assert ids == [chunk_id for chunk_id in expected_ids if chunk_id in matching][:5]
+
+    assert len(index.query(QUERIES[:1], top_k=50, filters=filters)["ids"][0]) == len(matching)
+    assert index.query(QUERIES[:1], top_k=5, filters={"tier": 3}) == {"ids": [[]], "distances": [[]]}
@@ -0,0 +1,123 @@
+"""
+Query encoder backend tests
+Checks that ONNX (fp32 and int8) query embeddings agree with PyTorch, and
+which int8 file is loaded or exported
+"""
+
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.retrieval import query_encoder
+from src.retrieval.query_encoder import int8_file_suffix, load_encoder
+
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+QUERIES = [
+    "What are the side effects of warfarin?",
+    "metformin dose in renal impairment",
+    "Can ibuprofen be taken with lisinopril?",
+    "atorvastatin contraindications",
+]
+# Minimum cosine similarity to the PyTorch embedding of the same query
+MIN_COSINE = {"onnx": 0.9999, "onnx-int8": 0.98}
+
+
+def encode(model, texts) -> np.ndarray:
+    embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+@pytest.fixture(scope="module")
+def torch_embeddings():
+    for module in ("sentence_transformers", "onnxruntime", "optimum"):
+        pytest.importorskip(module)
+    return encode(load_encoder(MODEL_NAME, "torch"), QUERIES)
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_embeddings_match_torch(torch_embeddings, backend):
+    embeddings = encode(load_encoder(MODEL_NAME, backend, threads=1), QUERIES)
+
+    cosines = np.sum(embeddings * torch_embeddings, axis=1)
+    assert cosines.min() >= MIN_COSINE[backend]
+
+    # Query-query similarities (what ranking depends on) are preserved too
+    assert np.allclose(embeddings @ embeddings.T, torch_embeddings @ torch_embeddings.T, atol=0.02)
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        load_encoder(MODEL_NAME, "tensorrt")
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_backend_without_optimum_names_the_package(monkeypatch, backend):
+    monkeypatch.setitem(sys.modules, "optimum.onnxruntime", None)  # Not installed
+
+    with pytest.raises(ImportError, match=r"pip install 'optimum\[onnxruntime\]"):
+        load_encoder(MODEL_NAME, backend)
+
+
+def test_int8_file_suffix_follows_weight_type():
+    assert int8_file_suffix("avx2") == "quint8_avx2"
+    assert int8_file_suffix("avx512_vnni") == "qint8_avx512_vnni"
+    with pytest.raises(ValueError):
+        int8_file_suffix("sse4")
+
+
+class FakeSentenceTransformer:
+    """Loads only directories holding the requested ONNX file."""
+
+    loaded = []
+
+    def __init__(self, path, backend="torch", model_kwargs=None):
+        file_name = (model_kwargs or {}).get("file_name")
+        if file_name and not (Path(path) / file_name).exists():
+            raise FileNotFoundError(file_name)
+        self.loaded.append((path, file_name))
+
+    def save_pretrained(self, path):
+        Path(path).mkdir(parents=True, exist_ok=True)
+
+
+def fake_export(model, config, path, file_suffix=None):
+    (Path(path) / "onnx").mkdir(parents=True, exist_ok=True)
+    (Path(path) / "onnx" / f"model_{file_suffix}.onnx").touch()
+
+
+@pytest.fixture
+def fake_backends(monkeypatch, tmp_path):
+    sentence_transformers = types.SimpleNamespace(
+        SentenceTransformer=FakeSentenceTransformer,
+        export_dynamic_quantized_onnx_model=fake_export
+    )
+    onnxruntime = types.SimpleNamespace(
+        SessionOptions=types.SimpleNamespace,
+        GraphOptimizationLevel=types.SimpleNamespace(ORT_ENABLE_ALL=99)
+    )
+    monkeypatch.setitem(sys.modules, "sentence_transformers", sentence_transformers)
+    monkeypatch.setitem(sys.modules, "onnxruntime", onnxruntime)
+    monkeypatch.setitem(sys.modules, "optimum", types.ModuleType("optimum"))
+    monkeypatch.setitem(sys.modules, "optimum.onnxruntime", types.ModuleType("optimum.onnxruntime"))
+    monkeypatch.setattr(query_encoder, "ONNX_EXPORT_DIR", tmp_path)
+    monkeypatch.setattr(query_encoder, "ONNX_INT8_CONFIG", "avx2")
+    FakeSentenceTransformer.loaded = []
+    return tmp_path
+
+
+def test_int8_export_is_reused(fake_backends):
+    export_dir = fake_backends / "org__model"
+
+    load_encoder("org/model", "onnx-int8")
+    load_encoder("org/model", "onnx-int8")
+
+    # Hub miss, fp32 load for the export, then the exported file (exported once)
+    int8_loads = [load for load in FakeSentenceTransformer.loaded if load[1]]
+    assert int8_loads == [(str(export_dir), "onnx/model_quint8_avx2.onnx")] * 2
+    assert len(FakeSentenceTransformer.loaded) == 3
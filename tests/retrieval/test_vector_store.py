@@ -0,0 +1,215 @@
+"""
+Vector store tests
+Checks embedding batches, resumable add_chunks, batch search and payload templates with a stub encoder
+"""
+
+import sys
+import zlib
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.schemas import Chunk
+from src.retrieval.chunk_store import ChunkStore
+from src.retrieval import vector_store as vector_store_module
+from src.retrieval.embedding_pool import EmbeddingPool
+from src.retrieval.vector_store import CHARS_PER_TOKEN, VectorStore
+
+
+class StubEncoder:
+    """Deterministic stand-in for a SentenceTransformer that records its batches."""
+
+    max_seq_length = 64
+
+    def __init__(self):
+        self.batches = []
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return 4
+
+    @staticmethod
+    def embed(text: str) -> np.ndarray:
+        return np.array(
+            [len(text), zlib.crc32(text.encode()) % 997, text.count(" "), 1.0],
+            dtype=np.float32
+        )
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        self.batches.append(list(texts))
+        return np.stack([self.embed(text) for text in texts])
+
+
+def load_stub_encoder(model_name: str, threads: int) -> StubEncoder:
+    return StubEncoder()
+
+
+CHUNKS = [
+    Chunk(
+        id=f"doc_{i}_chunk_0000", document_id=f"doc_{i}", text="word " * (3 + 7 * i % 40),
+        token_count=3 + 7 * i % 40, chunk_index=0, section=None, authority_family="FDA",
+        tier=1, year=2020, drug_names=["warfarin"]
+    )
+    for i in range(12)
+]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> VectorStore:
+    monkeypatch.setattr(vector_store_module, "load_encoder", lambda *args, **kwargs: StubEncoder())
+    store = VectorStore(backend="flat", flat_index_path=str(tmp_path / "vector_index.bin"))
+    store.create_or_load_collection()
+    return store
+
+
+def estimated_tokens(store: VectorStore, text: str) -> int:
+    return min(len(text) // CHARS_PER_TOKEN + 2, store.embedding_model.max_seq_length)
+
+
+def test_length_sorted_batches_fit_token_budget(store, monkeypatch):
+    monkeypatch.setattr(vector_store_module, "EMBED_MAX_BATCH_SIZE", 4)
+    texts = [chunk.text for chunk in CHUNKS] + ["x" * 1000]  # Truncated to max_seq_length
+
+    batches = store._length_sorted_batches(texts, max_batch_tokens=64)
+
+    positions = [position for batch in batches for position in batch]
+    assert sorted(positions) == list(range(len(texts)))
+    lengths = [estimated_tokens(store, texts[i]) for i in positions]
+    assert lengths == sorted(lengths, reverse=True)  # Longest first
+    for batch in batches:
+        assert len(batch) <= 4
+        # Padded to the batch's longest text; single over-budget texts get their own batch
+        assert len(batch) == 1 or len(batch) * estimated_tokens(store, texts[batch[0]]) <= 64
+    assert len(batches) > 1
+
+
+def test_generate_embeddings_restores_input_order(store):
+    texts = [chunk.text for chunk in CHUNKS]
+
+    embeddings = store._generate_embeddings(texts, max_batch_tokens=64)
+
+    assert embeddings.dtype == np.float32
+    assert np.array_equal(embeddings, np.stack([StubEncoder.embed(text) for text in texts]))
+    encoded = [text for batch in store.embedding_model.batches for text in batch]
+    assert len(store.embedding_model.batches) > 1 and encoded != texts  # Encoded sorted
+    assert sorted(encoded) == sorted(texts)
+
+
+def test_pooled_embeddings_match_single_process(store):
+    texts = [chunk.text for chunk in CHUNKS]
+
+    with EmbeddingPool("stub", workers=2, load_model=load_stub_encoder) as pool:
+        pooled = store._generate_embeddings(texts, max_batch_tokens=64, pool=pool)
+
+    assert np.array_equal(pooled, store._generate_embeddings(texts, max_batch_tokens=64))
+
+
+def test_add_chunks_resumes_and_counts(store, tmp_path):
+    counts = store.add_chunks(CHUNKS[:5], checkpoint_size=2)
+
+    assert counts == {"added": 5, "encoded": 5, "cache_hits": 0, "cache_misses": 0}
+
+    # Restarted run: stored chunks are skipped and not encoded again
+    store.embedding_model.batches.clear()
+    counts = store.add_chunks(CHUNKS, checkpoint_size=2)
+
+    assert counts == {"added": 7, "encoded": 7, "cache_hits": 0, "cache_misses": 0}
+    encoded = [text for batch in store.embedding_model.batches for text in batch]
+    assert sorted(encoded) == sorted(chunk.text for chunk in CHUNKS[5:])
+    assert store.add_chunks(CHUNKS)["added"] == 0
+
+    # Everything was saved, with each embedding stored under its chunk id
+    reopened = VectorStore(backend="flat", flat_index_path=str(tmp_path / "vector_index.bin"))
+    reopened.create_or_load_collection()
+    assert reopened.get_chunk_count() == len(CHUNKS)
+    for chunk in CHUNKS:
+        results = reopened.backend.query([StubEncoder.embed(chunk.text).tolist()], 1)
+        assert results["ids"][0] == [chunk.id]
+        assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_killed_add_chunks_only_reembeds_unsaved_chunks(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store_module, "ADD_FLUSH_EVERY", 2)
+    path = tmp_path / "vector_index.bin"
+    cached_embeddings = store._cached_embeddings
+    on_disk = {}
+
+    def killed_in_checkpoint_4(texts, counts, **kwargs):
+        if counts["encoded"] == 6:
+            on_disk["bytes"] = path.read_bytes()  # What a SIGKILL would leave behind
+            raise KeyboardInterrupt
+        return cached_embeddings(texts, counts, **kwargs)
+
+    monkeypatch.setattr(store, "_cached_embeddings", killed_in_checkpoint_4)
+    with pytest.raises(KeyboardInterrupt):
+        store.add_chunks(CHUNKS, checkpoint_size=2)
+    path.write_bytes(on_disk["bytes"])
+
+    restarted = VectorStore(backend="flat", flat_index_path=str(path))
+    restarted.create_or_load_collection()
+    assert restarted.get_chunk_count() == 4  # Checkpoints 1-2 saved, 3 lost
+
+    counts = restarted.add_chunks(CHUNKS, checkpoint_size=2)
+
+    assert counts["added"] == counts["encoded"] == len(CHUNKS) - 4
+    encoded = [text for batch in restarted.embedding_model.batches for text in batch]
+    assert sorted(encoded) == sorted(chunk.text for chunk in CHUNKS[4:])
+
+
+@pytest.mark.parametrize("backend", ["flat", "chroma"])
+def test_search_batch_matches_search(tmp_path, monkeypatch, backend):
+    monkeypatch.setattr(vector_store_module, "load_encoder", lambda *args, **kwargs: StubEncoder())
+    store = VectorStore(
+        persist_directory=str(tmp_path / "chromadb"), backend=backend,
+        flat_index_path=str(tmp_path / "vector_index.bin")
+    )
+    if backend == "flat":  # Chroma resolves hits from its stored payloads instead
+        store.attach_chunk_store(ChunkStore.from_chunks(CHUNKS))
+    store.create_or_load_collection()
+    store.add_chunks(CHUNKS)
+    queries = [CHUNKS[2].text, "", CHUNKS[9].text]
+
+    for filters in (None, {"authority_family": "FDA"}, {"authority_family": "NICE"}):
+        batch = store.search_batch(queries, top_k=3, filters=filters)
+        single = [store.search(query, top_k=3, filters=filters) for query in queries]
+        assert [[r.chunk_id for r in results] for results in batch] == \
+            [[r.chunk_id for r in results] for results in single]
+        for batch_results, single_results in zip(batch, single):
+            assert [r.score for r in batch_results] == \
+                pytest.approx([r.score for r in single_results], abs=1e-6)
+        expected_counts = [0, 0, 0] if filters == {"authority_family": "NICE"} else [3, 0, 3]
+        assert [len(results) for results in batch] == expected_counts
+    assert store.search_batch(queries, top_k=0) == [[], [], []]
+
+
+def test_payload_templates_give_independent_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store_module, "load_encoder", lambda *args, **kwargs: StubEncoder())
+    store = VectorStore(persist_directory=str(tmp_path / "chromadb"))  # No chunk store attached
+    store.create_or_load_collection()
+    store.add_chunks(CHUNKS)
+    fetched = []
+    get_payloads = store.backend.get_payloads
+    monkeypatch.setattr(
+        store.backend, "get_payloads", lambda ids: fetched.extend(ids) or get_payloads(ids)
+    )
+
+    query = CHUNKS[3].text
+    first = store.search(query, top_k=5)
+    templates = {chunk_id: replace(template) for chunk_id, template in store._payload_cache.items()}
+    first[0].score = -1.0
+    first[0].drug_names.append("edited")
+    second = store.search(query, top_k=5)
+
+    assert len(templates) == 5 and sorted(fetched) == sorted(templates)  # Fetched on first hit only
+    assert [r.chunk_id for r in second][0] == CHUNKS[3].id
+    assert [r.rank for r in second] == [1, 2, 3, 4, 5]
+    distances = store.backend.query([StubEncoder.embed(query).tolist()], 5)["distances"][0]
+    assert [r.score for r in second] == pytest.approx([1.0 - d for d in distances], abs=1e-6)
+    assert second[0].drug_names == ["warfarin"] and second[0] is not first[0]
+    assert second[1:] == first[1:] and all(a is not b for a, b in zip(first, second))
+    assert store._payload_cache == templates  # Templates unchanged (score 0, rank 0)